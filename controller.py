@@ -1,9 +1,15 @@
+import threading
 import tkinter as tk
 from tkinter import ttk
+from datetime import datetime, timedelta
 from model import LibraryModel
 from view import LibraryView
 
 class LibraryController:
+    PEOPLE_PAGE_SIZE = 100
+    MAINTENANCE_INTERVAL_MS = 60 * 60 * 1000  # μία φορά την ώρα
+    MAINTENANCE_POLL_MS = 500  # έλεγχος αν τελείωσε η συντήρηση του νήματος παρασκηνίου
+
     def __init__(self):
         self.root = tk.Tk()
         self.db = LibraryModel()
@@ -12,10 +18,48 @@ class LibraryController:
         self.current_user_id = None
         self.current_user_type = None
         self.current_user_data = None
+        self.people_offset = 0
+        self.last_reconciliation = None
+        self.maintenance_thread = None
+        self.maintenance_errors = []
 
         self.show_login_screen()
+        self.root.after_idle(self.run_maintenance)
+        self.db.start_autocomplete()
         self.root.mainloop()
 
+    def run_maintenance(self):
+        """Περιοδική συντήρηση όσο τρέχει η εφαρμογή, σε νήμα παρασκηνίου ώστε να μην παγώνει το παράθυρο"""
+        if self.maintenance_thread is None or not self.maintenance_thread.is_alive():
+            self.maintenance_thread = threading.Thread(target=self._maintenance_job, daemon=True)
+            self.maintenance_thread.start()
+            self.root.after(self.MAINTENANCE_POLL_MS, self._check_maintenance)
+        self.root.after(self.MAINTENANCE_INTERVAL_MS, self.run_maintenance)
+
+    def _maintenance_job(self):
+        """Συντήρηση κρατήσεων - και μία φορά τη μέρα συμφιλίωση υπολοίπων προστίμων. Τρέχει εκτός του νήματος του Tk."""
+        errors = []
+        success, msg = self.db.run_reservation_maintenance()
+        if not success:
+            errors.append(msg)
+
+        today = datetime.now().date()
+        if self.last_reconciliation != today:
+            success, msg = self.db.reconcile_fine_balances()
+            if success:
+                self.last_reconciliation = today
+            else:
+                errors.append(msg)
+        self.maintenance_errors = errors
+
+    def _check_maintenance(self):
+        """Στο νήμα του Tk: αναμονή για το τέλος της συντήρησης και εμφάνιση των αποτυχιών της"""
+        if self.maintenance_thread.is_alive():
+            self.root.after(self.MAINTENANCE_POLL_MS, self._check_maintenance)
+            return
+        if self.maintenance_errors:
+            self.view.show_message("Σφάλμα Συντήρησης", "\n".join(self.maintenance_errors), True)
+
     # ================= ΟΘΟΝΗ ΕΙΣΟΔΟΥ ================= #
 
     def show_login_screen(self):
@@ -28,6 +72,7 @@ class LibraryController:
         self.view.show_specific_login("Σύνδεση Μέλους", "ID Μέλους:", self.perform_member_login, self.show_login_screen)
 
     def logout(self):
+        self.db.end_member_session()
         self.current_user_id = None
         self.current_user_type = None
         self.current_user_data = None
@@ -42,6 +87,7 @@ class LibraryController:
             self.current_user_type = 'member'
             self.current_user_data = user_data
             self.db.calculate_overdue_fines()
+            self.db.start_member_session(member_id)
             return True, user_data
         return False, None
 
@@ -74,7 +120,13 @@ class LibraryController:
     def setup_member_dashboard(self):
         data = self.current_user_data
         full_name = f"{data['Όνομα']} {data['Επώνυμο']}"
-        info_text = f"Email: {data['Email']}\nΒιβλιοθήκη Εγγραφής: {data['Βιβλιοθήκη']}\n\nΕπιλέξτε μια ενέργεια από το μενού παραπάνω.\nΕπιλέξτε ¨Περιήγηση Τεκμηρίων¨ για να δείτε όλα τα διαθέσιμα βιβλία."
+        summary = self.db.get_member_summary(self.current_user_id)
+        info_text = (f"Email: {data['Email']}\nΒιβλιοθήκη Εγγραφής: {data['Βιβλιοθήκη']}\n\n"
+                     f"Ενεργοί δανεισμοί: {summary['Ενεργοί_Δανεισμοί']} (εκπρόθεσμοι: {summary['Εκπρόθεσμοι']})\n"
+                     f"Εκκρεμή πρόστιμα: {summary['Εκκρεμή_Πρόστιμα']} - οφειλή {summary['Οφειλή']:.2f}€\n"
+                     f"Ενεργές κρατήσεις: {summary['Ενεργές_Κρατήσεις']} (προς παραλαβή: {summary['Προς_Παραλαβή']})\n"
+                     f"Επερχόμενες κρατήσεις χώρων: {summary['Κρατήσεις_Χώρων']}\n\n"
+                     f"Επιλέξτε μια ενέργεια από το μενού παραπάνω.\nΕπιλέξτε ¨Περιήγηση Τεκμηρίων¨ για να δείτε όλα τα διαθέσιμα βιβλία.")
 
         buttons = [
             ("Περιήγηση Τεκμηρίων", self.show_browse_books),
@@ -122,26 +174,26 @@ class LibraryController:
         self.raw_lib = self.db.get_all_libraries()
         lib_names = [lib['Όνομα'] for lib in self.raw_lib]
 
-        self.view.build_filter_frame(content_frame, main_title, cat_names, languages, lib_names, self.handle_book_search)
+        self.view.build_filter_frame(content_frame, main_title, cat_names, languages, lib_names, self.handle_book_search, self.db.suggest_titles)
         
-        columns = ["ISBN", "Τίτλος", "Συγγραφέας", "Εκδότης", "Έτος", "Γλώσσα", "Κατηγορία"]
-        self.tree, _ = self.view.create_treeview(content_frame, columns, widths=[120, 250, 150, 120, 60, 80, 120])
+        columns = ["ISBN", "Τίτλος", "Συγγραφέας", "Εκδότης", "Έτος", "Γλώσσα", "Κατηγορία", "Διαθέσιμα"]
+        self.tree, _ = self.view.create_treeview(content_frame, columns, widths=[120, 250, 150, 120, 60, 80, 120, 80])
 
         self.view.build_details_button_frame(content_frame, self.current_user_type, self.show_book_details, self.show_add_book, self.show_document_management, self.show_update_book)        
 
         self.handle_book_search("Όλες", "Όλες", "Όλες", "")
 
-    def handle_book_search(self, category, language, libraries, search_term):
+    def handle_book_search(self, category, language, libraries, search_term, available_only=False, fuzzy=False):
         for item in self.tree.get_children():
             self.tree.delete(item)
             
-        books = self.db.browse_all_books(category, language, libraries, search_term)
+        books = self.db.browse_all_books(category, language, libraries, search_term, available_only, fuzzy)
         
         if not books:
             self.view.show_message("Προσοχή", "Δεν βρέθηκαν τεκμήρια με τα κριτήρια αναζήτησης.", False)
             
         for book in books:
-            self.tree.insert("", "end", values=(book['ISBN'], book['Τίτλος'], book['Συγγραφέας'], book['Εκδότης'], book['Χρονολογία'], book['Γλώσσα'], book['Κατηγορία']))
+            self.tree.insert("", "end", values=(book['ISBN'], book['Τίτλος'], book['Συγγραφέας'], book['Εκδότης'], book['Χρονολογία'], book['Γλώσσα'], book['Κατηγορία'], book['Διαθέσιμα']))
 
     def create_book_reservation(self, isbn):
         success, message = self.db.create_reservation(self.current_user_id, isbn)
@@ -159,22 +211,29 @@ class LibraryController:
         item = self.tree.item(selected[0])
         isbn = item['values'][0]
 
-        book_info = self.db.get_book_details(isbn)
+        details = self.db.get_book_bundle(isbn)
+        if not details:
+            self.view.show_message("Σφάλμα", "Το τεκμήριο δεν βρέθηκε", True)
+            return
 
-        copies = self.db.get_available_copies(isbn)
-        
         # Έλεγχος eBook
         ebook_callback = None
-        if self.current_user_type == "member":
-            ebook_id = self.db.check_ebook_availability(isbn)
-            if ebook_id:
-                ebook_callback = lambda: self.create_ebook_loan_action(ebook_id)
+        ebook_id = details['ID_EBook']
+        if self.current_user_type == "member" and ebook_id:
+            ebook_callback = lambda: self.create_ebook_loan_action(ebook_id)
 
-        self.view.build_books_info_window(self.root, book_info, copies, lambda: self.create_book_reservation(isbn), ebook_callback)
+        self.view.build_books_info_window(self.root, details, lambda: self.create_book_reservation(isbn), ebook_callback)
 
     def create_ebook_loan_action(self, ebook_id):
         """Δημιουργία δανεισμού eBook"""
         success, msg = self.db.create_ebook_loan(self.current_user_id, ebook_id)
+        if not success:
+            licence = self.db.get_ebook_licence(ebook_id)
+            if licence and licence['Ελεύθερες'] is not None and licence['Ελεύθερες'] <= 0 and not licence['Εξαντλημένη']:
+                if self.view.ask_confirmation("Λίστα Αναμονής", f"{msg}.\n\nΘέλετε να μπείτε στη λίστα αναμονής ({licence['Αναμονή']} σε αναμονή);"):
+                    success, msg = self.db.join_ebook_waitlist(self.current_user_id, ebook_id)
+                else:
+                    return
         self.view.show_message("Επιτυχία" if success else "Σφάλμα", msg, not success)
 
     def show_add_book(self):
@@ -186,7 +245,27 @@ class LibraryController:
 
         (self.add_entries, 
          self.add_cat_var, 
-         self.add_lang_var) = self.view.build_add_book_frame(content_frame, cat_names, self.show_browse_books, self.add_book)
+         self.add_lang_var) = self.view.build_add_book_frame(content_frame, cat_names, self.show_browse_books, self.add_book, self.import_catalog)
+
+    def import_catalog(self):
+        """Μαζική εισαγωγή τεκμηρίων/αντιτύπων από αρχείο"""
+        path = self.view.ask_import_file("Εισαγωγή Καταλόγου")
+        if not path:
+            return
+
+        rejects_path = path.rsplit('.', 1)[0] + '_απορρίψεις.csv'
+        success, report = self.db.import_catalog(path, rejects_path)
+
+        if not success:
+            self.view.show_message("Σφάλμα", report, True)
+            return
+
+        message = f"Τεκμήρια: {report['Τεκμήρια']}\nΑντίτυπα: {report['Αντίτυπα']}\nΑπορρίψεις: {len(report['Απορρίψεις'])}"
+        if report['Σφάλμα_Αναφοράς']:
+            message += f"\n\n{report['Σφάλμα_Αναφοράς']}"
+        elif report['Απορρίψεις']:
+            message += f"\n\nΗ αναφορά απορρίψεων αποθηκεύτηκε στο:\n{rejects_path}"
+        self.view.show_message("Ολοκλήρωση Εισαγωγής", message)
         
     def add_book(self):
         entries = self.add_entries
@@ -276,16 +355,20 @@ class LibraryController:
             self.view.show_message("Προσοχή", "Επιλέξτε ένα αντίτυπο")
             return
         
-        copy_id = self.copy_tree.item(selected[0])['values'][0]
+        copy_ids = [self.copy_tree.item(item)['values'][0] for item in selected]
         
-        confirm = self.view.ask_confirmation("Επιβεβαίωση", "Είστε σίγουροι ότι θέλετε να διαγράψετε αυτό το αντίτυπο;")
+        confirm = self.view.ask_confirmation("Επιβεβαίωση", f"Είστε σίγουροι ότι θέλετε να διαγράψετε {len(copy_ids)} αντίτυπα;")
         if confirm:
-            success, message = self.db.delete_copy(copy_id)
+            success, result = self.db.delete_copies(copy_ids)
             if success:
+                deleted, skipped = result
+                message = f"Διαγράφηκαν {deleted} αντίτυπα"
+                if skipped:
+                    message += f"\n{skipped} παραλείφθηκαν (έχουν δανεισμούς)"
                 self.view.show_message("Επιτυχία", message)
                 self.load_copies(isbn)
             else:
-                self.view.show_message("Σφάλμα", message, True)
+                self.view.show_message("Σφάλμα", result, True)
 
     def show_update_book(self):
         pass
@@ -314,7 +397,8 @@ class LibraryController:
             content_frame,
             on_search=self.handle_loan_search,
             on_new_loan=self.show_new_loan_form,
-            on_return_book=self.handle_book_return
+            on_return_book=self.handle_book_return,
+            on_desk_mode=self.show_desk_mode
         )
         
         # Treeview για δανεισμούς
@@ -377,7 +461,9 @@ class LibraryController:
             on_search_member=self.search_member_for_loan,
             on_search_copy=self.search_copies_for_loan,
             on_create_loan=self.create_new_loan,
-            on_cancel=None
+            on_cancel=None,
+            on_suggest_member=self.db.suggest_members,
+            on_suggest_title=self.db.suggest_titles
         )
         
         self.loan_popup = popup_data[0]
@@ -385,6 +471,7 @@ class LibraryController:
         self.copy_tree = popup_data[2]
         self.warning_label = popup_data[3]  # ΝΕΟ!
         self.selected_member = None
+        self.loan_queue_heads, self.loan_copy_holds = {}, {}
         
         # Bind event για επιλογή αντιτύπου
         self.copy_tree.bind('<<TreeviewSelect>>', self.on_copy_selected)
@@ -402,25 +489,24 @@ class LibraryController:
         
         warnings = []
         
-        # 1. Έλεγχος κρατήσεων
-        reservations = self.db.fetch_all_dict(
-            """SELECT κ.ID_Μέλους, κ.Προτεραιότητα, μ.Όνομα || ' ' || μ.Επώνυμο as Μέλος
-               FROM Κράτηση κ
-               JOIN Μέλος μ ON κ.ID_Μέλους = μ.ID_Μέλους
-               WHERE κ.ISBN = ? AND κ.Κατάσταση = 'Ενεργή'
-               ORDER BY κ.Προτεραιότητα""",
-            (isbn,)
-        )
-        
-        if reservations:
-            first_reservation = reservations[0]
+        # 1. Έλεγχος κρατήσεων (από την cache της αναζήτησης, χωρίς ερώτημα)
+        first_reservation = self.loan_queue_heads.get(str(isbn))
+        hold = self.loan_copy_holds.get(copy_id)
+
+        if hold:
+            if hold['ID_Μέλους'] == self.selected_member['ID_Μέλους']:
+                warnings.append(f"Το αντίτυπο είναι δεσμευμένο για το μέλος (παραλαβή έως {hold['Λήξη_Παραλαβής']})")
+            else:
+                warnings.append(f"ΠΡΟΣΟΧΗ: Το αντίτυπο είναι δεσμευμένο για το μέλος με ID {hold['ID_Μέλους']}")
+        elif first_reservation:
+            queue_size = first_reservation['Μέγεθος_Ουράς']
             if first_reservation['ID_Μέλους'] == self.selected_member['ID_Μέλους']:
-                warnings.append(f"Το μέλος έχει κράτηση με προτεραιότητα {first_reservation['Προτεραιότητα']}")
+                warnings.append("Το μέλος έχει κράτηση με προτεραιότητα 1")
             else:
-                warnings.append(f"ΠΡΟΣΟΧΗ: Υπάρχουν {len(reservations)} ενεργές κρατήσεις!")
+                warnings.append(f"ΠΡΟΣΟΧΗ: Υπάρχουν {queue_size} ενεργές κρατήσεις!")
                 warnings.append(f"   Προτεραιότητα 1: {first_reservation['Μέλος']} (ID: {first_reservation['ID_Μέλους']})")
-                if len(reservations) > 1:
-                    warnings.append(f"   Συνολικές κρατήσεις: {len(reservations)}")
+                if queue_size > 1:
+                    warnings.append(f"   Συνολικές κρατήσεις: {queue_size}")
         
         # 2. Έλεγχος διαδανεισμού
         member_library = self.selected_member['Βιβλιοθήκη']
@@ -439,22 +525,73 @@ class LibraryController:
             self.warning_label.config(text="Καμία ειδοποίηση - Ο δανεισμός μπορεί να προχωρήσει κανονικά", 
                                      foreground="green")
 
+    # ================= ΓΚΙΣΕ BARCODE ================= #
+
+    def show_desk_mode(self):
+        """Γκισέ εξυπηρέτησης: κάθε σάρωση αντιτύπου είναι ένα transaction στο μοντέλο"""
+        (self.desk_popup, self.desk_member_label,
+         self.desk_copy_entry, self.desk_session_tree) = self.view.build_desk_mode_window(
+            self.root, self.desk_scan_member, self.desk_scan_copy, self.desk_clear_member)
+        self.desk_member = None
+
+    def desk_scan_member(self, member_entry):
+        member = self.db.find_member(member_entry.get())
+        member_entry.delete(0, tk.END)
+
+        if not member:
+            self.desk_member = None
+            self.desk_member_label.config(text="✗ Το μέλος δεν βρέθηκε", foreground="red")
+            return
+
+        self.desk_member = member
+        self.desk_member_label.config(
+            text=f"✓ {member['Όνομα']} {member['Επώνυμο']} (ID: {member['ID_Μέλους']}) - {member['Βιβλιοθήκη']}",
+            foreground="green")
+        self.desk_copy_entry.focus_set()
+
+    def desk_clear_member(self, member_entry):
+        self.desk_member = None
+        self.desk_member_label.config(text="Χωρίς μέλος: οι σαρώσεις κάνουν μόνο επιστροφές", foreground="gray")
+        member_entry.focus_set()
+
+    def desk_scan_copy(self, copy_entry):
+        code = copy_entry.get().strip()
+        copy_entry.delete(0, tk.END)
+        if not code:
+            return
+
+        if not code.isdigit():
+            success, action, title, message = False, None, None, "Μη έγκυρος κωδικός αντιτύπου"
+        else:
+            member_id = self.desk_member['ID_Μέλους'] if self.desk_member else None
+            success, action, title, message = self.db.scan_copy(int(code), member_id)
+
+        # Οι πιο πρόσφατες σαρώσεις εμφανίζονται πρώτες
+        self.desk_session_tree.insert("", 0, values=(
+            datetime.now().strftime('%H:%M:%S'), code, title or "-", action or "-", message
+        ), tags=() if success else ("error",))
+
     def search_member_for_loan(self, member_id_entry):
-        """Αναζήτηση μέλους για δανεισμό"""
-        try:
-            member_id = int(member_id_entry.get().strip())
-            member_data = self.db.get_member_by_id(member_id)
-            
-            if member_data:
-                self.selected_member = member_data
-                info_text = f"✓ {member_data['Όνομα']} {member_data['Επώνυμο']} - {member_data['Βιβλιοθήκη']}"
-                self.member_info_label.config(text=info_text, foreground="green")
-            else:
-                self.member_info_label.config(text="✗ Το μέλος δεν βρέθηκε", foreground="red")
-                self.selected_member = None
-                
-        except ValueError:
-            self.view.show_message("Σφάλμα", "Εισάγετε έγκυρο ID μέλους", True)
+        """Αναζήτηση μέλους για δανεισμό (ID, τηλέφωνο, email ή όνομα)"""
+        search_term = member_id_entry.get().strip()
+        if not search_term:
+            self.view.show_message("Σφάλμα", "Εισάγετε ID, τηλέφωνο, email ή όνομα μέλους", True)
+            return
+
+        members = self.db.browse_members(search_term, limit=20)
+
+        if len(members) == 1:
+            self.select_member_for_loan(members[0])
+        elif members:
+            self.view.build_member_choice_window(self.loan_popup, members, self.select_member_for_loan)
+        else:
+            self.member_info_label.config(text="✗ Το μέλος δεν βρέθηκε", foreground="red")
+            self.selected_member = None
+
+    def select_member_for_loan(self, member_data):
+        self.selected_member = member_data
+        info_text = f"✓ {member_data['Όνομα']} {member_data['Επώνυμο']} (ID: {member_data['ID_Μέλους']}) - {member_data['Βιβλιοθήκη']}"
+        self.member_info_label.config(text=info_text, foreground="green")
 
     def search_copies_for_loan(self, search_term):
         """Αναζήτηση διαθέσιμων αντιτύπων"""
@@ -466,17 +603,22 @@ class LibraryController:
             self.view.show_message("Προσοχή", "Εισάγετε ISBN ή Τίτλο για αναζήτηση")
             return
         
-        # Αναζήτηση βιβλίων
-        books = self.db.search_books(search_term)
+        # Αναζήτηση βιβλίων (χωρίς ακριβές αποτέλεσμα, δοκιμή με ανοχή σε λάθη)
+        books = self.db.search_books(search_term) or self.db.search_books(search_term, fuzzy=True)
         
         if not books:
             self.view.show_message("Πληροφορία", "Δεν βρέθηκαν βιβλία")
             return
         
+        # Κρατήσεις όλων των ISBN της αναζήτησης μία φορά για όσο είναι ανοιχτή η φόρμα
+        self.loan_queue_heads, self.loan_copy_holds = self.db.get_reservation_context(
+            [book['ISBN'] for book in books])
+
         # Για κάθε βιβλίο, βρες διαθέσιμα αντίτυπα
         found_copies = False
+        member_id = self.selected_member['ID_Μέλους'] if self.selected_member else None
         for book in books:
-            copies = self.db.get_available_copies(book['ISBN'])
+            copies = self.db.get_available_copies(book['ISBN'], held_for=member_id)
             
             for copy in copies:
                 found_copies = True
@@ -508,14 +650,12 @@ class LibraryController:
         isbn = copy_tree.item(selected[0])['values'][1]
         member_id = self.selected_member['ID_Μέλους']
         
-        # Έλεγχος κρατήσεων
-        reservations = self.db.fetch_all_dict(
-            "SELECT ID_Μέλους, Προτεραιότητα FROM Κράτηση WHERE ISBN = ? AND Κατάσταση = 'Ενεργή' ORDER BY Προτεραιότητα",
-            (isbn,)
-        )
+        # Έλεγχος κρατήσεων από την cache (τα δεσμευμένα αντίτυπα τα ελέγχει το create_loan,
+        # που επαναλαμβάνει ατομικά όλους τους ελέγχους)
+        first_reservation = None if copy_id in self.loan_copy_holds else self.loan_queue_heads.get(str(isbn))
         
-        if reservations:
-            first_member = reservations[0]['ID_Μέλους']
+        if first_reservation:
+            first_member = first_reservation['ID_Μέλους']
             if first_member != member_id:
                 warning = f"⚠️ ΠΡΟΣΟΧΗ: Υπάρχει κράτηση με προτεραιότητα 1 από το μέλος {first_member}.\n\nΕίστε σίγουροι ότι θέλετε να δανείσετε σε άλλο μέλος;"
                 if not self.view.ask_confirmation("Προειδοποίηση Κράτησης", warning):
@@ -539,24 +679,36 @@ class LibraryController:
             self.view.show_message("Προσοχή", "Παρακαλώ επιλέξτε δανεισμό")
             return
         
-        loan_id = self.loan_tree.item(selected[0])['values'][0]
-        status = self.loan_tree.item(selected[0])['values'][6]
+        loan_ids = [self.loan_tree.item(item)['values'][0] for item in selected
+                    if self.loan_tree.item(item)['values'][6] != 'Ολοκληρωμένος']
         
-        if status == 'Ολοκληρωμένος':
+        if not loan_ids:
             self.view.show_message("Προσοχή", "Ο δανεισμός είναι ήδη ολοκληρωμένος")
             return
         
-        confirm = self.view.ask_confirmation("Επιβεβαίωση", "Επιστροφή δανεισμού;")
-        if confirm:
-            success, message = self.db.return_loan(loan_id)
-            
+        # Ένας δανεισμός: ίδια ροή με πριν, με το αναλυτικό μήνυμα του μοντέλου
+        if len(loan_ids) == 1:
+            if not self.view.ask_confirmation("Επιβεβαίωση", "Επιστροφή δανεισμού;"):
+                return
+            success, message = self.db.return_loan(loan_ids[0])
+        else:
+            if not self.view.ask_confirmation("Επιβεβαίωση", f"Επιστροφή {len(loan_ids)} δανεισμών;"):
+                return
+            success, result = self.db.return_loans(loan_ids)
+            message = result
             if success:
-                self.view.show_message("Επιτυχία", message)
-                # Πρόσθεσε μικρή καθυστέρηση πριν το refresh!
-                self.root.after(100, lambda: self.handle_loan_search(
-                    self.search_entry.get(), self.status_var.get()))
-            else:
-                self.view.show_message("Σφάλμα", message, True)
+                returned, failed = result
+                message = f"Καταχωρήθηκαν {returned} επιστροφές"
+                if failed:
+                    message += "\n\nΑπέτυχαν:\n" + "\n".join(f"{loan_id}: {reason}" for loan_id, reason in failed)
+            
+        if success:
+            self.view.show_message("Επιτυχία", message)
+            # Πρόσθεσε μικρή καθυστέρηση πριν το refresh!
+            self.root.after(100, lambda: self.handle_loan_search(
+                self.search_entry.get(), self.status_var.get()))
+        else:
+            self.view.show_message("Σφάλμα", message, True)
 
     # ================= ΚΡΑΤΗΣΕΙΣ ================= #
 
@@ -568,11 +720,12 @@ class LibraryController:
         
         self.view.build_reservations_frame(content_frame, reservations, self.cancel_reservation)
 
-        columns = ["ID", "Τίτλος", "Συγγραφέας", "Προτεραιότητα", "Ημερομηνία"]
+        columns = ["ID", "Τίτλος", "Συγγραφέας", "Θέση στην Ουρά", "Ημερομηνία"]
         self.tree, _ = self.view.create_treeview(content_frame, columns)
         
         for res in reservations:
-            self.tree.insert("", "end", values=(res['ID_Κράτησης'], res['Τίτλος'], res['Συγγραφέας'] or "-", res['Προτεραιότητα'], res['Ημερομηνία_Κράτησης']))
+            position = f"Προς παραλαβή έως {res['Λήξη_Παραλαβής']}" if res['ID_Αντιτύπου'] else res['Θέση']
+            self.tree.insert("", "end", values=(res['ID_Κράτησης'], res['Τίτλος'], res['Συγγραφέας'] or "-", position, res['Ημερομηνία_Κράτησης']))
         
     def cancel_reservation(self):
         selected = self.tree.selection()
@@ -613,7 +766,8 @@ class LibraryController:
             content_frame,
             on_search=self.handle_fine_search,
             on_impose=self.show_impose_fine_form,
-            on_update_status=self.update_fine_status
+            on_pay=lambda: self.update_fine_status("Πληρωμένο"),
+            on_cancel=lambda: self.update_fine_status("Ακυρωμένο")
         )
         
         columns = ["ID Προστίμου", "Μέλος", "ID Μέλους", "Τίτλος", "Ποσό (€)", "Ημ. Επιβολής", "Κατάσταση"]
@@ -693,28 +847,35 @@ class LibraryController:
         ttk.Button(button_frame, text="Επιβολή", command=impose).pack(side="left", padx=10)
         ttk.Button(button_frame, text="Ακύρωση", command=popup.destroy).pack(side="left", padx=10)
 
-    def update_fine_status(self):
+    def update_fine_status(self, new_status):
+        """Εξόφληση ή ακύρωση των επιλεγμένων προστίμων - αλλάζουν μόνο όσα είναι εκκρεμή"""
         selected = self.fine_tree.selection()
         if not selected:
             self.view.show_message("Προσοχή", "Παρακαλώ επιλέξτε πρόστιμο")
             return
         
-        fine_id = self.fine_tree.item(selected[0])['values'][0]
-        current_status = self.fine_tree.item(selected[0])['values'][6]
-        
-        # Αλλαγή κατάστασης
-        new_status = "Πληρωμένο" if current_status == "Εκκρεμής" else "Εκκρεμής"
+        rows = [self.fine_tree.item(item)['values'] for item in selected]
+        fine_ids = [values[0] for values in rows if values[6] == "Εκκρεμής"]
+        if not fine_ids:
+            self.view.show_message("Προσοχή", "Κανένα από τα επιλεγμένα πρόστιμα δεν είναι εκκρεμές")
+            return
         
-        confirm = self.view.ask_confirmation("Επιβεβαίωση", 
-            f"Αλλαγή κατάστασης σε '{new_status}';")
+        action = "Εξόφληση" if new_status == "Πληρωμένο" else "Ακύρωση"
+        question = f"{action} {len(fine_ids)} εκκρεμών προστίμων;"
+        if len(fine_ids) < len(rows):
+            question += f"\n({len(rows) - len(fine_ids)} μη εκκρεμή πρόστιμα παραλείπονται)"
         
-        if confirm:
-            success, msg = self.db.update_fine_status(fine_id, new_status)
+        if self.view.ask_confirmation("Επιβεβαίωση", question):
+            success, result = self.db.update_fines_status(fine_ids, new_status)
             if success:
+                updated, skipped = result
+                msg = f"Ενημερώθηκαν {updated} πρόστιμα σε '{new_status}'"
+                if skipped:
+                    msg += f" - {skipped} δεν ήταν πλέον εκκρεμή"
                 self.view.show_message("Επιτυχία", msg)
                 self.handle_fine_search(self.search_entry.get(), self.fine_status_var.get())
             else:
-                self.view.show_message("Σφάλμα", msg, True)
+                self.view.show_message("Σφάλμα", result, True)
 
     # ================= ΑΞΙΟΛΟΓΗΣΕΙΣ ================= #
 
@@ -792,7 +953,8 @@ class LibraryController:
     
         (self.my_reservations_tab,
          self.has_computers_var, self.has_projector_var, self.has_board_var, self.has_ac_var, self.has_printer_var, self.has_sockets_var,
-         self.date_entry, self.time_entry) = self.view.build_space_reservation_frame(content_frame, self.search_spaces, self.make_reservation, self.cancel_selected_reservation)
+         self.date_entry, self.time_entry, self.capacity_entry, self.occupancy_frame) = self.view.build_space_reservation_frame(
+            content_frame, self.search_spaces, self.make_reservation, self.cancel_selected_reservation, self.show_space_occupancy)
         
         columns=["ID", "Χώρος", "Χωρητικότητα", "Χαρακτηριστικά", "Βιβλιοθήκη"]
         self.tree, _ = self.view.create_treeview(content_frame, columns, widths=[50, 200, 100, 200, 150])
@@ -805,22 +967,28 @@ class LibraryController:
         # Αρχική φόρτωση
         self.search_spaces()
 
+    def space_filters(self):
+        """Τα επιλεγμένα χαρακτηριστικά χώρου ως ορίσματα του μοντέλου"""
+        return {
+            'has_computers': self.has_computers_var.get() or None,
+            'has_projector': self.has_projector_var.get() or None,
+            'has_board': self.has_board_var.get() or None,
+            'has_ac': self.has_ac_var.get() or None,
+            'has_printer': self.has_printer_var.get() or None,
+            'has_sockets': self.has_sockets_var.get() or None,
+            'min_capacity': int(self.capacity_entry.get().strip() or 0) or None,
+        }
+
     def search_spaces(self):
-        has_computers = self.has_computers_var.get()
-        has_projector = self.has_projector_var.get()
-        has_board = self.has_board_var.get()
-        has_ac = self.has_ac_var.get()
-        has_printer = self.has_printer_var.get()
-        has_sockets = self.has_sockets_var.get()
-
-        spaces = self.db.get_available_spaces(
-            has_computers=has_computers if has_computers else None,
-            has_projector=has_projector if has_projector else None,
-            has_board=has_board if has_board else None,
-            has_ac=has_ac if has_ac else None,
-            has_printer=has_printer if has_printer else None,
-            has_sockets=has_sockets if has_sockets else None,
-        )
+        try:
+            spaces = self.db.get_available_spaces(
+                **self.space_filters(),
+                date=self.date_entry.get().strip() or None,
+                start_time=self.time_entry.get().strip() or None,
+            )
+        except ValueError:
+            self.view.show_message("Σφάλμα", "Λάθος μορφή ώρας (HH:MM) ή χωρητικότητας", True)
+            return
         
         # Καθαρισμός treeview
         for item in self.tree.get_children():
@@ -863,6 +1031,32 @@ class LibraryController:
         else:
             self.view.show_message("Σφάλμα", message, True)
         
+    def show_space_occupancy(self, days=1):
+        """Πίνακας πληρότητας χώρων για την ημερομηνία της φόρμας και τις επόμενες ημέρες"""
+        date_from = self.date_entry.get().strip()
+        try:
+            date_to = (datetime.strptime(date_from, '%Y-%m-%d') + timedelta(days=days - 1)).strftime('%Y-%m-%d')
+            spaces, slots, grid = self.db.get_space_occupancy(date_from, date_to, member_id=self.current_user_id, **self.space_filters())
+        except ValueError:
+            self.view.show_message("Σφάλμα", "Λάθος μορφή ημερομηνίας (YYYY-MM-DD) ή χωρητικότητας", True)
+            return
+
+        self.view.build_space_occupancy_grid(self.occupancy_frame, spaces, slots, grid, self.reserve_from_grid)
+        self.occupancy_days = days
+
+    def reserve_from_grid(self, space_id, date, start_time):
+        if not self.view.ask_confirmation("Επιβεβαίωση Κράτησης", f"Κράτηση του χώρου {space_id} στις {date} {start_time};"):
+            return
+
+        success, message = self.db.create_space_reservation(self.current_user_id, space_id, date, start_time)
+
+        if success:
+            self.view.show_message("Επιτυχία", message)
+            self.load_my_reservations()
+            self.show_space_occupancy(self.occupancy_days)
+        else:
+            self.view.show_message("Σφάλμα", message, True)
+
     def load_my_reservations(self):
         for item in self.my_res_tree.get_children():
             self.my_res_tree.delete(item)
@@ -870,7 +1064,7 @@ class LibraryController:
         reservations = self.db.get_member_space_reservations(self.current_user_id)
 
         if not reservations:
-            self.view.show_message("Πληροφορία", "Δεν έχετε καμία κράτηση χώρου")
+            self.view.show_message("Πληροφορία", "Δεν έχετε καμία επερχόμενη κράτηση χώρου")
             return
 
         for res in reservations:
@@ -886,9 +1080,9 @@ class LibraryController:
                 res['Όνομα_Χώρου'],
                 res['Βιβλιοθήκη'],
                 res['Ημερομηνία_Κράτησης'],
-                res['Ώρα_Κράτησης'],
+                f"{res['Ώρα_Κράτησης']}-{res['Ώρα_Λήξης']}",
                 ", ".join(features) if features else "-"
-            ))
+            ), tags=(str(res['ID_Κράτησης_Χώρου']),))
         
     def cancel_selected_reservation(self):
         selected = self.my_res_tree.selection()
@@ -898,6 +1092,7 @@ class LibraryController:
        
         item = self.my_res_tree.item(selected[0])
         values = item['values']
+        booking_id = int(item['tags'][0])
         
         space_name = values[0]
         library_name = str(values[1])
@@ -907,7 +1102,7 @@ class LibraryController:
         confirm = self.view.ask_confirmation("Επιβεβαίωση Ακύρωσης", f"Ακύρωση κράτησης για:\n{space_name} ({library_name})\nστις {res_date} {res_time};")
         
         if confirm:
-            success, message = self.db.cancel_space_reservation(self.current_user_id, space_name, library_name, res_date, res_time)
+            success, message = self.db.cancel_space_reservation(self.current_user_id, booking_id)
 
             if success:
                 self.view.show_message("Επιτυχία", message)
@@ -944,11 +1139,13 @@ class LibraryController:
         for idx, book in enumerate(top_rated, 1):
             tree2.insert("", "end", values=(idx, book['Τίτλος'], book['Συγγραφέας'] or "-", f"{book['ΜέσηΑξιολόγηση']:.2f}/5.0", book['ΑριθμόςΑξιολογήσεων']))
             
-        columns = ["Κατηγορία", "Τεκμήρια", "Αντίτυπα"]
-        tree3, _ = self.view.create_treeview(category_tab, columns, widths=[300, 150, 150])
+        columns = ["Κατηγορία", "Τεκμήρια", "Αντίτυπα", "Διαθέσιμα"]
+        tree3, _ = self.view.create_treeview(category_tab, columns, widths=[300, 150, 150, 150])
 
         for cat in categories:
-            tree3.insert("", "end", values=(cat['Κατηγορία'], cat['ΑριθμόςΤεκμηρίων'], cat['ΣύνολοΑντιτύπων']))
+            # Εσοχή ανά επίπεδο: οι γονικές κατηγορίες περιλαμβάνουν τις υποκατηγορίες τους
+            name = "    " * cat['Επίπεδο'] + cat['Κατηγορία']
+            tree3.insert("", "end", values=(name, cat['ΑριθμόςΤεκμηρίων'], cat['ΣύνολοΑντιτύπων'], cat['ΔιαθέσιμαΑντίτυπα']))
 
     # ================= ΔΙΑΧΕΙΡΙΣΗ ΒΙΒΛΙΟΘΗΚΩΝ ================= #
 
@@ -1034,18 +1231,51 @@ class LibraryController:
 
     def show_browse_members(self):
         content_frame = self.view.update_content_area()
-        self.view.build_generic_filter_frame(content_frame, "Διαχείριση Μελών", self.handle_member_search, self.add_member, self.update_member, self.delete_member)
+        self.view.build_generic_filter_frame(content_frame, "Διαχείριση Μελών", self.handle_member_search, self.add_member, self.update_member, self.delete_member, self.page_member_search, self.show_member_import)
         
         cols = ["ID", "Όνομα", "Επώνυμο", "Email", "Βιβλιοθήκη"]
         self.tree, _ = self.view.create_treeview(content_frame, cols, widths=[50, 150, 150, 200, 150])
         self.handle_member_search("")
 
-    def handle_member_search(self, term):
-        members = self.db.browse_members(term)
+    def page_member_search(self, term, step):
+        self.handle_member_search(term, max(0, self.people_offset + step * self.PEOPLE_PAGE_SIZE))
+
+    def handle_member_search(self, term, offset=0):
+        members = self.db.browse_members(term, self.PEOPLE_PAGE_SIZE, offset)
+        if offset and not members: return
+        self.people_offset = offset
         for i in self.tree.get_children(): self.tree.delete(i)
         for m in members:
             self.tree.insert("", "end", values=(m['ID_Μέλους'], m['Όνομα'], m['Επώνυμο'], m['Email'], m['Βιβλιοθήκη']))
 
+    def show_member_import(self):
+        self.view.build_member_import_window(self.root, self.import_members)
+
+    def import_members(self, policy):
+        """Μαζική εισαγωγή μελών με την επιλεγμένη πολιτική συγκρούσεων"""
+        path = self.view.ask_import_file("Εισαγωγή Μελών")
+        if not path:
+            return
+
+        rejects_path = path.rsplit('.', 1)[0] + '_απορρίψεις.csv'
+        success, report = self.db.import_members(path, policy, rejects_path)
+
+        if not success:
+            self.view.show_message("Σφάλμα", report, True)
+            return
+
+        counts = {}
+        for _, outcome, _, _ in report['Αποτελέσματα']:
+            counts[outcome] = counts.get(outcome, 0) + 1
+
+        message = "\n".join(f"{outcome}: {count}" for outcome, count in counts.items()) or "Το αρχείο δεν είχε γραμμές"
+        if report['Σφάλμα_Αναφοράς']:
+            message += f"\n\n{report['Σφάλμα_Αναφοράς']}"
+        elif report['Απορρίψεις']:
+            message += f"\n\nΗ αναφορά απορρίψεων αποθηκεύτηκε στο:\n{rejects_path}"
+        self.view.show_message("Ολοκλήρωση Εισαγωγής", message)
+        self.handle_member_search("")
+
     def add_member(self):
         libs = self.db.get_all_libraries()
         self.view.build_member_form(self.root, None, libs, self.save_member)
@@ -1109,23 +1339,32 @@ class LibraryController:
     def delete_member(self):
         sel = self.tree.selection()
         if not sel: return
-        m_id = self.tree.item(sel[0])['values'][0]
-        if self.view.ask_confirmation("Διαγραφή", "Προσοχή! Η διαγραφή μέλους μπορεί να επηρεάσει ιστορικό."):
-            self.db.delete_member(m_id)
+        m_ids = [self.tree.item(item)['values'][0] for item in sel]
+        if self.view.ask_confirmation("Διαγραφή", f"Προσοχή! Η διαγραφή {len(m_ids)} μελών μπορεί να επηρεάσει ιστορικό."):
+            success, result = self.db.delete_members(m_ids)
+            if success and result[1]:
+                self.view.show_message("Πληροφορία", f"{result[1]} μέλη με δανεισμούς δεν διαγράφηκαν")
+            elif not success:
+                self.view.show_message("Σφάλμα", result, True)
             self.handle_member_search("")
 
     # ================= ΔΙΑΧΕΙΡΙΣΗ ΠΡΟΣΩΠΙΚΟΥ ================= #
 
     def show_browse_staff(self):
         content_frame = self.view.update_content_area()
-        self.view.build_generic_filter_frame(content_frame, "Διαχείριση Προσωπικού", self.handle_staff_search, self.add_staff, self.update_staff, self.delete_staff)
+        self.view.build_generic_filter_frame(content_frame, "Διαχείριση Προσωπικού", self.handle_staff_search, self.add_staff, self.update_staff, self.delete_staff, self.page_staff_search)
         
         cols = ["ID", "Όνομα", "Επώνυμο", "Θέση", "Βιβλιοθήκη", "Κατάσταση"]
         self.tree, _ = self.view.create_treeview(content_frame, cols)
         self.handle_staff_search("")
 
-    def handle_staff_search(self, term):
-        staff = self.db.browse_staff(term)
+    def page_staff_search(self, term, step):
+        self.handle_staff_search(term, max(0, self.people_offset + step * self.PEOPLE_PAGE_SIZE))
+
+    def handle_staff_search(self, term, offset=0):
+        staff = self.db.browse_staff(term, self.PEOPLE_PAGE_SIZE, offset)
+        if offset and not staff: return
+        self.people_offset = offset
         for i in self.tree.get_children(): self.tree.delete(i)
         for s in staff:
             self.tree.insert("", "end", values=(s['ID_Προσωπικού'], s['Όνομα'], s['Επώνυμο'], s['Θέση'], s['Βιβλιοθήκη'], s['Κατάσταση']))
@@ -1195,9 +1434,9 @@ class LibraryController:
     def delete_staff(self):
         sel = self.tree.selection()
         if not sel: return
-        s_id = self.tree.item(sel[0])['values'][0]
-        if self.view.ask_confirmation("Διαγραφή", "Είστε σίγουροι;"):
-            self.db.delete_staff(s_id)
+        s_ids = [self.tree.item(item)['values'][0] for item in sel]
+        if self.view.ask_confirmation("Διαγραφή", f"Διαγραφή {len(s_ids)} εγγραφών προσωπικού. Είστε σίγουροι;"):
+            self.db.delete_staff_members(s_ids)
             self.handle_staff_search("")
 
 if __name__ == "__main__":
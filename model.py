@@ -3,25 +3,1120 @@ Database Module για το Library Management System
 Περιέχει όλες τις μεθόδους για αλληλεπίδραση με τη βάση δεδομένων
 """
 
+import csv
+import json
+import os
+import re
 import sqlite3
+import sys
+import threading
+import time
+import unicodedata
+from array import array
+from bisect import bisect_left, bisect_right
+from collections import Counter, OrderedDict
 from datetime import datetime, timedelta
+from operator import itemgetter
+
+# ==================== ΚΑΝΟΝΙΚΟΠΟΙΗΣΗ ΚΕΙΜΕΝΟΥ ==================== #
+
+# Ο tokenizer unicode61 δεν αφαιρεί τους ελληνικούς τόνους, οπότε τα
+# ευρετήρια αναζήτησης αποθηκεύουν κείμενο χωρίς τόνους και τελικό ς
+_GREEK_FOLD = (
+    ('ά', 'α'), ('έ', 'ε'), ('ή', 'η'), ('ί', 'ι'), ('ό', 'ο'), ('ύ', 'υ'), ('ώ', 'ω'),
+    ('ϊ', 'ι'), ('ϋ', 'υ'), ('ΐ', 'ι'), ('ΰ', 'υ'), ('ς', 'σ'),
+    ('Ά', 'Α'), ('Έ', 'Ε'), ('Ή', 'Η'), ('Ί', 'Ι'), ('Ό', 'Ο'), ('Ύ', 'Υ'), ('Ώ', 'Ω'),
+    ('Ϊ', 'Ι'), ('Ϋ', 'Υ'),
+)
+
+# Διακριτικά σημεία (τόνοι, διαλυτικά κ.λπ.) μετά από ανάλυση NFD
+_COMBINING_MARKS = re.compile('[\u0300-\u036f\u1ab0-\u1aff\u1dc0-\u1dff\u20d0-\u20ff\ufe20-\ufe2f]')
+
+def fold_text(text) -> str:
+    """Πεζά χωρίς τόνους/διαλυτικά, όπως αποθηκεύονται στα ευρετήρια αναζήτησης"""
+    text = str(text or '')
+    if text.isascii():
+        return text.lower()
+    text = _COMBINING_MARKS.sub('', unicodedata.normalize('NFD', text))
+    return text.lower().replace('ς', 'σ')
+
+def sql_fold(expr: str) -> str:
+    """Αφαίρεση τόνων ως έκφραση SQL (για triggers, χωρίς custom functions)"""
+    for accented, plain in _GREEK_FOLD:
+        expr = f"replace({expr}, '{accented}', '{plain}')"
+    return expr
+
+def fts_prefix_query(term: str) -> str:
+    """Μετατροπή όρου αναζήτησης σε ερώτημα FTS5 προθεμάτων ("λέξη"* ...)"""
+    return " ".join(f'"{token}"*' for token in re.findall(r'\w+', fold_text(term)))
+
+def word_trigrams(text) -> set:
+    """Τριγράμματα λέξεων (με κενά στα άκρα, όπως το pg_trgm) για τη βαθμολόγηση ομοιότητας"""
+    grams = set()
+    for word in re.findall(r'\w+', fold_text(text)):
+        padded = f"  {word} "
+        grams.update(padded[i:i + 3] for i in range(len(padded) - 2))
+    return grams
+
+def term_trigrams(term: str) -> set:
+    """Τα τριγράμματα μέσα στις λέξεις του όρου, όπως τα αποθηκεύει ο tokenizer trigram του FTS5"""
+    return {word[i:i + 3] for word in re.findall(r'\w+', fold_text(term)) for i in range(len(word) - 2)}
+
+# ==================== ΑΡΧΕΙΑ ΕΙΣΑΓΩΓΗΣ ==================== #
+
+# Κωδικοποιήσεις που δοκιμάζονται με τη σειρά (τα CSV του ελληνικού Excel είναι συνήθως cp1253)
+IMPORT_ENCODINGS = ('utf-8-sig', 'cp1253')
+
+def detect_import_encoding(path: str, encodings=IMPORT_ENCODINGS):
+    """
+    Η πρώτη κωδικοποίηση που διαβάζει όλο το αρχείο. Διαβάζει σε τμήματα, ώστε ένα
+    λάθος να φανεί πριν γραφτεί οτιδήποτε στη βάση. UnicodeError αν καμία δεν ταιριάζει.
+    """
+    for encoding in encodings:
+        try:
+            with open(path, encoding=encoding) as f:
+                while f.read(1 << 20):
+                    pass
+            return encoding
+        except UnicodeError:
+            continue
+    raise UnicodeError(f"Άγνωστη κωδικοποίηση αρχείου (δοκιμάστηκαν: {', '.join(encodings)}) - αποθηκεύστε το ως CSV UTF-8")
+
+def read_import_rows(path: str, encoding: str = None):
+    """
+    Ροή γραμμών από CSV ή JSON lines (.jsonl/.ndjson) χωρίς φόρτωση όλου του αρχείου,
+    ή από πίνακα αντικειμένων JSON (.json), που φορτώνεται ολόκληρος.
+    Παράγει (αριθμός γραμμής/στοιχείου, dict) - όσα δεν διαβάζονται δίνουν dict None.
+    Χωρίς encoding η κωδικοποίηση εντοπίζεται με το detect_import_encoding.
+    """
+    encoding = encoding or detect_import_encoding(path)
+    with open(path, encoding=encoding, newline='') as f:
+        if path.lower().endswith('.json'):
+            items = json.load(f)
+            if not isinstance(items, list):
+                raise ValueError("Το αρχείο JSON πρέπει να περιέχει πίνακα αντικειμένων")
+            for item_no, item in enumerate(items, start=1):
+                yield item_no, item if isinstance(item, dict) else None
+        elif path.lower().endswith(('.jsonl', '.ndjson')):
+            for line_no, line in enumerate(f, start=1):
+                if not line.strip():
+                    continue
+                try:
+                    row = json.loads(line)
+                except ValueError:
+                    row = None
+                yield line_no, row if isinstance(row, dict) else None
+        else:
+            reader = csv.DictReader(f)
+            for row in reader:
+                yield reader.line_num, {key.strip(): value for key, value in row.items() if key}
+
+def chunked(rows, size: int):
+    """Ομαδοποίηση μιας ροής σε λίστες των size στοιχείων"""
+    chunk = []
+    for row in rows:
+        chunk.append(row)
+        if len(chunk) >= size:
+            yield chunk
+            chunk = []
+    if chunk:
+        yield chunk
+
+def write_import_report(path: str, rejected):
+    """
+    Αναφορά απορριφθεισών γραμμών σε CSV: (γραμμή, λόγος, αρχικά δεδομένα).
+    Επιστρέφει None ή το μήνυμα σφάλματος αν το αρχείο δεν γράφτηκε.
+    """
+    try:
+        _write_import_report(path, rejected)
+        return None
+    except OSError as e:
+        return f"Η αναφορά απορρίψεων δεν αποθηκεύτηκε: {str(e)}"
+
+def _write_import_report(path: str, rejected):
+    with open(path, 'w', encoding='utf-8-sig', newline='') as f:
+        writer = csv.writer(f)
+        writer.writerow(['Γραμμή', 'Λόγος', 'Δεδομένα'])
+        for line_no, reason, row in rejected:
+            writer.writerow([line_no, reason, json.dumps(row, ensure_ascii=False)])
+
+# ==================== ΣΧΗΜΑ ΒΑΣΗΣ ==================== #
+
+def _people_directory_sql(table: str, key: str) -> str:
+    """FTS5 ευρετήριο ονομάτων/email για Μέλος ή Προσωπικό, συγχρονισμένο με triggers"""
+    new_values = ", ".join(sql_fold(f"new.{col}") for col in ("Όνομα", "Επώνυμο", "Email"))
+    all_values = ", ".join(sql_fold(col) for col in ("Όνομα", "Επώνυμο", "Email"))
+    return f"""
+        CREATE VIRTUAL TABLE {table}_FTS USING fts5(Όνομα, Επώνυμο, Email, tokenize = 'unicode61');
+        INSERT INTO {table}_FTS(rowid, Όνομα, Επώνυμο, Email) SELECT {key}, {all_values} FROM {table};
+
+        CREATE TRIGGER {table}_FTS_insert AFTER INSERT ON {table} BEGIN
+            INSERT INTO {table}_FTS(rowid, Όνομα, Επώνυμο, Email) VALUES (new.{key}, {new_values});
+        END;
+        CREATE TRIGGER {table}_FTS_update AFTER UPDATE OF {key}, Όνομα, Επώνυμο, Email ON {table} BEGIN
+            DELETE FROM {table}_FTS WHERE rowid = old.{key};
+            INSERT INTO {table}_FTS(rowid, Όνομα, Επώνυμο, Email) VALUES (new.{key}, {new_values});
+        END;
+        CREATE TRIGGER {table}_FTS_delete AFTER DELETE ON {table} BEGIN
+            DELETE FROM {table}_FTS WHERE rowid = old.{key};
+        END;
+    """
+
+def _catalog_trigram_sql() -> str:
+    """FTS5 trigram ευρετήριο τίτλων/συγγραφέων (χωρίς τόνους), συγχρονισμένο με triggers"""
+    new_values = ", ".join(sql_fold(f"new.{col}") for col in ("Τίτλος", "Συγγραφέας"))
+    all_values = ", ".join(sql_fold(col) for col in ("Τίτλος", "Συγγραφέας"))
+    return f"""
+        CREATE VIRTUAL TABLE Τεκμήριο_Τριγράμματα USING fts5(Τίτλος, Συγγραφέας, tokenize = 'trigram');
+        CREATE VIRTUAL TABLE Τεκμήριο_Τριγράμματα_Συχνότητα USING fts5vocab(Τεκμήριο_Τριγράμματα, 'row');
+        INSERT INTO Τεκμήριο_Τριγράμματα(rowid, Τίτλος, Συγγραφέας) SELECT ISBN, {all_values} FROM Τεκμήριο;
+
+        CREATE TRIGGER Τεκμήριο_Τριγράμματα_insert AFTER INSERT ON Τεκμήριο BEGIN
+            INSERT INTO Τεκμήριο_Τριγράμματα(rowid, Τίτλος, Συγγραφέας) VALUES (new.ISBN, {new_values});
+        END;
+        CREATE TRIGGER Τεκμήριο_Τριγράμματα_update AFTER UPDATE OF ISBN, Τίτλος, Συγγραφέας ON Τεκμήριο BEGIN
+            DELETE FROM Τεκμήριο_Τριγράμματα WHERE rowid = old.ISBN;
+            INSERT INTO Τεκμήριο_Τριγράμματα(rowid, Τίτλος, Συγγραφέας) VALUES (new.ISBN, {new_values});
+        END;
+        CREATE TRIGGER Τεκμήριο_Τριγράμματα_delete AFTER DELETE ON Τεκμήριο BEGIN
+            DELETE FROM Τεκμήριο_Τριγράμματα WHERE rowid = old.ISBN;
+        END;
+    """
+
+def _change_log_sql(table: str, key: str, columns: tuple) -> str:
+    """Triggers που καταγράφουν στο Αλλαγές_Αναζήτησης ποιες γραμμές του πίνακα άλλαξαν"""
+    return f"""
+        CREATE TRIGGER {table}_Αλλαγές_insert AFTER INSERT ON {table} BEGIN
+            INSERT INTO Αλλαγές_Αναζήτησης (Πίνακας, Κλειδί) VALUES ('{table}', new.{key});
+        END;
+        CREATE TRIGGER {table}_Αλλαγές_update AFTER UPDATE OF {key}, {', '.join(columns)} ON {table} BEGIN
+            INSERT INTO Αλλαγές_Αναζήτησης (Πίνακας, Κλειδί) VALUES ('{table}', old.{key}), ('{table}', new.{key});
+        END;
+        CREATE TRIGGER {table}_Αλλαγές_delete AFTER DELETE ON {table} BEGIN
+            INSERT INTO Αλλαγές_Αναζήτησης (Πίνακας, Κλειδί) VALUES ('{table}', old.{key});
+        END;
+    """
+
+# Παροχές χώρου μελέτης: η θέση στο tuple είναι το bit της στη στήλη Παροχές
+SPACE_FACILITIES = ('Υπολογιστές', 'Προβολέας', 'Πίνακας', 'Κλιματισμός', 'Εκτυπωτής', 'Πρίζες_Φόρτισης')
+
+
+def facility_masks_including(mask: int) -> list:
+    """Όλες οι μάσκες παροχών που περιέχουν τα bits του mask (για αναζήτηση IN στο ευρετήριο)"""
+    return [value for value in range(1 << len(SPACE_FACILITIES)) if value & mask == mask]
+
+def facility_mask(*columns: str) -> int:
+    """Μάσκα bits για τις ζητούμενες παροχές"""
+    mask = 0
+    for column in columns:
+        mask |= 1 << SPACE_FACILITIES.index(column)
+    return mask
+
+
+# Πλήρης αναδημιουργία του πίνακα Διαθεσιμότητα από τα αντίτυπα
+AVAILABILITY_REBUILD_SQL = """
+    DELETE FROM Διαθεσιμότητα;
+    INSERT INTO Διαθεσιμότητα (ISBN, ID_Βιβλιοθήκης, Status, Πλήθος)
+        SELECT ISBN, ID_Βιβλιοθήκης, Status, COUNT(*)
+        FROM Αντίτυπο
+        GROUP BY ISBN, ID_Βιβλιοθήκης, Status;
+"""
+
+# Πλήρης αναδημιουργία του πίνακα Υπόλοιπο_Προστίμων από τα εκκρεμή πρόστιμα
+FINE_BALANCE_REBUILD_SQL = """
+    DELETE FROM Υπόλοιπο_Προστίμων;
+    INSERT INTO Υπόλοιπο_Προστίμων (ID_Μέλους, Οφειλή, Εκκρεμή)
+        SELECT ID_Μέλους, SUM(Ποσό), COUNT(*)
+        FROM Πρόστιμο
+        WHERE Κατάσταση = 'Εκκρεμής'
+        GROUP BY ID_Μέλους;
+"""
+
+# Κάθε migration εφαρμόζεται μία φορά, με τη σειρά, και ανεβάζει το PRAGMA user_version
+SCHEMA_MIGRATIONS = (
+    # 1: Κατάλογος προσώπων (Email/Τηλέφωνο έχουν ήδη UNIQUE ευρετήρια)
+    _people_directory_sql("Μέλος", "ID_Μέλους") + _people_directory_sql("Προσωπικό", "ID_Προσωπικού"),
+
+    # 2: Ρητή λήξη κράτησης χώρου και ευρετήριο διαστημάτων
+    """
+    ALTER TABLE Μέλος_Κάνει_Κράτηση_Χώρου ADD COLUMN Ώρα_Λήξης TIME;
+    UPDATE Μέλος_Κάνει_Κράτηση_Χώρου
+    SET Ώρα_Λήξης = CASE WHEN Ώρα_Κράτησης >= '22:00' THEN '24:00'
+                         ELSE strftime('%H:%M', Ώρα_Κράτησης, '+2 hours') END;
+    CREATE INDEX idx_Κράτηση_Χώρου_Διάστημα
+        ON Μέλος_Κάνει_Κράτηση_Χώρου(ID_Χώρου, Ημερομηνία_Κράτησης, Ώρα_Κράτησης, Ώρα_Λήξης);
+    """,
+
+    # 3: Surrogate κλειδί κράτησης χώρου (το PRIMARY KEY(ID_Μέλους, ID_Χώρου) επέτρεπε μία κράτηση ανά χώρο)
+    """
+    CREATE TABLE "Μέλος_Κάνει_Κράτηση_Χώρου_νέος" (
+        "ID_Κράτησης_Χώρου"	INTEGER NOT NULL UNIQUE,
+        "ID_Μέλους"	INTEGER NOT NULL,
+        "ID_Χώρου"	INTEGER NOT NULL,
+        "Ημερομηνία_Κράτησης"	DATETIME NOT NULL,
+        "Ώρα_Κράτησης"	TIME NOT NULL,
+        "Ώρα_Λήξης"	TIME NOT NULL,
+        PRIMARY KEY("ID_Κράτησης_Χώρου" AUTOINCREMENT),
+        FOREIGN KEY("ID_Μέλους") REFERENCES "Μέλος"("ID_Μέλους") ON DELETE CASCADE,
+        FOREIGN KEY("ID_Χώρου") REFERENCES "Χώρος_Μελέτης"("ID_Χώρου") ON DELETE CASCADE
+    );
+    INSERT INTO Μέλος_Κάνει_Κράτηση_Χώρου_νέος (ID_Μέλους, ID_Χώρου, Ημερομηνία_Κράτησης, Ώρα_Κράτησης, Ώρα_Λήξης)
+        SELECT ID_Μέλους, ID_Χώρου, Ημερομηνία_Κράτησης, Ώρα_Κράτησης, Ώρα_Λήξης
+        FROM Μέλος_Κάνει_Κράτηση_Χώρου
+        ORDER BY Ημερομηνία_Κράτησης, Ώρα_Κράτησης;
+    DROP TABLE Μέλος_Κάνει_Κράτηση_Χώρου;
+    ALTER TABLE Μέλος_Κάνει_Κράτηση_Χώρου_νέος RENAME TO Μέλος_Κάνει_Κράτηση_Χώρου;
+    CREATE INDEX idx_Κράτηση_Χώρου_Διάστημα
+        ON Μέλος_Κάνει_Κράτηση_Χώρου(ID_Χώρου, Ημερομηνία_Κράτησης, Ώρα_Κράτησης, Ώρα_Λήξης);
+    CREATE INDEX idx_Κράτηση_Χώρου_Μέλος
+        ON Μέλος_Κάνει_Κράτηση_Χώρου(ID_Μέλους, Ημερομηνία_Κράτησης);
+    """,
+
+    # 4: Μάσκα παροχών χώρου (generated, πάντα συγχρονισμένη με τις έξι στήλες) και ευρετήριο αναζήτησης
+    #    (οι Παροχές πριν από τη βιβλιοθήκη, ώστε να τις περιορίζει και η αναζήτηση σε όλο το δίκτυο)
+    f"""
+    ALTER TABLE Χώρος_Μελέτης ADD COLUMN Παροχές INTEGER GENERATED ALWAYS AS (
+        {' | '.join(f'(COALESCE({column}, 0) << {bit})' for bit, column in enumerate(SPACE_FACILITIES))}
+    ) VIRTUAL;
+    CREATE INDEX idx_Χώρος_Παροχές
+        ON Χώρος_Μελέτης(Status, Παροχές, ID_Βιβλιοθήκης, Χωρητικότητα);
+    """,
+
+    # 5: Ουρά κρατήσεων με μονότονο αριθμό σειράς ανά ISBN - η θέση υπολογίζεται κατά την ανάγνωση.
+    #    Οι παλιές κρατήσεις παίρνουν τους μικρότερους αριθμούς, οι ενεργές κρατούν τη σειρά τους.
+    """
+    UPDATE Κράτηση SET Προτεραιότητα = σειρά.αριθμός
+    FROM (
+        SELECT ID_Κράτησης, ROW_NUMBER() OVER (
+            PARTITION BY ISBN ORDER BY Κατάσταση = 'Ενεργή', Προτεραιότητα, ID_Κράτησης
+        ) AS αριθμός
+        FROM Κράτηση
+    ) AS σειρά
+    WHERE σειρά.ID_Κράτησης = Κράτηση.ID_Κράτησης;
+    CREATE UNIQUE INDEX idx_Κράτηση_Σειρά ON Κράτηση(ISBN, Προτεραιότητα);
+    CREATE INDEX idx_Κράτηση_Ουρά ON Κράτηση(ISBN, Προτεραιότητα) WHERE Κατάσταση = 'Ενεργή';
+    CREATE INDEX idx_Κράτηση_Μέλος ON Κράτηση(ID_Μέλους, ISBN) WHERE Κατάσταση = 'Ενεργή';
+    """,
+
+    # 6: Δέσμευση αντιτύπου για την κεφαλή της ουράς με προθεσμία παραλαβής
+    """
+    ALTER TABLE Κράτηση ADD COLUMN ID_Αντιτύπου INTEGER REFERENCES Αντίτυπο(ID_Αντιτύπου) ON DELETE SET NULL;
+    ALTER TABLE Κράτηση ADD COLUMN Λήξη_Παραλαβής DATE;
+    CREATE UNIQUE INDEX idx_Κράτηση_Δέσμευση ON Κράτηση(ID_Αντιτύπου)
+        WHERE Κατάσταση = 'Ενεργή' AND ID_Αντιτύπου IS NOT NULL;
+    CREATE INDEX idx_Κράτηση_Παραλαβή ON Κράτηση(Λήξη_Παραλαβής)
+        WHERE Κατάσταση = 'Ενεργή' AND ID_Αντιτύπου IS NOT NULL;
+    """,
+
+    # 7: Ευρετήριο ηλικίας κρατήσεων σε αναμονή για τη μαζική λήξη
+    """
+    CREATE INDEX idx_Κράτηση_Αναμονή ON Κράτηση(Ημερομηνία_Κράτησης)
+        WHERE Κατάσταση = 'Ενεργή' AND ID_Αντιτύπου IS NULL;
+    """,
+
+    # 8: Ενεργός δανεισμός ανά αντίτυπο (σάρωση barcode, διαγραφή αντιτύπων)
+    """
+    CREATE INDEX idx_Δανεισμός_Αντίτυπο ON Δανεισμός(ID_Αντιτύπου, Κατάσταση);
+    """,
+
+    # 9: Συγκεντρωτικό πλήθος αντιτύπων ανά (ISBN, βιβλιοθήκη, Status), συγχρονισμένο με triggers
+    #    (ISBN με INTEGER affinity όπως στο Τεκμήριο, ώστε το join να χρησιμοποιεί το κλειδί)
+    """
+    CREATE TABLE Διαθεσιμότητα (
+        ISBN INTEGER NOT NULL,
+        ID_Βιβλιοθήκης INTEGER NOT NULL,
+        Status TEXT NOT NULL,
+        Πλήθος INTEGER NOT NULL,
+        PRIMARY KEY (ISBN, ID_Βιβλιοθήκης, Status)
+    ) WITHOUT ROWID;
+    """ + AVAILABILITY_REBUILD_SQL + """
+    CREATE TRIGGER Αντίτυπο_Διαθεσιμότητα_insert AFTER INSERT ON Αντίτυπο BEGIN
+        INSERT INTO Διαθεσιμότητα (ISBN, ID_Βιβλιοθήκης, Status, Πλήθος)
+        VALUES (new.ISBN, new.ID_Βιβλιοθήκης, new.Status, 1)
+        ON CONFLICT DO UPDATE SET Πλήθος = Πλήθος + 1;
+    END;
+    CREATE TRIGGER Αντίτυπο_Διαθεσιμότητα_delete AFTER DELETE ON Αντίτυπο BEGIN
+        UPDATE Διαθεσιμότητα SET Πλήθος = Πλήθος - 1
+        WHERE ISBN = old.ISBN AND ID_Βιβλιοθήκης = old.ID_Βιβλιοθήκης AND Status = old.Status;
+        DELETE FROM Διαθεσιμότητα
+        WHERE ISBN = old.ISBN AND ID_Βιβλιοθήκης = old.ID_Βιβλιοθήκης AND Status = old.Status AND Πλήθος <= 0;
+    END;
+    CREATE TRIGGER Αντίτυπο_Διαθεσιμότητα_update AFTER UPDATE OF ISBN, ID_Βιβλιοθήκης, Status ON Αντίτυπο
+    WHEN old.ISBN IS NOT new.ISBN OR old.ID_Βιβλιοθήκης IS NOT new.ID_Βιβλιοθήκης OR old.Status IS NOT new.Status BEGIN
+        UPDATE Διαθεσιμότητα SET Πλήθος = Πλήθος - 1
+        WHERE ISBN = old.ISBN AND ID_Βιβλιοθήκης = old.ID_Βιβλιοθήκης AND Status = old.Status;
+        DELETE FROM Διαθεσιμότητα
+        WHERE ISBN = old.ISBN AND ID_Βιβλιοθήκης = old.ID_Βιβλιοθήκης AND Status = old.Status AND Πλήθος <= 0;
+        INSERT INTO Διαθεσιμότητα (ISBN, ID_Βιβλιοθήκης, Status, Πλήθος)
+        VALUES (new.ISBN, new.ID_Βιβλιοθήκης, new.Status, 1)
+        ON CONFLICT DO UPDATE SET Πλήθος = Πλήθος + 1;
+    END;
+    """,
+
+    # 10: Φίλτρο βιβλιοθήκης της περιήγησης από την πλευρά της βιβλιοθήκης και ταξινόμηση κατά τίτλο
+    """
+    CREATE INDEX idx_Διαθεσιμότητα_Βιβλιοθήκη ON Διαθεσιμότητα(ID_Βιβλιοθήκης, Status, ISBN);
+    CREATE INDEX idx_Τεκμήριο_Τίτλος ON Τεκμήριο(Τίτλος);
+    """,
+
+    # 11: Closure table της ιεραρχίας κατηγοριών (κάθε πρόγονος-απόγονος με την απόστασή τους,
+    #     και η ίδια η κατηγορία με Βάθος 0). Το αναδρομικό CTE τρέχει μόνο εδώ, μία φορά.
+    """
+    CREATE TABLE Κατηγορία_Ιεραρχία (
+        Πρόγονος INTEGER NOT NULL,
+        Απόγονος INTEGER NOT NULL,
+        Βάθος INTEGER NOT NULL,
+        PRIMARY KEY (Πρόγονος, Απόγονος)
+    ) WITHOUT ROWID;
+    CREATE INDEX idx_Κατηγορία_Ιεραρχία_Απόγονος ON Κατηγορία_Ιεραρχία(Απόγονος, Βάθος);
+    CREATE INDEX idx_Τεκμήριο_Κατηγορία ON Τεκμήριο(Κατηγορία);
+
+    INSERT INTO Κατηγορία_Ιεραρχία (Πρόγονος, Απόγονος, Βάθος)
+        WITH RECURSIVE δέντρο(Πρόγονος, Απόγονος, Βάθος) AS (
+            SELECT ID_Κατηγορίας, ID_Κατηγορίας, 0 FROM Κατηγορία
+            UNION ALL
+            SELECT δ.Πρόγονος, κ.ID_Κατηγορίας, δ.Βάθος + 1
+            FROM δέντρο δ JOIN Κατηγορία κ ON κ.parent_Κατηγορία = δ.Απόγονος
+        )
+        SELECT Πρόγονος, Απόγονος, Βάθος FROM δέντρο;
+
+    CREATE TRIGGER Κατηγορία_Ιεραρχία_insert AFTER INSERT ON Κατηγορία BEGIN
+        INSERT INTO Κατηγορία_Ιεραρχία (Πρόγονος, Απόγονος, Βάθος)
+            SELECT new.ID_Κατηγορίας, new.ID_Κατηγορίας, 0
+            UNION ALL
+            SELECT Πρόγονος, new.ID_Κατηγορίας, Βάθος + 1
+            FROM Κατηγορία_Ιεραρχία WHERE Απόγονος = new.parent_Κατηγορία;
+    END;
+    CREATE TRIGGER Κατηγορία_Ιεραρχία_κύκλος BEFORE UPDATE OF parent_Κατηγορία ON Κατηγορία
+    WHEN EXISTS (SELECT 1 FROM Κατηγορία_Ιεραρχία
+                 WHERE Πρόγονος = new.ID_Κατηγορίας AND Απόγονος = new.parent_Κατηγορία) BEGIN
+        SELECT RAISE(ABORT, 'Μια κατηγορία δεν μπορεί να γίνει υποκατηγορία του εαυτού της ή απογόνου της');
+    END;
+    CREATE TRIGGER Κατηγορία_Ιεραρχία_update AFTER UPDATE OF parent_Κατηγορία ON Κατηγορία
+    WHEN old.parent_Κατηγορία IS NOT new.parent_Κατηγορία BEGIN
+        -- αποσύνδεση του υποδέντρου από τους παλιούς προγόνους
+        DELETE FROM Κατηγορία_Ιεραρχία
+        WHERE Απόγονος IN (SELECT Απόγονος FROM Κατηγορία_Ιεραρχία WHERE Πρόγονος = new.ID_Κατηγορίας)
+          AND Πρόγονος IN (SELECT Πρόγονος FROM Κατηγορία_Ιεραρχία
+                           WHERE Απόγονος = new.ID_Κατηγορίας AND Πρόγονος != new.ID_Κατηγορίας);
+        -- σύνδεση με τους προγόνους του νέου γονέα
+        INSERT INTO Κατηγορία_Ιεραρχία (Πρόγονος, Απόγονος, Βάθος)
+            SELECT π.Πρόγονος, υ.Απόγονος, π.Βάθος + υ.Βάθος + 1
+            FROM Κατηγορία_Ιεραρχία π, Κατηγορία_Ιεραρχία υ
+            WHERE π.Απόγονος = new.parent_Κατηγορία AND υ.Πρόγονος = new.ID_Κατηγορίας;
+    END;
+    CREATE TRIGGER Κατηγορία_Ιεραρχία_delete AFTER DELETE ON Κατηγορία BEGIN
+        DELETE FROM Κατηγορία_Ιεραρχία WHERE Απόγονος = old.ID_Κατηγορίας OR Πρόγονος = old.ID_Κατηγορίας;
+    END;
+    """,
+
+    # 12: Ευρετήριο τριγραμμάτων τίτλων/συγγραφέων για αναζήτηση με ανοχή σε ορθογραφικά λάθη
+    _catalog_trigram_sql(),
+
+    # 13: Ημερολόγιο αλλαγών τίτλων/ονομάτων για τη σταδιακή ενημέρωση της αυτόματης συμπλήρωσης.
+    #     Κάθε διεργασία το διαβάζει με δικό της σημείο ανάγνωσης και καθαρίζεται μόνο με βάση
+    #     την ηλικία (Χρόνος σε δευτερόλεπτα Unix). AUTOINCREMENT ώστε ο αριθμός να μην
+    #     ξαναχρησιμοποιείται όταν καθαρίζεται ο πίνακας· το sqlite_sequence κρατά τον τελευταίο.
+    """
+    CREATE TABLE Αλλαγές_Αναζήτησης (
+        ID_Αλλαγής INTEGER PRIMARY KEY AUTOINCREMENT,
+        Πίνακας TEXT NOT NULL,
+        Κλειδί INTEGER NOT NULL,
+        Χρόνος INTEGER NOT NULL DEFAULT (CAST(strftime('%s', 'now') AS INTEGER))
+    );
+    CREATE INDEX idx_Αλλαγές_Αναζήτησης_Χρόνος ON Αλλαγές_Αναζήτησης(Χρόνος);
+    """ + _change_log_sql("Τεκμήριο", "ISBN", ("Τίτλος", "Συγγραφέας"))
+        + _change_log_sql("Μέλος", "ID_Μέλους", ("Όνομα", "Επώνυμο")),
+
+    # 14: Μετρητές της σύνοψης μέλους απευθείας από ευρετήρια ανά μέλος
+    """
+    CREATE INDEX idx_Δανεισμός_Μέλος ON Δανεισμός(ID_Μέλους, Κατάσταση, Ημερομηνία_Λήξης);
+    CREATE INDEX idx_Πρόστιμο_Μέλος ON Πρόστιμο(ID_Μέλους, Κατάσταση, Ποσό);
+    """,
+
+    # 15: Τρέχουσα οφειλή ανά μέλος από τα εκκρεμή πρόστιμα, συγχρονισμένη με triggers
+    #     (γραμμή μόνο για μέλη με εκκρεμή πρόστιμα)
+    """
+    CREATE TABLE Υπόλοιπο_Προστίμων (
+        ID_Μέλους INTEGER PRIMARY KEY,
+        Οφειλή REAL NOT NULL,
+        Εκκρεμή INTEGER NOT NULL
+    );
+    """ + FINE_BALANCE_REBUILD_SQL + """
+    CREATE TRIGGER Πρόστιμο_Υπόλοιπο_insert AFTER INSERT ON Πρόστιμο
+    WHEN new.Κατάσταση = 'Εκκρεμής' BEGIN
+        INSERT INTO Υπόλοιπο_Προστίμων (ID_Μέλους, Οφειλή, Εκκρεμή)
+        VALUES (new.ID_Μέλους, new.Ποσό, 1)
+        ON CONFLICT DO UPDATE SET Οφειλή = Οφειλή + excluded.Οφειλή, Εκκρεμή = Εκκρεμή + 1;
+    END;
+    CREATE TRIGGER Πρόστιμο_Υπόλοιπο_delete AFTER DELETE ON Πρόστιμο
+    WHEN old.Κατάσταση = 'Εκκρεμής' BEGIN
+        UPDATE Υπόλοιπο_Προστίμων SET Οφειλή = Οφειλή - old.Ποσό, Εκκρεμή = Εκκρεμή - 1
+        WHERE ID_Μέλους = old.ID_Μέλους;
+        DELETE FROM Υπόλοιπο_Προστίμων WHERE ID_Μέλους = old.ID_Μέλους AND Εκκρεμή <= 0;
+    END;
+    CREATE TRIGGER Πρόστιμο_Υπόλοιπο_update AFTER UPDATE OF ID_Μέλους, Ποσό, Κατάσταση ON Πρόστιμο
+    WHEN old.Κατάσταση = 'Εκκρεμής' OR new.Κατάσταση = 'Εκκρεμής' BEGIN
+        UPDATE Υπόλοιπο_Προστίμων SET Οφειλή = Οφειλή - old.Ποσό, Εκκρεμή = Εκκρεμή - 1
+        WHERE ID_Μέλους = old.ID_Μέλους AND old.Κατάσταση = 'Εκκρεμής';
+        DELETE FROM Υπόλοιπο_Προστίμων WHERE ID_Μέλους = old.ID_Μέλους AND Εκκρεμή <= 0;
+        INSERT INTO Υπόλοιπο_Προστίμων (ID_Μέλους, Οφειλή, Εκκρεμή)
+        SELECT new.ID_Μέλους, new.Ποσό, 1 WHERE new.Κατάσταση = 'Εκκρεμής'
+        ON CONFLICT DO UPDATE SET Οφειλή = Οφειλή + excluded.Οφειλή, Εκκρεμή = Εκκρεμή + 1;
+    END;
+    """,
+
+    # 16: Άδειες eBook - ταυτόχρονες θέσεις (Θέσεις) και συνολικοί δανεισμοί της άδειας
+    #     (Όριο_Δανεισμών), NULL = χωρίς όριο. Οι μετρητές Ενεργοί/Χρήσεις συγχρονίζονται με
+    #     triggers, ώστε η απόκτηση θέσης να ελέγχει μία γραμμή. Λίστα αναμονής ανά eBook.
+    """
+    ALTER TABLE EBook ADD COLUMN Θέσεις INTEGER CHECK (Θέσεις > 0);
+    ALTER TABLE EBook ADD COLUMN Όριο_Δανεισμών INTEGER CHECK (Όριο_Δανεισμών > 0);
+    ALTER TABLE EBook ADD COLUMN Ενεργοί INTEGER NOT NULL DEFAULT 0;
+    ALTER TABLE EBook ADD COLUMN Χρήσεις INTEGER NOT NULL DEFAULT 0;
+    UPDATE EBook SET
+        Ενεργοί = (SELECT COUNT(*) FROM Δανεισμός δ
+                   WHERE δ.ID_EBook = EBook.ID_EBook AND δ.Κατάσταση IN ('Ενεργός', 'Εκπρόθεσμος')),
+        Χρήσεις = (SELECT COUNT(*) FROM Δανεισμός δ
+                   WHERE δ.ID_EBook = EBook.ID_EBook AND δ.Κατάσταση != 'Ακυρωμένος');
+
+    CREATE INDEX idx_Δανεισμός_EBook_Λήξη ON Δανεισμός(Ημερομηνία_Λήξης)
+        WHERE ID_EBook IS NOT NULL AND Κατάσταση IN ('Ενεργός', 'Εκπρόθεσμος');
+
+    CREATE TRIGGER Δανεισμός_EBook_insert AFTER INSERT ON Δανεισμός
+    WHEN new.ID_EBook IS NOT NULL BEGIN
+        UPDATE EBook SET Ενεργοί = Ενεργοί + (new.Κατάσταση IN ('Ενεργός', 'Εκπρόθεσμος')),
+                         Χρήσεις = Χρήσεις + (new.Κατάσταση != 'Ακυρωμένος')
+        WHERE ID_EBook = new.ID_EBook;
+    END;
+    CREATE TRIGGER Δανεισμός_EBook_update AFTER UPDATE OF ID_EBook, Κατάσταση ON Δανεισμός
+    WHEN old.ID_EBook IS NOT NULL OR new.ID_EBook IS NOT NULL BEGIN
+        UPDATE EBook SET Ενεργοί = Ενεργοί - (old.Κατάσταση IN ('Ενεργός', 'Εκπρόθεσμος'))
+        WHERE ID_EBook = old.ID_EBook;
+        UPDATE EBook SET Ενεργοί = Ενεργοί + (new.Κατάσταση IN ('Ενεργός', 'Εκπρόθεσμος'))
+        WHERE ID_EBook = new.ID_EBook;
+    END;
+    CREATE TRIGGER Δανεισμός_EBook_delete AFTER DELETE ON Δανεισμός
+    WHEN old.ID_EBook IS NOT NULL BEGIN
+        UPDATE EBook SET Ενεργοί = Ενεργοί - (old.Κατάσταση IN ('Ενεργός', 'Εκπρόθεσμος'))
+        WHERE ID_EBook = old.ID_EBook;
+    END;
+
+    CREATE TABLE Αναμονή_EBook (
+        ID_Αναμονής INTEGER PRIMARY KEY AUTOINCREMENT,
+        ID_EBook INTEGER NOT NULL REFERENCES EBook(ID_EBook) ON DELETE CASCADE,
+        ID_Μέλους INTEGER NOT NULL REFERENCES Μέλος(ID_Μέλους) ON DELETE CASCADE,
+        Ημερομηνία_Αίτησης DATETIME NOT NULL,
+        Κατάσταση TEXT NOT NULL DEFAULT 'Ενεργή' CHECK (Κατάσταση IN ('Ενεργή', 'Εξυπηρετήθηκε', 'Ακυρωμένη'))
+    );
+    CREATE INDEX idx_Αναμονή_EBook_Ουρά ON Αναμονή_EBook(ID_EBook, ID_Αναμονής) WHERE Κατάσταση = 'Ενεργή';
+    CREATE UNIQUE INDEX idx_Αναμονή_EBook_Μέλος ON Αναμονή_EBook(ID_Μέλους, ID_EBook) WHERE Κατάσταση = 'Ενεργή';
+    """,
+)
+
+# ==================== ΕΓΓΡΑΦΕΣ ΓΡΑΜΜΩΝ ==================== #
+
+class Record(tuple):
+    """
+    Συμπαγής εγγραφή γραμμής (tuple με __slots__) αντί για dict ανά γραμμή.
+    Υποστηρίζει πρόσβαση τύπου dict (rec['Τίτλος'], get, keys, items) και
+    πεδίου (rec.Τίτλος). Οι στήλες κάθε ερωτήματος περιγράφονται μία φορά
+    στην κλάση και όχι σε κάθε γραμμή.
+    """
+    __slots__ = ()
+    _fields = ()
+    _index = {}
+
+    def __getitem__(self, key):
+        if isinstance(key, str):
+            return tuple.__getitem__(self, self._index[key])
+        return tuple.__getitem__(self, key)
+
+    def get(self, key, default=None):
+        i = self._index.get(key)
+        return default if i is None else tuple.__getitem__(self, i)
+
+    def keys(self):
+        return self._index.keys()
+
+    def values(self):
+        return [tuple.__getitem__(self, i) for i in self._index.values()]
+
+    def items(self):
+        return [(k, tuple.__getitem__(self, i)) for k, i in self._index.items()]
+
+    def as_dict(self):
+        return dict(self.items())
+
+    def __repr__(self):
+        fields = ", ".join(f"{k}={v!r}" for k, v in self.items())
+        return f"{type(self).__name__}({fields})"
+
+
+class BookRecord(Record):
+    """Τεκμήριο"""
+    __slots__ = ()
+    ISBN: str
+    Τίτλος: str
+    Συγγραφέας: str
+    Εκδότης: str
+    Χρονολογία: str
+    Γλώσσα: str
+    Κατηγορία: str
+
+
+class CopyRecord(Record):
+    """Αντίτυπο"""
+    __slots__ = ()
+    ID_Αντιτύπου: int
+    ISBN: str
+    ID_Βιβλιοθήκης: int
+    Φυσική_Κατάσταση: str
+    Status: str
+
+
+class LoanRecord(Record):
+    """Δανεισμός"""
+    __slots__ = ()
+    ID_Δανεισμού: int
+    ID_Μέλους: int
+    Τίτλος: str
+    Ημερομηνία_Έναρξης: str
+    Ημερομηνία_Λήξης: str
+    Κατάσταση: str
+    Τύπος: str
+
+
+class FineRecord(Record):
+    """Πρόστιμο"""
+    __slots__ = ()
+    ID_Προστίμου: int
+    ID_Δανεισμού: int
+    Ποσό: float
+    Κατάσταση: str
+    Ημερομηνία_Επιβολής: str
+
+
+class MemberRecord(Record):
+    """Μέλος"""
+    __slots__ = ()
+    ID_Μέλους: int
+    Όνομα: str
+    Επώνυμο: str
+    Email: str
+    Τηλέφωνο: int
+    ID_Βιβλιοθήκης: int
+
+
+class ReservationRecord(Record):
+    """Κράτηση τεκμηρίου"""
+    __slots__ = ()
+    ID_Κράτησης: int
+    ID_Μέλους: int
+    ISBN: str
+    Κατάσταση: str
+    Προτεραιότητα: int
+    Ημερομηνία_Κράτησης: str
+    ID_Αντιτύπου: int
+    Λήξη_Παραλαβής: str
+    Θέση: int
+
+
+class SpaceBookingRecord(Record):
+    """Κράτηση χώρου μελέτης"""
+    __slots__ = ()
+    ID_Κράτησης_Χώρου: int
+    ID_Μέλους: int
+    ID_Χώρου: int
+    Ημερομηνία_Κράτησης: str
+    Ώρα_Κράτησης: str
+    Ώρα_Λήξης: str
+
+
+_record_classes = {}
+
+def record_class(base: type, columns: tuple):
+    """Κλάση εγγραφής για συγκεκριμένη διάταξη στηλών (cached ανά ερώτημα)"""
+    key = (base, columns)
+    cls = _record_classes.get(key)
+    if cls is None:
+        # Όπως το dict(row): σε διπλότυπες στήλες κερδίζει η τελευταία
+        index = {name: i for i, name in enumerate(columns)}
+        namespace = {'__slots__': (), '_fields': columns, '_index': index}
+        for name, i in index.items():
+            if name.isidentifier() and not hasattr(tuple, name) and not hasattr(base, name):
+                namespace[name] = property(itemgetter(i))
+        cls = _record_classes[key] = type(base.__name__, (base,), namespace)
+    return cls
+
+
+class RecordFactory:
+    """row_factory του sqlite3 που χτίζει εγγραφές απευθείας από τον cursor"""
+    __slots__ = ('base', '_description', '_cls')
+
+    def __init__(self, base: type = Record):
+        self.base = base
+        self._description = None
+        self._cls = None
+
+    def __call__(self, cursor, row):
+        description = cursor.description
+        if description is not self._description:
+            self._cls = record_class(self.base, tuple(col[0] for col in description))
+            self._description = description
+        return tuple.__new__(self._cls, row)
+
+
+class PrefixIndex:
+    """
+    Ευρετήριο προθεμάτων στη μνήμη για αυτόματη συμπλήρωση. Δύο παράλληλοι
+    ταξινομημένοι πίνακες: οι λέξεις χωρίς τόνους (κοινά αντικείμενα str μέσω
+    sys.intern) και η θέση του στοιχείου στο _items, ώστε το "tolk" να βρίσκει και
+    το "J.R.R. Tolkien" χωρίς αντίγραφο του κειμένου ανά λέξη. Οι αναζητήσεις
+    γίνονται με bisect στη λέξη του prefix με τις λιγότερες εμφανίσεις.
+    """
+    # Πάνω από τόσες αλλαγές οι πίνακες ξαναταξινομούνται αντί για εισαγωγές μία-μία
+    BULK_THRESHOLD = 64
+
+    def __init__(self):
+        self._words = []
+        self._refs = array('I')
+        self._items = []
+        self._slots = {}
+        self._free = []
+        self._lock = threading.Lock()
+        self.ready = False
+        self.stats = {}
+
+    @staticmethod
+    def _words_of(text):
+        return re.findall(r'\w+', fold_text(text))
+
+    def _add_item(self, kind, item_id, text):
+        """Καταχώριση στοιχείου σε ελεύθερη ή νέα θέση, επιστρέφει τη θέση"""
+        slot = self._free.pop() if self._free else len(self._items)
+        if slot == len(self._items):
+            self._items.append(None)
+        self._items[slot] = (kind, item_id, text)
+        self._slots[(kind, item_id)] = slot
+        return slot
+
+    def _sort_pairs(self, pairs):
+        pairs.sort()
+        self._words = [word for word, _ in pairs]
+        self._refs = array('I', [slot for _, slot in pairs])
+
+    def load(self, items):
+        """Πλήρες χτίσιμο από (είδος, id, κείμενο), με καταγραφή χρόνου και μνήμης"""
+        started = time.perf_counter()
+        index = PrefixIndex()
+        pairs = []
+        for kind, item_id, text in items:
+            if text:
+                slot = index._add_item(kind, item_id, text)
+                pairs.extend((sys.intern(word), slot) for word in self._words_of(text))
+        index._sort_pairs(pairs)
+
+        with self._lock:
+            self._words, self._refs, self._items, self._slots, self._free = (
+                index._words, index._refs, index._items, index._slots, index._free)
+            self.ready = True
+
+        size = (sys.getsizeof(index._words) + sys.getsizeof(index._refs)
+                + sum(sys.getsizeof(word) for word in set(index._words))
+                + sys.getsizeof(index._items) + sys.getsizeof(index._slots)
+                + sum(sys.getsizeof(item) + sys.getsizeof(item[2]) for item in index._items))
+        self.stats = {
+            'Εγγραφές': len(index._words),
+            'Μνήμη_KB': round(size / 1024),
+            'Χρόνος_ms': round((time.perf_counter() - started) * 1000, 1),
+        }
+
+    def _remove_item(self, slot):
+        """Αφαίρεση των λέξεων του στοιχείου της θέσης slot και απελευθέρωσή της"""
+        kind, item_id, text = self._items[slot]
+        for word in set(self._words_of(text)):
+            i, end = bisect_left(self._words, word), bisect_right(self._words, word)
+            while i < end:
+                if self._refs[i] == slot:
+                    del self._words[i], self._refs[i]
+                    end -= 1
+                else:
+                    i += 1
+        del self._slots[(kind, item_id)]
+        self._items[slot] = None
+        self._free.append(slot)
+
+    def update(self, changes):
+        """Σταδιακή ενημέρωση από (είδος, id, νέο κείμενο ή None αν διαγράφηκε)"""
+        latest = {(kind, item_id): text for kind, item_id, text in changes}
+
+        with self._lock:
+            if len(latest) > self.BULK_THRESHOLD:
+                # Οι παλιές λέξεις φιλτράρονται μόνο αν κάποιο στοιχείο υπήρχε ήδη (όχι σε μαζική εισαγωγή)
+                stale = {self._slots.pop(item) for item in latest if item in self._slots}
+                pairs = list(zip(self._words, self._refs))
+                if stale:
+                    pairs = [pair for pair in pairs if pair[1] not in stale]
+                    for slot in stale:
+                        self._items[slot] = None
+                    self._free.extend(stale)
+                for (kind, item_id), text in latest.items():
+                    if text:
+                        slot = self._add_item(kind, item_id, text)
+                        pairs.extend((sys.intern(word), slot) for word in self._words_of(text))
+                self._sort_pairs(pairs)
+                return
+
+            for (kind, item_id), text in latest.items():
+                slot = self._slots.get((kind, item_id))
+                if slot is not None:
+                    self._remove_item(slot)
+                if text:
+                    slot = self._add_item(kind, item_id, text)
+                    for word in self._words_of(text):
+                        i = bisect_right(self._words, word)
+                        self._words.insert(i, sys.intern(word))
+                        self._refs.insert(i, slot)
+
+    def suggest(self, prefix: str, k: int = 10):
+        """
+        Έως k διαφορετικά κείμενα που περιέχουν τις λέξεις του prefix διαδοχικά από αρχή
+        λέξης (η τελευταία ως πρόθεμα). Οι υποψήφιοι έρχονται από τη σπανιότερη λέξη.
+        """
+        words = self._words_of(prefix)
+        if not words:
+            return []
+        key = ' ' + ' '.join(words)
+
+        results = []
+        with self._lock:
+            ranges = [(bisect_left(self._words, word), bisect_right(self._words, word)) for word in words[:-1]]
+            last = words[-1]
+            ranges.append((bisect_left(self._words, last), bisect_left(self._words, last + '\U0010ffff')))
+            start, end = min(ranges, key=lambda bounds: bounds[1] - bounds[0])
+
+            for i in range(start, end):
+                text = self._items[self._refs[i]][2]
+                if text in results:
+                    continue
+                if len(words) > 1 and (' ' + ' '.join(self._words_of(text))).find(key) < 0:
+                    continue
+                results.append(text)
+                if len(results) == k:
+                    break
+        return results
+
+
+class TrackedConnection(sqlite3.Connection):
+    """
+    Σύνδεση που καταγράφει (μέσω authorizer) σε ποιους πίνακες γράφει και
+    ειδοποιεί το μοντέλο σε κάθε commit, ώστε να ακυρώνει τις caches του.
+    Οι συνδέσεις είναι βραχύβιες, οπότε το σύνολο δεν μηδενίζεται: μια εντολή
+    από την cache εντολών του sqlite3 δεν ξαναπερνά από τον authorizer.
+    """
+    WRITE_ACTIONS = (sqlite3.SQLITE_INSERT, sqlite3.SQLITE_UPDATE, sqlite3.SQLITE_DELETE)
+
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        self.written = set()
+        self.on_commit = None
+        self.set_authorizer(self._authorize)
+
+    def _authorize(self, action, table, column, database, trigger):
+        if action in self.WRITE_ACTIONS:
+            self.written.add(table)
+        return sqlite3.SQLITE_OK
+
+    def commit(self):
+        super().commit()
+        if self.written and self.on_commit:
+            self.on_commit(self.written)
+
 
 class LibraryModel:
+    # Πλήθος τεκμηρίων που κρατά η LRU cache λεπτομερειών
+    BOOK_DETAILS_CACHE_SIZE = 256
+
+    # Πίνακες από τους οποίους χτίζεται το πακέτο λεπτομερειών τεκμηρίου
+    BOOK_DETAILS_TABLES = frozenset({'Τεκμήριο', 'Κατηγορία', 'Αντίτυπο', 'Βιβλιοθήκη', 'EBook', 'Κράτηση', 'Αξιολόγηση'})
+
+    # Πίνακες που τροφοδοτούν την αυτόματη συμπλήρωση
+    AUTOCOMPLETE_TABLES = frozenset({'Τεκμήριο', 'Μέλος'})
+
+    # Δευτερόλεπτα που κρατιούνται οι εγγραφές του Αλλαγές_Αναζήτησης για τις άλλες διεργασίες
+    AUTOCOMPLETE_LOG_RETENTION_S = 24 * 3600
+
+    # Διάστημα (δευτ.) ανάμεσα σε δύο ελέγχους του νήματος παρασκηνίου για αλλαγές άλλων διεργασιών
+    AUTOCOMPLETE_POLL_S = 2
+
+    # Δεδομένα του συνδεδεμένου μέλους που κρατά η cache συνεδρίας και οι πίνακες από τους οποίους εξαρτώνται
+    MEMBER_CACHE_TABLES = {
+        'Δανεισμοί': frozenset({'Δανεισμός', 'Τεκμήριο', 'EBook'}),
+        'Κρατήσεις': frozenset({'Κράτηση', 'Τεκμήριο'}),
+        'Πρόστιμα': frozenset({'Πρόστιμο', 'Δανεισμός', 'Τεκμήριο', 'EBook'}),
+        'Αξιολογήσεις': frozenset({'Αξιολόγηση', 'Τεκμήριο'}),
+        'Ιστορικό': frozenset({'Δανεισμός', 'Τεκμήριο', 'EBook'}),
+        'Σύνοψη': frozenset({'Δανεισμός', 'Υπόλοιπο_Προστίμων', 'Κράτηση', 'Μέλος_Κάνει_Κράτηση_Χώρου'}),
+    }
+
     def __init__(self, db_path: str = "Libraries.db"):
         """Αρχικοποίηση σύνδεσης με τη βάση"""
         self.db_path = db_path
+        self._book_details_cache = OrderedDict()
+        self._book_details_generation = 0
+        self._book_details_lock = threading.Lock()
+        self.catalog_suggestions = PrefixIndex()
+        self.member_suggestions = PrefixIndex()
+        self._autocomplete_lock = threading.Lock()
+        self._autocomplete_seen = None
+        self._session_member = None
+        self._member_cache = {}
+        self._member_cache_generation = dict.fromkeys(self.MEMBER_CACHE_TABLES, 0)
+        self._member_cache_lock = threading.Lock()
+        self.ensure_schema()
+        # Μόνιμα ανοιχτή σύνδεση μόνο για το PRAGMA data_version (commits άλλων συνδέσεων/διεργασιών)
+        self._data_version_conn = sqlite3.connect(db_path, check_same_thread=False)
+        self._data_version_lock = threading.Lock()
+        self._data_version = self._data_version_conn.execute("PRAGMA data_version").fetchone()[0]
+
+    def ensure_schema(self):
+        """Εφαρμογή των εκκρεμών migrations του σχήματος"""
+        conn = self.get_connection()
+
+        try:
+            version = conn.execute("PRAGMA user_version").fetchone()[0]
+            for target, script in enumerate(SCHEMA_MIGRATIONS, 1):
+                if target > version:
+                    conn.executescript(f"BEGIN; {script}\nPRAGMA user_version = {target}; COMMIT;")
+            conn.close()
+
+        except Exception as e:
+            conn.rollback()
+            conn.close()
+            raise e
 
     def get_connection(self):
         """Δημιουργία σύνδεσης με τη βάση"""
-        conn = sqlite3.connect(self.db_path)
+        conn = sqlite3.connect(self.db_path, factory=TrackedConnection)
         conn.execute("PRAGMA foreign_keys = ON;") #NEW
-        conn.row_factory = sqlite3.Row
+        conn.row_factory = RecordFactory()
+        conn.on_commit = self._on_commit
         return conn
 
-    def execute_query(self, query: str, params: tuple = (), fetch_one: bool = False, commit: bool = False):
+    def _on_commit(self, tables):
+        """Ακύρωση/ενημέρωση των caches που εξαρτώνται από πίνακες που άλλαξαν"""
+        self._invalidate_caches(tables)
+        if not self.AUTOCOMPLETE_TABLES.isdisjoint(tables):
+            self._sync_autocomplete()
+
+    def _check_external_changes(self):
+        """
+        Ακύρωση της cache λεπτομερειών και της cache μέλους αν άλλαξε το PRAGMA data_version της μόνιμης
+        σύνδεσης, δηλαδή αν έκανε commit κάποια άλλη σύνδεση - και άλλης διεργασίας, που δεν περνά από
+        το _on_commit. Καλείται πριν από κάθε ανάγνωση cache· το PRAGMA δεν διαβάζει σελίδες της βάσης.
+        """
+        with self._data_version_lock:
+            version = self._data_version_conn.execute("PRAGMA data_version").fetchone()[0]
+            changed = version != self._data_version
+            self._data_version = version
+        if changed:
+            self._invalidate_caches(self.BOOK_DETAILS_TABLES.union(*self.MEMBER_CACHE_TABLES.values()))
+
+    def _invalidate_caches(self, tables):
+        """Ακύρωση των caches που εξαρτώνται από πίνακες που άλλαξαν (με αύξηση της γενιάς τους)"""
+        if not self.BOOK_DETAILS_TABLES.isdisjoint(tables):
+            with self._book_details_lock:
+                self._book_details_cache.clear()
+                self._book_details_generation += 1
+        with self._member_cache_lock:
+            for kind, kind_tables in self.MEMBER_CACHE_TABLES.items():
+                if not kind_tables.isdisjoint(tables):
+                    self._member_cache.pop(kind, None)
+                    self._member_cache_generation[kind] += 1
+
+    # ==================== ΑΥΤΟΜΑΤΗ ΣΥΜΠΛΗΡΩΣΗ ==================== #
+
+    def start_autocomplete(self):
+        """Χτίσιμο των ευρετηρίων αυτόματης συμπλήρωσης σε νήμα παρασκηνίου, που μετά παρακολουθεί τη βάση"""
+        threading.Thread(target=self._autocomplete_worker, daemon=True).start()
+
+    def _autocomplete_worker(self):
+        """
+        Πλήρες χτίσιμο και μετά έλεγχος ανά AUTOCOMPLETE_POLL_S του PRAGMA data_version σε μια
+        ανοιχτή σύνδεση: αλλάζει όταν κάνει commit οποιαδήποτε άλλη σύνδεση (και άλλης διεργασίας),
+        οπότε μόνο τότε διαβάζεται το Αλλαγές_Αναζήτησης. Οι προτάσεις δεν αγγίζουν ποτέ τη βάση.
+        """
+        self.build_autocomplete()
+        conn = sqlite3.connect(self.db_path)
+        version = conn.execute("PRAGMA data_version").fetchone()[0]
+        try:
+            while True:
+                time.sleep(self.AUTOCOMPLETE_POLL_S)
+                current = conn.execute("PRAGMA data_version").fetchone()[0]
+                if current != version:
+                    try:
+                        self._sync_autocomplete()
+                        version = current
+                    except sqlite3.Error:
+                        pass  # π.χ. κλειδωμένη βάση - ξανά στον επόμενο έλεγχο
+        finally:
+            conn.close()
+
+    @staticmethod
+    def _change_log_head(conn):
+        """Ο τελευταίος αριθμός που δόθηκε στο Αλλαγές_Αναζήτησης, ακόμη κι αν η εγγραφή έχει καθαριστεί"""
+        return conn.execute(
+            "SELECT COALESCE(MAX(seq), 0) FROM sqlite_sequence WHERE name = 'Αλλαγές_Αναζήτησης'").fetchone()[0]
+
+    def build_autocomplete(self):
+        """Πλήρες χτίσιμο από ένα στιγμιότυπο της βάσης και μετά εφαρμογή όσων άλλαξαν στο μεταξύ"""
+        conn = self.get_connection()
+        try:
+            conn.execute("BEGIN")
+            seen = self._change_log_head(conn)
+            books = conn.execute("SELECT ISBN, Τίτλος, Συγγραφέας FROM Τεκμήριο").fetchall()
+            members = conn.execute("SELECT ID_Μέλους, Όνομα || ' ' || Επώνυμο FROM Μέλος").fetchall()
+            conn.rollback()
+        finally:
+            conn.close()
+
+        self.catalog_suggestions.load(
+            [('Τίτλος', isbn, title) for isbn, title, _ in books] +
+            [('Συγγραφέας', isbn, author) for isbn, _, author in books])
+        self.member_suggestions.load([('Μέλος', member_id, name) for member_id, name in members])
+
+        # Οι αλλαγές μέχρι το στιγμιότυπο περιέχονται ήδη στα ευρετήρια
+        with self._autocomplete_lock:
+            self._autocomplete_seen = seen
+        self._sync_autocomplete()
+
+    def _sync_autocomplete(self):
+        """
+        Εφαρμογή των εγγραφών του Αλλαγές_Αναζήτησης μετά το σημείο ανάγνωσης αυτής της
+        διεργασίας. Οι εγγραφές δεν διαγράφονται εδώ, ώστε να τις δουν και οι άλλες
+        διεργασίες· αν κάποιες καθαρίστηκαν πριν διαβαστούν, τα ευρετήρια ξαναχτίζονται.
+        """
+        with self._autocomplete_lock:
+            if self._autocomplete_seen is None:
+                return
+
+            conn = self.get_connection()
+            try:
+                conn.execute("BEGIN")
+                head = self._change_log_head(conn)
+                rows = conn.execute("""
+                    SELECT α.ID_Αλλαγής, α.Πίνακας, α.Κλειδί, τ.Τίτλος, τ.Συγγραφέας,
+                           μ.Όνομα || ' ' || μ.Επώνυμο as Μέλος
+                    FROM Αλλαγές_Αναζήτησης α
+                    LEFT JOIN Τεκμήριο τ ON α.Πίνακας = 'Τεκμήριο' AND τ.ISBN = α.Κλειδί
+                    LEFT JOIN Μέλος μ ON α.Πίνακας = 'Μέλος' AND μ.ID_Μέλους = α.Κλειδί
+                    WHERE α.ID_Αλλαγής > ?
+                    ORDER BY α.ID_Αλλαγής
+                """, (self._autocomplete_seen,)).fetchall() if head != self._autocomplete_seen else []
+                conn.rollback()
+            finally:
+                conn.close()
+
+            if head == self._autocomplete_seen:
+                return
+            # Κάποιες εγγραφές καθαρίστηκαν πριν τις διαβάσει αυτή η διεργασία ή μια μαζική
+            # εισαγωγή άφησε μόνο το σημάδι '*' αντί για μία εγγραφή ανά γραμμή
+            if len(rows) != head - self._autocomplete_seen or any(row['Πίνακας'] == '*' for row in rows):
+                self._autocomplete_seen = None
+                threading.Thread(target=self.build_autocomplete, daemon=True).start()
+                return
+
+            catalog, members = [], []
+            for row in rows:
+                if row['Πίνακας'] == 'Τεκμήριο':
+                    catalog.append(('Τίτλος', row['Κλειδί'], row['Τίτλος']))
+                    catalog.append(('Συγγραφέας', row['Κλειδί'], row['Συγγραφέας']))
+                else:
+                    members.append(('Μέλος', row['Κλειδί'], row['Μέλος']))
+            self.catalog_suggestions.update(catalog)
+            self.member_suggestions.update(members)
+            self._autocomplete_seen = head
+
+    def prune_search_changes(self):
+        """Καθαρισμός των εγγραφών του Αλλαγές_Αναζήτησης που είναι παλαιότερες από AUTOCOMPLETE_LOG_RETENTION_S"""
         conn = self.get_connection()
         cursor = conn.cursor()
-        
+
+        try:
+            cursor.execute("""
+                DELETE FROM Αλλαγές_Αναζήτησης
+                WHERE Χρόνος < CAST(strftime('%s', 'now') AS INTEGER) - ?
+            """, (self.AUTOCOMPLETE_LOG_RETENTION_S,))
+            count = cursor.rowcount
+            conn.commit()
+            conn.close()
+            return True, count
+        except Exception as e:
+            conn.rollback()
+            conn.close()
+            return False, f"Σφάλμα: {str(e)}"
+
+    def suggest_titles(self, prefix: str, k: int = 10):
+        """Προτάσεις τίτλων/συγγραφέων από τη μνήμη (κενή λίστα όσο χτίζεται το ευρετήριο)"""
+        return self.catalog_suggestions.suggest(prefix, k)
+
+    def suggest_members(self, prefix: str, k: int = 10):
+        """Προτάσεις ονομάτων μελών από τη μνήμη"""
+        return self.member_suggestions.suggest(prefix, k)
+
+    # ==================== CACHE ΣΥΝΕΔΡΙΑΣ ΜΕΛΟΥΣ ==================== #
+
+    def start_member_session(self, member_id: int):
+        """Έναρξη συνεδρίας μέλους: άδεια cache και προφόρτωσή της σε νήμα παρασκηνίου"""
+        with self._member_cache_lock:
+            self._session_member = member_id
+            self._member_cache = {}
+        threading.Thread(target=self._warm_member_cache, args=(member_id,), daemon=True).start()
+
+    def end_member_session(self):
+        """Τέλος συνεδρίας: η cache του μέλους απορρίπτεται"""
+        with self._member_cache_lock:
+            self._session_member = None
+            self._member_cache = {}
+
+    def _warm_member_cache(self, member_id: int):
+        """Φόρτωση όλων των καρτελών του μέλους ώστε οι εναλλαγές να μην κάνουν ερωτήματα"""
+        for load in (self.get_member_summary, self.get_member_loans, self.get_member_reservations, self.get_member_fines,
+                     self.get_member_ratings, self.get_member_loan_history_books):
+            if self._session_member != member_id:
+                return
+            load(member_id)
+
+    def _member_data(self, kind: str, member_id: int, query: str, record: type = Record, params: tuple = None):
+        """
+        Αποτελέσματα ερωτήματος για το μέλος της συνεδρίας μέσω της cache. Ένα commit σε πίνακα
+        του MEMBER_CACHE_TABLES[kind] την ακυρώνει, όπως και κάθε commit άλλης διεργασίας
+        (_check_external_changes)· αν συμβεί όσο τρέχει το ερώτημα, το αποτέλεσμα δεν
+        αποθηκεύεται. Για άλλα μέλη το ερώτημα εκτελείται απευθείας.
+        """
+        self._check_external_changes()
+        with self._member_cache_lock:
+            if member_id != self._session_member:
+                generation = None
+            elif kind in self._member_cache:
+                return list(self._member_cache[kind])
+            else:
+                generation = self._member_cache_generation[kind]
+
+        rows = self.fetch_all_dict(query, params or (member_id,), record=record)
+
+        if generation is not None:
+            with self._member_cache_lock:
+                if member_id == self._session_member and generation == self._member_cache_generation[kind]:
+                    self._member_cache[kind] = rows
+        return list(rows)
+
+    def execute_query(self, query: str, params: tuple = (), fetch_one: bool = False, commit: bool = False, record: type = Record):
+        conn = self.get_connection()
+        cursor = conn.cursor()
+        cursor.row_factory = RecordFactory(record)
+
         try:
             cursor.execute(query, params)
             if commit:
@@ -40,15 +1135,13 @@ class LibraryModel:
             conn.close()
             raise e
 
-    def fetch_one_dict(self, query: str, params: tuple = ()):
-        """Fetch one row ως dictionary"""
-        result = self.execute_query(query, params, fetch_one=True)
-        return dict(result) if result else None
+    def fetch_one_dict(self, query: str, params: tuple = (), record: type = Record):
+        """Fetch one row ως εγγραφή με πρόσβαση τύπου dictionary"""
+        return self.execute_query(query, params, fetch_one=True, record=record)
 
-    def fetch_all_dict(self, query: str, params: tuple = ()):
-        """Fetch all rows ως list of dictionaries"""
-        results = self.execute_query(query, params, fetch_one=False)
-        return [dict(row) for row in results]
+    def fetch_all_dict(self, query: str, params: tuple = (), record: type = Record):
+        """Fetch all rows ως list εγγραφών με πρόσβαση τύπου dictionary"""
+        return self.execute_query(query, params, fetch_one=False, record=record)
 
     def execute_with_commit(self, query: str, params: tuple = ()):
         try:
@@ -69,28 +1162,54 @@ class LibraryModel:
             JOIN Βιβλιοθήκη as β ON μ.ID_Βιβλιοθήκης = β.ID_Βιβλιοθήκης
             WHERE μ.ID_Μέλους = ?
         """
-        return self.fetch_one_dict(query, (member_id,))
+        return self.fetch_one_dict(query, (member_id,), record=MemberRecord)
 
-    def browse_all_books(self, category: str = "Όλες", language: str = "Όλες", libraries: str = "Όλες", search_term: str = ""):
-        """Περιήγηση όλων των τεκμηρίων με φίλτρα"""
-        query = """
+    def browse_all_books(self, category: str = "Όλες", language: str = "Όλες", libraries="Όλες", search_term: str = "",
+                         available_only: bool = False, fuzzy: bool = False):
+        """
+        Περιήγηση όλων των τεκμηρίων με φίλτρα. libraries: "Όλες", ένα όνομα ή λίστα ονομάτων.
+        Τα φίλτρα βιβλιοθήκης/διαθεσιμότητας είναι semi-join (IN) στον πίνακα Διαθεσιμότητα,
+        οπότε κάθε τεκμήριο επιστρέφεται μία φορά και μια επιλεκτική βιβλιοθήκη
+        διαβάζει μόνο τους δικούς της τίτλους από το idx_Διαθεσιμότητα_Βιβλιοθήκη.
+        Με fuzzy η αναζήτηση γίνεται με ανοχή σε λάθη και τα αποτελέσματα ταξινομούνται κατά ομοιότητα·
+        όρος χωρίς λέξη τριών χαρακτήρων (χωρίς τριγράμματα) αναζητείται κανονικά με LIKE.
+        """
+        fuzzy = fuzzy and bool(term_trigrams(search_term))
+        ranked = self.fuzzy_match_isbns(search_term) if fuzzy else None
+
+        if isinstance(libraries, str):
+            libraries = [] if libraries == "Όλες" else [libraries]
+
+        library_scope, scope_params = "", []
+        if libraries:
+            library_scope = """ AND δ.ID_Βιβλιοθήκης IN (
+                SELECT ID_Βιβλιοθήκης FROM Βιβλιοθήκη WHERE Όνομα IN (SELECT value FROM json_each(?)))"""
+            scope_params = [json.dumps(list(libraries), ensure_ascii=False)]
+
+        query = f"""
             SELECT τ.ISBN, τ.Τίτλος, τ.Συγγραφέας, τ.Εκδότης, 
                τ.Χρονολογία, τ.Γλώσσα, τ.Έκδοση, 
-               COALESCE(κ.Όνομα, 'Χωρίς κατηγορία') as Κατηγορία
+               COALESCE(κ.Όνομα, 'Χωρίς κατηγορία') as Κατηγορία,
+               (SELECT COALESCE(SUM(δ.Πλήθος), 0) FROM Διαθεσιμότητα δ
+                WHERE δ.ISBN = τ.ISBN AND δ.Status = 'Διαθέσιμο'{library_scope}) as Διαθέσιμα
             FROM Τεκμήριο τ
             LEFT JOIN Κατηγορία κ ON τ.Κατηγορία = κ.ID_Κατηγορίας
+            WHERE 1=1
         """
-        params = []
-
-        if libraries != "Όλες":
-            query += " JOIN Αντίτυπο a ON τ.ISBN = a.ISBN "
-            query += " JOIN Βιβλιοθήκη b ON a.ID_Βιβλιοθήκης = b.ID_Βιβλιοθήκης "
+        params = list(scope_params)
 
-        query += " WHERE 1=1 "
+        # Φίλτρο βιβλιοθήκης / διαθεσιμότητας
+        if libraries or available_only:
+            status = " AND δ.Status = 'Διαθέσιμο'" if available_only else ""
+            query += f" AND τ.ISBN IN (SELECT δ.ISBN FROM Διαθεσιμότητα δ WHERE 1=1{status}{library_scope})"
+            params.extend(scope_params)
 
-        # Φίλτρο κατηγορίας
+        # Φίλτρο κατηγορίας: η κατηγορία και όλες οι υποκατηγορίες της
         if category != "Όλες":
-            query += " AND κ.Όνομα = ?"
+            query += """ AND τ.Κατηγορία IN (
+                SELECT ι.Απόγονος FROM Κατηγορία_Ιεραρχία ι
+                JOIN Κατηγορία ρίζα ON ρίζα.ID_Κατηγορίας = ι.Πρόγονος
+                WHERE ρίζα.Όνομα = ?)"""
             params.append(category)
 
         # Φίλτρο γλώσσας
@@ -98,18 +1217,21 @@ class LibraryModel:
             query += " AND τ.Γλώσσα = ?"
             params.append(language)
 
-        # Φίλτρο βιβλιοθήκης    
-        if libraries != "Όλες":
-            query += " AND b.Όνομα = ?"
-            params.append(libraries)
-
         # Φίλτρο αναζήτησης
-        if search_term:
+        if ranked is not None:
+            query += " AND τ.ISBN IN (SELECT value FROM json_each(?))"
+            params.append(json.dumps(ranked))
+        elif search_term:
             query += " AND (τ.Τίτλος LIKE ? OR τ.Συγγραφέας LIKE ? OR τ.ISBN LIKE ?)"
             params.extend([f'%{search_term}%', f'%{search_term}%', f'%{search_term}%'])
 
-        query += " ORDER BY τ.Τίτλος LIMIT 100"
-        return self.fetch_all_dict(query, tuple(params))
+        if ranked is not None:
+            # Σειρά ομοιότητας όπως την έδωσε το fuzzy_match_isbns
+            query += " ORDER BY (SELECT key FROM json_each(?) WHERE value = τ.ISBN) LIMIT 100"
+            params.append(json.dumps(ranked))
+        else:
+            query += " ORDER BY τ.Τίτλος LIMIT 100"
+        return self.fetch_all_dict(query, tuple(params), record=BookRecord)
 
     def get_book_details(self, isbn: str):
         """Ανάκτηση πλήρων στοιχείων τεκμηρίου"""
@@ -119,10 +1241,79 @@ class LibraryModel:
             LEFT JOIN Κατηγορία κ ON τ.Κατηγορία = κ.ID_Κατηγορίας
             WHERE τ.ISBN = ?
         """
-        return self.fetch_one_dict(query, (isbn,))
+        return self.fetch_one_dict(query, (isbn,), record=BookRecord)
+
+    def get_book_bundle(self, isbn):
+        """
+        Όλα τα στοιχεία της οθόνης λεπτομερειών τεκμηρίου με ένα ερώτημα:
+        τεκμήριο, διαθέσιμα αντίτυπα και πλήθος ανά βιβλιοθήκη, eBook,
+        μήκος ουράς κρατήσεων και μέση βαθμολογία. Περνά από LRU cache που
+        ακυρώνεται όταν γίνει commit σε κάποιον από τους BOOK_DETAILS_TABLES (και
+        από νήματα παρασκηνίου, γι' αυτό με lock και αριθμό γενιάς όπως η cache μέλους)
+        ή όταν αλλάξει η βάση από άλλη διεργασία (_check_external_changes).
+        Επιστρέφει dict ή None αν δεν υπάρχει το τεκμήριο.
+        """
+        self._check_external_changes()
+        cache = self._book_details_cache
+        key = str(isbn)
+        with self._book_details_lock:
+            if key in cache:
+                cache.move_to_end(key)
+                return cache[key]
+            generation = self._book_details_generation
+
+        query = """
+            SELECT τ.*, κ.Όνομα as Όνομα_Κατηγορίας,
+                   (SELECT json_group_array(json_object(
+                        'ID_Αντιτύπου', α.ID_Αντιτύπου, 'ID_Βιβλιοθήκης', α.ID_Βιβλιοθήκης,
+                        'Βιβλιοθήκη', β.Όνομα, 'Φυσική_Κατάσταση', α.Φυσική_Κατάσταση, 'Status', α.Status))
+                    FROM Αντίτυπο α
+                    JOIN Βιβλιοθήκη β ON α.ID_Βιβλιοθήκης = β.ID_Βιβλιοθήκης
+                    WHERE α.ISBN = τ.ISBN AND α.Status = 'Διαθέσιμο') as Αντίτυπα,
+                   (SELECT MIN(ID_EBook) FROM EBook WHERE ISBN = τ.ISBN) as ID_EBook,
+                   (SELECT COUNT(*) FROM Κράτηση
+                    WHERE ISBN = τ.ISBN AND Κατάσταση = 'Ενεργή' AND ID_Αντιτύπου IS NULL) as Μέγεθος_Ουράς,
+                   (SELECT ROUND(AVG(Βαθμολογία), 1) FROM Αξιολόγηση WHERE ISBN = τ.ISBN) as Μέση_Βαθμολογία,
+                   (SELECT COUNT(*) FROM Αξιολόγηση WHERE ISBN = τ.ISBN) as Αξιολογήσεις
+            FROM Τεκμήριο τ
+            LEFT JOIN Κατηγορία κ ON τ.Κατηγορία = κ.ID_Κατηγορίας
+            WHERE τ.ISBN = ?
+        """
+        row = self.fetch_one_dict(query, (isbn,), record=BookRecord)
+        if not row:
+            return None
+
+        copies = json.loads(row['Αντίτυπα'])
+        bundle = {
+            'Τεκμήριο': row,
+            'Αντίτυπα': copies,
+            'Ανά_Βιβλιοθήκη': dict(Counter(copy['Βιβλιοθήκη'] for copy in copies)),
+            'ID_EBook': row['ID_EBook'],
+            'Μέγεθος_Ουράς': row['Μέγεθος_Ουράς'],
+            'Μέση_Βαθμολογία': row['Μέση_Βαθμολογία'],
+            'Αξιολογήσεις': row['Αξιολογήσεις'],
+        }
+
+        with self._book_details_lock:
+            if generation == self._book_details_generation:
+                cache[key] = bundle
+                if len(cache) > self.BOOK_DETAILS_CACHE_SIZE:
+                    cache.popitem(last=False)
+        return bundle
+
+    def search_books(self, search_term: str, fuzzy: bool = False):
+        """Αναζήτηση βιβλίων (με fuzzy: με ανοχή σε λάθη, κατά σειρά ομοιότητας, αν ο όρος έχει τριγράμματα)"""
+        if fuzzy and term_trigrams(search_term):
+            ranked = self.fuzzy_match_isbns(search_term)
+            query = """
+                SELECT τ.*, κ.Όνομα as Κατηγορία
+                FROM json_each(?) σειρά
+                JOIN Τεκμήριο τ ON τ.ISBN = σειρά.value
+                LEFT JOIN Κατηγορία κ ON τ.Κατηγορία = κ.ID_Κατηγορίας
+                ORDER BY σειρά.key
+            """
+            return self.fetch_all_dict(query, (json.dumps(ranked),), record=BookRecord)
 
-    def search_books(self, search_term: str):
-        """Αναζήτηση βιβλίων"""
         query = """
             SELECT DISTINCT τ.*, κ.Όνομα as Κατηγορία
             FROM Τεκμήριο τ
@@ -132,130 +1323,682 @@ class LibraryModel:
             LIMIT 50
         """
         search_pattern = f'%{search_term}%'
-        return self.fetch_all_dict(query, (search_pattern,) * 3)
+        return self.fetch_all_dict(query, (search_pattern,) * 3, record=BookRecord)
+
+    # Όρια αναζήτησης με ανοχή σε λάθη: υποψήφιοι από το ευρετήριο, εγγραφές ευρετηρίου
+    # που διαβάζονται για την κατάταξη τους, ελάχιστη ομοιότητα αποτελέσματος
+    FUZZY_CANDIDATE_BUDGET = 200
+    FUZZY_POSTINGS_BUDGET = 1000
+    FUZZY_MIN_SIMILARITY = 0.3
 
-    def get_available_copies(self, isbn: str, library_id: int = None):
-        """Βρες διαθέσιμα αντίτυπα ενός βιβλίου"""
+    def fuzzy_match_isbns(self, search_term: str, limit: int = 50):
+        """
+        ISBN τεκμηρίων με τίτλο/συγγραφέα κοντά στον όρο, παρά τα ορθογραφικά λάθη.
+        Από τα τριγράμματα του όρου χρησιμοποιούνται τα σπανιότερα, έως FUZZY_POSTINGS_BUDGET
+        εγγραφές ευρετηρίου, ώστε το κόστος να μη μεγαλώνει με τον κατάλογο. Οι υποψήφιοι
+        (έως FUZZY_CANDIDATE_BUDGET) βαθμολογούνται με την ομοιότητα τριγραμμάτων λέξεων
+        του όρου με τον τίτλο ή τον συγγραφέα. Επιστρέφει λίστα ISBN κατά φθίνουσα ομοιότητα.
+        """
+        wanted = word_trigrams(search_term)
+        grams = term_trigrams(search_term)
+        if not grams:
+            return []
+
+        frequencies = self.fetch_all_dict(
+            "SELECT term, doc FROM Τεκμήριο_Τριγράμματα_Συχνότητα WHERE term IN (SELECT value FROM json_each(?))",
+            (json.dumps(sorted(grams), ensure_ascii=False),))
+
+        chosen, postings = [], 0
+        for row in sorted(frequencies, key=itemgetter('doc')):
+            if chosen and postings + row['doc'] > self.FUZZY_POSTINGS_BUDGET:
+                break
+            chosen.append(f'"{row["term"]}"')
+            postings += row['doc']
+        if not chosen:
+            return []
+
+        # Αν και το σπανιότερο τρίγραμμα ξεπερνά το όριο, οι υποψήφιοι διαβάζονται χωρίς κατάταξη
+        order = "ORDER BY rank" if postings <= self.FUZZY_POSTINGS_BUDGET else ""
+        candidates = self.fetch_all_dict(f"""
+            SELECT rowid as ISBN, Τίτλος, Συγγραφέας FROM Τεκμήριο_Τριγράμματα
+            WHERE Τεκμήριο_Τριγράμματα MATCH ?
+            {order}
+            LIMIT ?
+        """, (" OR ".join(chosen), self.FUZZY_CANDIDATE_BUDGET))
+
+        scored = []
+        for candidate in candidates:
+            # Ποσοστό των τριγραμμάτων του όρου που υπάρχουν στο πεδίο, με μικρή ποινή για το μήκος του
+            score = 0.0
+            for field in (candidate['Τίτλος'], candidate['Συγγραφέας']):
+                grams = word_trigrams(field)
+                if grams:
+                    common = len(wanted & grams)
+                    score = max(score, common / len(wanted) - 0.1 * (1 - common / len(grams)))
+            if score >= self.FUZZY_MIN_SIMILARITY:
+                scored.append((score, candidate['ISBN']))
+
+        scored.sort(key=lambda pair: -pair[0])
+        return [isbn for _, isbn in scored[:limit]]
+
+    def get_available_copies(self, isbn: str, library_id: int = None, held_for: int = None):
+        """Βρες διαθέσιμα αντίτυπα ενός βιβλίου (και όσα είναι δεσμευμένα για το μέλος held_for)"""
         query = """
             SELECT α.*, β.Όνομα as Βιβλιοθήκη
             FROM Αντίτυπο α
             JOIN Βιβλιοθήκη β ON α.ID_Βιβλιοθήκης = β.ID_Βιβλιοθήκης
-            WHERE α.ISBN = ? AND α.Status = 'Διαθέσιμο'
+            WHERE α.ISBN = ?
         """
         params = [isbn]
 
+        if held_for:
+            query += """ AND (α.Status = 'Διαθέσιμο' OR EXISTS (
+                SELECT 1 FROM Κράτηση κ
+                WHERE κ.ID_Αντιτύπου = α.ID_Αντιτύπου AND κ.Κατάσταση = 'Ενεργή' AND κ.ID_Μέλους = ?))"""
+            params.append(held_for)
+        else:
+            query += " AND α.Status = 'Διαθέσιμο'"
+
         if library_id:
             query += " AND α.ID_Βιβλιοθήκης = ?"
             params.append(library_id)
-        return self.fetch_all_dict(query, params)
+        return self.fetch_all_dict(query, params, record=CopyRecord)
 
     def check_ebook_availability(self, isbn: str):
         """Έλεγχος αν υπάρχει EBook για το ISBN"""
         result = self.fetch_one_dict("SELECT ID_EBook FROM EBook WHERE ISBN = ?", (isbn,))
         return result['ID_EBook'] if result else None
 
+    # ==================== ΑΔΕΙΕΣ EBOOK ==================== #
+    # Κάθε EBook έχει Θέσεις ταυτόχρονων δανεισμών και Όριο_Δανεισμών για όλη τη διάρκεια της
+    # άδειας (NULL = χωρίς όριο). Μια θέση αποκτάται με ένα INSERT που ελέγχει τους μετρητές
+    # της γραμμής EBook, μέσα σε BEGIN IMMEDIATE, άρα δύο αιτήματα δεν παίρνουν την ίδια θέση.
+    # Όταν ελευθερώνεται θέση (λήξη ή επιστροφή) δίνεται στην κεφαλή της λίστας αναμονής.
+
+    # Διάρκεια δανεισμού EBook - στη λήξη η θέση ελευθερώνεται αυτόματα
+    EBOOK_LOAN_DAYS = 21
+
+    # Το eBook έχει ελεύθερη θέση και η άδεια δεν έχει εξαντληθεί
+    EBOOK_SEAT_FREE_SQL = """
+        (e.Θέσεις IS NULL OR e.Ενεργοί < e.Θέσεις) AND (e.Όριο_Δανεισμών IS NULL OR e.Χρήσεις < e.Όριο_Δανεισμών)
+    """
+
     def create_ebook_loan(self, member_id: int, ebook_id: int):
-        """Δημιουργία δανεισμού EBook"""
-        existing = self.fetch_one_dict(
-            """SELECT ID_Δανεισμού FROM Δανεισμός WHERE ID_Μέλους=? AND ID_EBook=? AND Κατάσταση='Ενεργός'""",
-            (member_id, ebook_id)
-        )
-        if existing:
-            return (False, "Έχετε ήδη δανειστεί αυτό το EBook!")
+        """Δημιουργία δανεισμού EBook - έλεγχοι και απόκτηση θέσης της άδειας σε ένα transaction"""
+        conn = self.get_connection()
+        cursor = conn.cursor()
+
+        try:
+            cursor.execute("BEGIN IMMEDIATE")
+            success, message = self._create_ebook_loan(cursor, member_id, ebook_id)
+            if success:
+                conn.commit()
+            else:
+                conn.rollback()
+            conn.close()
+            return success, message
+
+        except Exception as e:
+            conn.rollback()
+            conn.close()
+            return False, f"Σφάλμα: {str(e)}"
+
+    def _create_ebook_loan(self, cursor, member_id: int, ebook_id: int):
+        """Μέσα στο transaction του καλούντος: έλεγχοι μέλους/άδειας και απόκτηση θέσης. Επιστρέφει (bool, μήνυμα)."""
         start_date = datetime.now().strftime('%Y-%m-%d')
-        end_date = (datetime.now() + timedelta(days=21)).strftime('%Y-%m-%d')
-        
-        success, msg = self.execute_with_commit(
-            "INSERT INTO Δανεισμός (ID_Μέλους, ID_Αντιτύπου, ID_EBook, Κατάσταση, Ημερομηνία_Έναρξης, Ημερομηνία_Λήξης) VALUES (?, NULL, ?, 'Ενεργός', ?, ?)",
-            (member_id, ebook_id, start_date, end_date))
-        
-        return (True, f"Δανεισμός EBook επιτυχής! Λήξη: {end_date}") if success else (False, msg)
+        end_date = (datetime.now() + timedelta(days=self.EBOOK_LOAN_DAYS)).strftime('%Y-%m-%d')
+
+        cursor.execute("""
+            SELECT e.*,
+                   (SELECT COALESCE(MAX(Οφειλή), 0) FROM Υπόλοιπο_Προστίμων WHERE ID_Μέλους = ?) as Οφειλή,
+                   EXISTS (SELECT 1 FROM Δανεισμός
+                           WHERE ID_Μέλους = ? AND ID_EBook = e.ID_EBook
+                           AND Κατάσταση IN ('Ενεργός', 'Εκπρόθεσμος')) as Έχει_Δανειστεί
+            FROM EBook e WHERE e.ID_EBook = ?
+        """, (member_id, member_id, ebook_id))
+        ebook = cursor.fetchone()
+
+        if not ebook:
+            return False, "Το EBook δεν υπάρχει"
+        if ebook['Έχει_Δανειστεί']:
+            return False, "Έχετε ήδη δανειστεί αυτό το EBook!"
+        if ebook['Οφειλή'] > self.FINE_CEILING:
+            return False, f"Έχετε εκκρεμή πρόστιμα {ebook['Οφειλή']:.2f}€ - εξοφλήστε τα για νέο δανεισμό"
+
+        cursor.execute(f"""
+            INSERT INTO Δανεισμός (ID_Μέλους, ID_Αντιτύπου, ID_EBook, Κατάσταση, Ημερομηνία_Έναρξης, Ημερομηνία_Λήξης)
+            SELECT ?, NULL, e.ID_EBook, 'Ενεργός', ?, ?
+            FROM EBook e
+            WHERE e.ID_EBook = ? AND {self.EBOOK_SEAT_FREE_SQL}
+        """, (member_id, start_date, end_date, ebook_id))
+        if cursor.rowcount:
+            return True, f"Δανεισμός EBook επιτυχής! Λήξη: {end_date}"
+
+        if ebook['Όριο_Δανεισμών'] is not None and ebook['Χρήσεις'] >= ebook['Όριο_Δανεισμών']:
+            return False, "Η άδεια του EBook έχει εξαντλήσει τους δανεισμούς της"
+        return False, f"Όλες οι άδειες του EBook ({ebook['Θέσεις']}) είναι σε χρήση"
+
+    def get_ebook_licence(self, ebook_id: int):
+        """Κατάσταση άδειας EBook: θέσεις, μετρητές, ελεύθερες θέσεις (None = χωρίς όριο) και μήκος λίστας αναμονής"""
+        query = """
+            SELECT e.*,
+                   e.Θέσεις - e.Ενεργοί as Ελεύθερες,
+                   COALESCE(e.Χρήσεις >= e.Όριο_Δανεισμών, 0) as Εξαντλημένη,
+                   (SELECT COUNT(*) FROM Αναμονή_EBook α
+                    WHERE α.ID_EBook = e.ID_EBook AND α.Κατάσταση = 'Ενεργή') as Αναμονή
+            FROM EBook e WHERE e.ID_EBook = ?
+        """
+        return self.fetch_one_dict(query, (ebook_id,))
 
-    def create_reservation(self, member_id: int, isbn: str):
-        """Δημιουργία κράτησης βιβλίου"""
-        
-        # Έλεγχος αν υπάρχει ήδη ενεργή κράτηση
-        existing = self.fetch_one_dict(
-            "SELECT ID_Κράτησης FROM Κράτηση WHERE ID_Μέλους = ? AND ISBN = ? AND Κατάσταση = 'Ενεργή'",
-            (member_id, isbn)
-        )
-        if existing:
-            return False, "Υπάρχει ήδη ενεργή κράτηση για αυτό το βιβλίο"
-        
-        # Βρες την προτεραιότητα
-        priority_result = self.fetch_one_dict(
-            "SELECT COALESCE(MAX(Προτεραιότητα), 0) + 1 as next_priority FROM Κράτηση WHERE ISBN = ? AND Κατάσταση = 'Ενεργή'",
-            (isbn,)
-        )
-        priority = priority_result['next_priority']
-        
-        # Δημιουργία κράτησης
+    def set_ebook_licence(self, ebook_id: int, seats: int = None, max_loans: int = None):
+        """Ορισμός θέσεων/ορίου δανεισμών της άδειας - οι νέες θέσεις δίνονται αμέσως στη λίστα αναμονής"""
         today = datetime.now().strftime('%Y-%m-%d')
-        success, message = self.execute_with_commit(
-            "INSERT INTO Κράτηση (ID_Μέλους, ISBN, Κατάσταση, Προτεραιότητα, Ημερομηνία_Κράτησης) VALUES (?, ?, 'Ενεργή', ?, ?)",
-            (member_id, isbn, priority, today)
+        conn = self.get_connection()
+        cursor = conn.cursor()
+
+        try:
+            cursor.execute("BEGIN IMMEDIATE")
+            cursor.execute("UPDATE EBook SET Θέσεις = ?, Όριο_Δανεισμών = ? WHERE ID_EBook = ?",
+                           (seats, max_loans, ebook_id))
+            if cursor.rowcount == 0:
+                conn.rollback()
+                conn.close()
+                return False, "Το EBook δεν υπάρχει"
+
+            served = self._serve_ebook_waitlist(cursor, ebook_id, today)
+            conn.commit()
+            conn.close()
+            return True, f"Η άδεια ενημερώθηκε ({served} δανεισμοί από τη λίστα αναμονής)"
+
+        except Exception as e:
+            conn.rollback()
+            conn.close()
+            return False, f"Σφάλμα: {str(e)}"
+
+    def join_ebook_waitlist(self, member_id: int, ebook_id: int):
+        """
+        Εγγραφή στη λίστα αναμονής ενός EBook - επιστρέφει (bool, μήνυμα με τη θέση). Οι έλεγχοι
+        γίνονται στο ίδιο BEGIN IMMEDIATE με την εγγραφή· αν στο μεταξύ ελευθερώθηκε θέση, το
+        EBook δανείζεται απευθείας αντί για αναμονή.
+        """
+        today = datetime.now().strftime('%Y-%m-%d')
+        conn = self.get_connection()
+        cursor = conn.cursor()
+
+        try:
+            cursor.execute("BEGIN IMMEDIATE")
+            cursor.execute(f"""
+                SELECT {self.EBOOK_SEAT_FREE_SQL} as Ελεύθερη,
+                       COALESCE(e.Χρήσεις >= e.Όριο_Δανεισμών, 0) as Εξαντλημένη,
+                       EXISTS (SELECT 1 FROM Δανεισμός
+                               WHERE ID_Μέλους = ? AND ID_EBook = e.ID_EBook
+                               AND Κατάσταση IN ('Ενεργός', 'Εκπρόθεσμος')) as Έχει_Δανειστεί,
+                       EXISTS (SELECT 1 FROM Αναμονή_EBook
+                               WHERE ID_Μέλους = ? AND ID_EBook = e.ID_EBook AND Κατάσταση = 'Ενεργή') as Σε_Αναμονή
+                FROM EBook e WHERE e.ID_EBook = ?
+            """, (member_id, member_id, ebook_id))
+            ebook = cursor.fetchone()
+
+            if not ebook:
+                message = "Το EBook δεν υπάρχει"
+            elif ebook['Έχει_Δανειστεί']:
+                message = "Έχετε ήδη δανειστεί αυτό το EBook!"
+            elif ebook['Σε_Αναμονή']:
+                message = "Είστε ήδη στη λίστα αναμονής για αυτό το EBook"
+            elif ebook['Εξαντλημένη']:
+                message = "Η άδεια του EBook έχει εξαντλήσει τους δανεισμούς της"
+            elif ebook['Ελεύθερη']:
+                success, message = self._create_ebook_loan(cursor, member_id, ebook_id)
+                if success:
+                    conn.commit()
+                    conn.close()
+                    return True, f"Υπάρχει ελεύθερη άδεια - {message}"
+            else:
+                cursor.execute("""
+                    INSERT INTO Αναμονή_EBook (ID_EBook, ID_Μέλους, Ημερομηνία_Αίτησης)
+                    VALUES (?, ?, ?)
+                """, (ebook_id, member_id, today))
+                waitlist_id = cursor.lastrowid
+                cursor.execute("""
+                    SELECT COUNT(*) FROM Αναμονή_EBook
+                    WHERE ID_EBook = ? AND Κατάσταση = 'Ενεργή' AND ID_Αναμονής <= ?
+                """, (ebook_id, waitlist_id))
+                position = cursor.fetchone()[0]
+                conn.commit()
+                conn.close()
+                return True, f"Μπήκατε στη λίστα αναμονής - θέση {position}. Ο δανεισμός θα γίνει αυτόματα μόλις ελευθερωθεί άδεια."
+
+            conn.rollback()
+            conn.close()
+            return False, message
+
+        except Exception as e:
+            conn.rollback()
+            conn.close()
+            return False, f"Σφάλμα: {str(e)}"
+
+    def leave_ebook_waitlist(self, member_id: int, ebook_id: int):
+        """Αποχώρηση από τη λίστα αναμονής ενός EBook"""
+        return self.execute_with_commit(
+            "UPDATE Αναμονή_EBook SET Κατάσταση = 'Ακυρωμένη' WHERE ID_Μέλους = ? AND ID_EBook = ? AND Κατάσταση = 'Ενεργή'",
+            (member_id, ebook_id))
+
+    def _serve_ebook_waitlist(self, cursor, ebook_id: int, today: str):
+        """
+        Μέσα στο transaction του καλούντος: δανεισμός του EBook στις κεφαλές της λίστας αναμονής
+        όσο υπάρχουν ελεύθερες θέσεις. Μέλη με οφειλή πάνω από FINE_CEILING παρακάμπτονται και
+        κρατούν τη θέση τους μέχρι να εξοφλήσουν. Επιστρέφει το πλήθος των δανεισμών.
+        """
+        end_date = (datetime.strptime(today, '%Y-%m-%d') + timedelta(days=self.EBOOK_LOAN_DAYS)).strftime('%Y-%m-%d')
+        served = 0
+
+        while True:
+            cursor.execute(f"""
+                SELECT α.ID_Αναμονής, α.ID_Μέλους
+                FROM Αναμονή_EBook α
+                JOIN EBook e ON e.ID_EBook = α.ID_EBook
+                WHERE α.ID_EBook = ? AND α.Κατάσταση = 'Ενεργή' AND {self.EBOOK_SEAT_FREE_SQL}
+                AND NOT EXISTS (SELECT 1 FROM Υπόλοιπο_Προστίμων υ
+                                WHERE υ.ID_Μέλους = α.ID_Μέλους AND υ.Οφειλή > ?)
+                ORDER BY α.ID_Αναμονής
+                LIMIT 1
+            """, (ebook_id, self.FINE_CEILING))
+            head = cursor.fetchone()
+            if not head:
+                return served
+
+            cursor.execute("""
+                INSERT INTO Δανεισμός (ID_Μέλους, ID_Αντιτύπου, ID_EBook, Κατάσταση, Ημερομηνία_Έναρξης, Ημερομηνία_Λήξης)
+                SELECT ?, NULL, ?, 'Ενεργός', ?, ?
+                WHERE NOT EXISTS (SELECT 1 FROM Δανεισμός
+                                  WHERE ID_Μέλους = ? AND ID_EBook = ? AND Κατάσταση IN ('Ενεργός', 'Εκπρόθεσμος'))
+            """, (head['ID_Μέλους'], ebook_id, today, end_date, head['ID_Μέλους'], ebook_id))
+            served += cursor.rowcount
+            cursor.execute("UPDATE Αναμονή_EBook SET Κατάσταση = 'Εξυπηρετήθηκε' WHERE ID_Αναμονής = ?",
+                           (head['ID_Αναμονής'],))
+
+    def expire_ebook_loans(self, today: str = None):
+        """
+        Μαζική λήξη δανεισμών EBook με Ημερομηνία_Λήξης πριν από σήμερα (μερικό ευρετήριο
+        idx_Δανεισμός_EBook_Λήξη): οι θέσεις ελευθερώνονται και δίνονται στις λίστες αναμονής.
+        Εξυπηρετούνται όλες οι λίστες, ώστε και όσοι παρακάμφθηκαν για πρόστιμα να πάρουν
+        ελεύθερη θέση αφού εξοφλήσουν. Επιστρέφει (True, πλήθος ληγμένων) ή (False, μήνυμα).
+        """
+        today = today or datetime.now().strftime('%Y-%m-%d')
+        conn = self.get_connection()
+        cursor = conn.cursor()
+
+        try:
+            cursor.execute("BEGIN IMMEDIATE")
+            cursor.execute("""
+                UPDATE Δανεισμός SET Κατάσταση = 'Ολοκληρωμένος', Ημερομηνία_Επιστροφής = Ημερομηνία_Λήξης
+                WHERE ID_EBook IS NOT NULL AND Κατάσταση IN ('Ενεργός', 'Εκπρόθεσμος') AND Ημερομηνία_Λήξης < ?
+            """, (today,))
+            expired = cursor.rowcount
+
+            cursor.execute("SELECT DISTINCT ID_EBook FROM Αναμονή_EBook WHERE Κατάσταση = 'Ενεργή'")
+            ebook_ids = [row['ID_EBook'] for row in cursor.fetchall()]
+
+            for ebook_id in ebook_ids:
+                self._serve_ebook_waitlist(cursor, ebook_id, today)
+
+            conn.commit()
+            conn.close()
+            return True, expired
+
+        except Exception as e:
+            conn.rollback()
+            conn.close()
+            return False, f"Σφάλμα: {str(e)}"
+
+    # ==================== ΟΥΡΑ ΚΡΑΤΗΣΕΩΝ ==================== #
+    # Το Προτεραιότητα είναι αύξων αριθμός σειράς ανά ISBN που δεν αλλάζει ποτέ.
+    # Η θέση στην ουρά = πλήθος ενεργών κρατήσεων του ISBN με αριθμό <= του δικού της,
+    # μέτρηση πάνω στο μερικό ευρετήριο idx_Κράτηση_Ουρά. Καμία ενέργεια δεν αναριθμεί την ουρά.
+    # Κράτηση με ID_Αντιτύπου έχει δεσμευμένο αντίτυπο που περιμένει παραλαβή έως Λήξη_Παραλαβής.
+
+    # Ημέρες που μένει δεσμευμένο ένα επιστραμμένο αντίτυπο για το μέλος της κράτησης
+    HOLD_PICKUP_DAYS = 7
+
+    # Κρατήσεις σε αναμονή παλαιότερες από τόσες ημέρες λήγουν
+    RESERVATION_MAX_AGE_DAYS = 365
+
+    QUEUE_POSITION_SQL = """
+        (SELECT COUNT(*) FROM Κράτηση ουρά
+         WHERE ουρά.ISBN = {r}.ISBN AND ουρά.Κατάσταση = 'Ενεργή'
+         AND ουρά.Προτεραιότητα <= {r}.Προτεραιότητα)
+    """
+
+    def get_queue_head(self, isbn: str):
+        """Πρώτη κράτηση του ISBN που περιμένει αντίτυπο (ή None) μαζί με το πλήθος των αναμονών"""
+        query = """
+            SELECT κ.*, μ.Όνομα || ' ' || μ.Επώνυμο as Μέλος,
+                   (SELECT COUNT(*) FROM Κράτηση ουρά
+                    WHERE ουρά.ISBN = κ.ISBN AND ουρά.Κατάσταση = 'Ενεργή' AND ουρά.ID_Αντιτύπου IS NULL) as Μέγεθος_Ουράς
+            FROM Κράτηση κ
+            JOIN Μέλος μ ON κ.ID_Μέλους = μ.ID_Μέλους
+            WHERE κ.ISBN = ? AND κ.Κατάσταση = 'Ενεργή' AND κ.ID_Αντιτύπου IS NULL
+            ORDER BY κ.Προτεραιότητα
+            LIMIT 1
+        """
+        return self.fetch_one_dict(query, (isbn,), record=ReservationRecord)
+
+    def get_copy_hold(self, copy_id: int):
+        """Ενεργή δέσμευση ενός αντιτύπου (ή None)"""
+        return self.fetch_one_dict(
+            "SELECT * FROM Κράτηση WHERE ID_Αντιτύπου = ? AND Κατάσταση = 'Ενεργή'",
+            (copy_id,), record=ReservationRecord
         )
-        
-        return (True, f"Κράτηση δημιουργήθηκε με προτεραιότητα {priority}") if success else (False, message)
 
-    def cancel_reservation(self, reservation_id: int):
-        """Ακύρωση κράτησης"""
-        # Έλεγχος αν υπάρχει η κράτηση
-        result = self.fetch_one_dict(
-            "SELECT Κατάσταση FROM Κράτηση WHERE ID_Κράτησης = ?",
-            (reservation_id,)
+    def get_reservation_context(self, isbns):
+        """
+        Ενεργές κρατήσεις πολλών ISBN με ένα ερώτημα, για cache της φόρμας δανεισμού.
+        Επιστρέφει (πρώτη αναμονή ανά ISBN, δέσμευση ανά ID_Αντιτύπου), με τα ίδια
+        πεδία που δίνουν τα get_queue_head και get_copy_hold. Το Τεκμήριο.ISBN είναι INTEGER
+        και το Κράτηση.ISBN TEXT, οπότε τα ISBN συγκρίνονται και επιστρέφονται ως str.
+        """
+        rows = self.fetch_all_dict("""
+            SELECT κ.*, μ.Όνομα || ' ' || μ.Επώνυμο as Μέλος,
+                   COUNT(*) FILTER (WHERE κ.ID_Αντιτύπου IS NULL) OVER (PARTITION BY κ.ISBN) as Μέγεθος_Ουράς
+            FROM Κράτηση κ
+            JOIN Μέλος μ ON κ.ID_Μέλους = μ.ID_Μέλους
+            WHERE κ.ISBN IN (SELECT CAST(value AS TEXT) FROM json_each(?)) AND κ.Κατάσταση = 'Ενεργή'
+            ORDER BY κ.ISBN, κ.Προτεραιότητα
+        """, (json.dumps(list(isbns)),), record=ReservationRecord)
+
+        heads, holds = {}, {}
+        for row in rows:
+            if row['ID_Αντιτύπου'] is not None:
+                holds[row['ID_Αντιτύπου']] = row
+            elif str(row['ISBN']) not in heads:
+                heads[str(row['ISBN'])] = row
+        return heads, holds
+
+    def _assign_copy(self, cursor, copy_id: int, isbn: str, today: str):
+        """
+        Δίνει ένα αντίτυπο που ελευθερώθηκε στην πρώτη κράτηση σε αναμονή (Κρατημένο)
+        ή το κάνει Διαθέσιμο. Τρέχει μέσα στο transaction του καλούντος.
+        Επιστρέφει το ID_Μέλους της δέσμευσης ή None.
+        """
+        cursor.execute("""
+            SELECT ID_Κράτησης, ID_Μέλους FROM Κράτηση
+            WHERE ISBN = ? AND Κατάσταση = 'Ενεργή' AND ID_Αντιτύπου IS NULL
+            ORDER BY Προτεραιότητα
+            LIMIT 1
+        """, (isbn,))
+        head = cursor.fetchone()
+
+        if not head:
+            cursor.execute("UPDATE Αντίτυπο SET Status = 'Διαθέσιμο' WHERE ID_Αντιτύπου = ?", (copy_id,))
+            return None
+
+        pickup_until = (datetime.strptime(today, '%Y-%m-%d') + timedelta(days=self.HOLD_PICKUP_DAYS)).strftime('%Y-%m-%d')
+        cursor.execute(
+            "UPDATE Κράτηση SET ID_Αντιτύπου = ?, Λήξη_Παραλαβής = ? WHERE ID_Κράτησης = ?",
+            (copy_id, pickup_until, head['ID_Κράτησης'])
         )
-        
-        if not result:
-            return False, "Η κράτηση δεν βρέθηκε"
-        
-        if result['Κατάσταση'] != 'Ενεργή':
-            return False, f"Η κράτηση είναι ήδη {result['Κατάσταση']}"
-        
-        # Ακύρωση κράτησης
-        success, _ = self.execute_with_commit(
-            "UPDATE Κράτηση SET Κατάσταση = 'Ακυρωμένη' WHERE ID_Κράτησης = ?",
+        cursor.execute("UPDATE Αντίτυπο SET Status = 'Κρατημένο' WHERE ID_Αντιτύπου = ?", (copy_id,))
+        return head['ID_Μέλους']
+
+    def expire_holds(self, today: str = None):
+        """
+        Λήξη δεσμεύσεων που δεν παραλήφθηκαν, με εντολές συνόλου σε ένα transaction: ένα UPDATE
+        κάνει τις κρατήσεις Ληγμένη, ένα δεύτερο δίνει τα αντίτυπα που ελευθερώθηκαν στις επόμενες
+        κρατήσεις της ουράς (το ν-οστό αντίτυπο ενός ISBN στη ν-οστή αναμονή, με ROW_NUMBER) και
+        ένα τρίτο κάνει τα αντίτυπα Κρατημένα ή Διαθέσιμα. Επιστρέφει (True, πλήθος ληγμένων) ή (False, μήνυμα).
+        """
+        today = today or datetime.now().strftime('%Y-%m-%d')
+        pickup_until = (datetime.strptime(today, '%Y-%m-%d') + timedelta(days=self.HOLD_PICKUP_DAYS)).strftime('%Y-%m-%d')
+        conn = self.get_connection()
+        cursor = conn.cursor()
+
+        try:
+            cursor.execute("BEGIN IMMEDIATE")
+            cursor.execute("""
+                UPDATE Κράτηση SET Κατάσταση = 'Ληγμένη'
+                WHERE Κατάσταση = 'Ενεργή' AND ID_Αντιτύπου IS NOT NULL AND Λήξη_Παραλαβής < ?
+                RETURNING ISBN, ID_Αντιτύπου, Λήξη_Παραλαβής
+            """, (today,))
+            holds = cursor.fetchall()
+            freed = json.dumps([list(hold) for hold in holds])
+
+            cursor.execute("""
+                WITH Ελεύθερα AS (
+                    SELECT ISBN, ID_Αντιτύπου,
+                           ROW_NUMBER() OVER (PARTITION BY ISBN ORDER BY Λήξη_Παραλαβής, ID_Αντιτύπου) as Σειρά
+                    FROM (SELECT json_extract(value, '$[0]') as ISBN, json_extract(value, '$[1]') as ID_Αντιτύπου,
+                                 json_extract(value, '$[2]') as Λήξη_Παραλαβής
+                          FROM json_each(?))
+                ),
+                Αναμονές AS (
+                    SELECT ID_Κράτησης, ISBN,
+                           ROW_NUMBER() OVER (PARTITION BY ISBN ORDER BY Προτεραιότητα) as Σειρά
+                    FROM Κράτηση
+                    WHERE Κατάσταση = 'Ενεργή' AND ID_Αντιτύπου IS NULL
+                    AND ISBN IN (SELECT ISBN FROM Ελεύθερα)
+                )
+                UPDATE Κράτηση SET ID_Αντιτύπου = ε.ID_Αντιτύπου, Λήξη_Παραλαβής = ?
+                FROM Ελεύθερα ε
+                JOIN Αναμονές α ON α.ISBN = ε.ISBN AND α.Σειρά = ε.Σειρά
+                WHERE Κράτηση.ID_Κράτησης = α.ID_Κράτησης
+            """, (freed, pickup_until))
+
+            cursor.execute("""
+                UPDATE Αντίτυπο
+                SET Status = CASE WHEN EXISTS (SELECT 1 FROM Κράτηση κ
+                                               WHERE κ.ID_Αντιτύπου = Αντίτυπο.ID_Αντιτύπου AND κ.Κατάσταση = 'Ενεργή')
+                                  THEN 'Κρατημένο' ELSE 'Διαθέσιμο' END
+                WHERE ID_Αντιτύπου IN (SELECT json_extract(value, '$[1]') FROM json_each(?))
+            """, (freed,))
+
+            conn.commit()
+            conn.close()
+            return True, len(holds)
+
+        except Exception as e:
+            conn.rollback()
+            conn.close()
+            return False, f"Σφάλμα: {str(e)}"
+
+    def get_queue_position(self, reservation_id: int):
+        """Θέση ενεργής κράτησης στην ουρά (None αν δεν είναι ενεργή)"""
+        result = self.fetch_one_dict(
+            f"SELECT {self.QUEUE_POSITION_SQL.format(r='κ')} as Θέση FROM Κράτηση κ WHERE κ.ID_Κράτησης = ? AND κ.Κατάσταση = 'Ενεργή'",
             (reservation_id,)
         )
-        
-        return (True, "Η κράτηση ακυρώθηκε επιτυχώς") if success else (False, "Σφάλμα κατά την ακύρωση")
+        return result['Θέση'] if result else None
 
-    def get_member_loans(self, member_id: int):
-        """Ανάκτηση δανεισμών μέλους"""
-        """Ανάκτηση δανεισμών μέλους"""
+    def expire_reservations(self, max_age_days: int = None, batch_size: int = 500, today: str = None):
+        """
+        Μαζική λήξη κρατήσεων σε αναμονή με βάση την ηλικία τους, σε transactions των batch_size εγγραφών.
+        Η ουρά δεν χρειάζεται συμπύκνωση αφού η θέση υπολογίζεται κατά την ανάγνωση.
+        Επιστρέφει (True, πλήθος ληγμένων) ή (False, μήνυμα).
+        """
+        today = datetime.strptime(today, '%Y-%m-%d') if today else datetime.now()
+        cutoff = (today - timedelta(days=max_age_days or self.RESERVATION_MAX_AGE_DAYS)).strftime('%Y-%m-%d')
+
+        conn = self.get_connection()
+        cursor = conn.cursor()
+        expired = 0
+
+        try:
+            while True:
+                cursor.execute("""
+                    UPDATE Κράτηση SET Κατάσταση = 'Ληγμένη'
+                    WHERE ID_Κράτησης IN (
+                        SELECT ID_Κράτησης FROM Κράτηση
+                        WHERE Κατάσταση = 'Ενεργή' AND ID_Αντιτύπου IS NULL AND Ημερομηνία_Κράτησης < ?
+                        LIMIT ?
+                    )
+                """, (cutoff, batch_size))
+                conn.commit()
+                expired += cursor.rowcount
+
+                if cursor.rowcount < batch_size:
+                    break
+
+            conn.close()
+            return True, expired
+
+        except Exception as e:
+            conn.rollback()
+            conn.close()
+            return False, f"Σφάλμα: {str(e)}"
+
+    def run_reservation_maintenance(self):
+        """Εργασία συντήρησης: λήξη δεσμεύσεων, παλιών κρατήσεων και δανεισμών EBook, καθαρισμός του ημερολογίου αλλαγών αναζήτησης. Επιστρέφει μήνυμα αναφοράς."""
+        holds_ok, holds = self.expire_holds()
+        reservations_ok, reservations = self.expire_reservations()
+        ebooks_ok, ebooks = self.expire_ebook_loans()
+        changes_ok, changes = self.prune_search_changes()
+
+        for ok, result in ((holds_ok, holds), (reservations_ok, reservations), (ebooks_ok, ebooks), (changes_ok, changes)):
+            if not ok:
+                return False, result
+        return True, (f"Ληγμένες δεσμεύσεις: {holds}, ληγμένες κρατήσεις: {reservations}, "
+                      f"ληγμένοι δανεισμοί EBook: {ebooks}, παλιές αλλαγές αναζήτησης: {changes}")
+
+    def create_reservation(self, member_id: int, isbn: str):
+        """Δημιουργία κράτησης βιβλίου - μία εγγραφή στο τέλος της ουράς"""
+        today = datetime.now().strftime('%Y-%m-%d')
+
+        # Ο αριθμός σειράς και ο έλεγχος διπλής κράτησης στην ίδια εντολή, άρα χωρίς race
+        conn = self.get_connection()
+        cursor = conn.cursor()
+
+        try:
+            cursor.execute("""
+                INSERT INTO Κράτηση (ID_Μέλους, ISBN, Κατάσταση, Προτεραιότητα, Ημερομηνία_Κράτησης)
+                SELECT ?, ?, 'Ενεργή', COALESCE(MAX(Προτεραιότητα), 0) + 1, ?
+                FROM Κράτηση WHERE ISBN = ?
+                HAVING NOT EXISTS (
+                    SELECT 1 FROM Κράτηση
+                    WHERE ID_Μέλους = ? AND ISBN = ? AND Κατάσταση = 'Ενεργή'
+                )
+            """, (member_id, isbn, today, isbn, member_id, isbn))
+            reservation_id = cursor.lastrowid if cursor.rowcount else None
+            conn.commit()
+            conn.close()
+        except Exception as e:
+            conn.rollback()
+            conn.close()
+            return False, f"Σφάλμα: {str(e)}"
+
+        if reservation_id is None:
+            return False, "Υπάρχει ήδη ενεργή κράτηση για αυτό το βιβλίο"
+
+        return True, f"Κράτηση δημιουργήθηκε - θέση στην ουρά: {self.get_queue_position(reservation_id)}"
+
+    def cancel_reservation(self, reservation_id: int):
+        """Ακύρωση κράτησης - οι επόμενες ανεβαίνουν αυτόματα αφού η θέση υπολογίζεται"""
+        conn = self.get_connection()
+        cursor = conn.cursor()
+
+        try:
+            cursor.execute(
+                "SELECT Κατάσταση, ISBN, ID_Αντιτύπου FROM Κράτηση WHERE ID_Κράτησης = ?",
+                (reservation_id,)
+            )
+            result = cursor.fetchone()
+
+            if not result:
+                conn.close()
+                return False, "Η κράτηση δεν βρέθηκε"
+
+            if result['Κατάσταση'] != 'Ενεργή':
+                conn.close()
+                return False, f"Η κράτηση είναι ήδη {result['Κατάσταση']}"
+
+            cursor.execute(
+                "UPDATE Κράτηση SET Κατάσταση = 'Ακυρωμένη' WHERE ID_Κράτησης = ?",
+                (reservation_id,)
+            )
+
+            # Το δεσμευμένο αντίτυπο περνά στον επόμενο της ουράς
+            if result['ID_Αντιτύπου']:
+                self._assign_copy(cursor, result['ID_Αντιτύπου'], result['ISBN'], datetime.now().strftime('%Y-%m-%d'))
+
+            conn.commit()
+            conn.close()
+            return True, "Η κράτηση ακυρώθηκε επιτυχώς"
+
+        except Exception:
+            conn.rollback()
+            conn.close()
+            return False, "Σφάλμα κατά την ακύρωση"
+
+    def get_member_summary(self, member_id: int):
+        """
+        Μετρητές της αρχικής οθόνης μέλους με ένα ερώτημα: ενεργοί και εκπρόθεσμοι δανεισμοί,
+        εκκρεμή πρόστιμα και οφειλή (από το Υπόλοιπο_Προστίμων), ενεργές κρατήσεις (και όσες
+        περιμένουν παραλαβή) και επερχόμενες κρατήσεις χώρων. Κάθε μετρητής διαβάζεται από ευρετήριο ανά μέλος.
+        """
+        now = datetime.now()
+        today = now.strftime('%Y-%m-%d')
         query = """
+            SELECT δ.Ενεργοί_Δανεισμοί, δ.Εκπρόθεσμοι, π.Εκκρεμή_Πρόστιμα, π.Οφειλή,
+                   κ.Ενεργές_Κρατήσεις, κ.Προς_Παραλαβή, χ.Κρατήσεις_Χώρων
+            FROM (SELECT COUNT(*) as Ενεργοί_Δανεισμοί,
+                         COUNT(*) FILTER (WHERE Κατάσταση = 'Εκπρόθεσμος' OR Ημερομηνία_Λήξης < ?) as Εκπρόθεσμοι
+                  FROM Δανεισμός
+                  WHERE ID_Μέλους = ? AND Κατάσταση IN ('Ενεργός', 'Εκπρόθεσμος')) δ,
+                 (SELECT COALESCE(MAX(Εκκρεμή), 0) as Εκκρεμή_Πρόστιμα, COALESCE(MAX(Οφειλή), 0) as Οφειλή
+                  FROM Υπόλοιπο_Προστίμων
+                  WHERE ID_Μέλους = ?) π,
+                 (SELECT COUNT(*) as Ενεργές_Κρατήσεις, COUNT(ID_Αντιτύπου) as Προς_Παραλαβή
+                  FROM Κράτηση
+                  WHERE ID_Μέλους = ? AND Κατάσταση = 'Ενεργή') κ,
+                 (SELECT COUNT(*) as Κρατήσεις_Χώρων
+                  FROM Μέλος_Κάνει_Κράτηση_Χώρου
+                  WHERE ID_Μέλους = ? AND Ημερομηνία_Κράτησης >= ?
+                  AND (Ημερομηνία_Κράτησης > ? OR Ώρα_Λήξης > ?)) χ
+        """
+        params = (today, member_id, member_id, member_id, member_id, today, today, now.strftime('%H:%M'))
+        return self._member_data('Σύνοψη', member_id, query, params=params)[0]
+
+    # Τεκμήριο ενός δανεισμού δ ανεξάρτητα από τον τύπο του: μέσω του αντιτύπου ή του EBook.
+    # Ένα μόνο join στο Τεκμήριο, με αναζήτηση πρωτεύοντος κλειδιού στο ISBN που βρέθηκε.
+    LOAN_ITEM_SQL = """
+        LEFT JOIN Αντίτυπο α ON δ.ID_Αντιτύπου = α.ID_Αντιτύπου
+        LEFT JOIN EBook e ON δ.ID_EBook = e.ID_EBook
+        LEFT JOIN Τεκμήριο τ ON τ.ISBN = COALESCE(α.ISBN, e.ISBN)
+    """
+
+    LOAN_TYPE_SQL = """
+        CASE
+            WHEN δ.ID_EBook IS NOT NULL THEN 'EBook'
+            WHEN δ.ID_Διαδανεισμού IS NOT NULL THEN 'Διαδανεισμός'
+            ELSE 'Κανονικός'
+        END
+    """
+
+    def get_member_loans(self, member_id: int):
+        """Ανάκτηση δανεισμών μέλους (φυσικών και EBook)"""
+        query = f"""
             SELECT δ.ID_Δανεισμού,
-                COALESCE(τ.Τίτλος, τ2.Τίτλος) as Τίτλος,
+                τ.Τίτλος,
                 δ.Ημερομηνία_Έναρξης,
                 δ.Ημερομηνία_Λήξης,
                 δ.Κατάσταση,
-                CASE 
-                    WHEN δ.ID_EBook IS NOT NULL THEN 'EBook'
-                    WHEN δ.ID_Διαδανεισμού IS NOT NULL THEN 'Διαδανεισμός'
-                    ELSE 'Κανονικός'
-                END as Τύπος
+                {self.LOAN_TYPE_SQL} as Τύπος
             FROM Δανεισμός δ
-            LEFT JOIN Αντίτυπο α ON δ.ID_Αντιτύπου = α.ID_Αντιτύπου
-            LEFT JOIN Τεκμήριο τ ON α.ISBN = τ.ISBN
-            LEFT JOIN EBook eb ON δ.ID_EBook = eb.ID_EBook
-            LEFT JOIN Τεκμήριο τ2 ON eb.ISBN = τ2.ISBN
+            {self.LOAN_ITEM_SQL}
             WHERE δ.ID_Μέλους = ? AND δ.Κατάσταση IN ('Ενεργός', 'Εκπρόθεσμος', 'Ολοκληρωμένος')
             ORDER BY δ.Ημερομηνία_Λήξης
             """
-        return self.fetch_all_dict(query, (member_id,))
+        return self._member_data('Δανεισμοί', member_id, query, LoanRecord)
 
     def get_member_fines(self, member_id: int):
-        """Ανάκτηση προστίμων μέλους"""
-        query = """
-            SELECT π.*, τ.Τίτλος, δ.Ημερομηνία_Έναρξης, δ.Ημερομηνία_Λήξης
+        """Ανάκτηση εκκρεμών προστίμων μέλους (και για δανεισμούς EBook)"""
+        query = f"""
+            SELECT π.*, τ.Τίτλος, δ.Ημερομηνία_Έναρξης, δ.Ημερομηνία_Λήξης, {self.LOAN_TYPE_SQL} as Τύπος
             FROM Πρόστιμο π
             JOIN Δανεισμός δ ON π.ID_Δανεισμού = δ.ID_Δανεισμού
-            JOIN Αντίτυπο α ON δ.ID_Αντιτύπου = α.ID_Αντιτύπου
-            JOIN Τεκμήριο τ ON α.ISBN = τ.ISBN
-            WHERE δ.ID_Μέλους = ? AND π.Κατάσταση = 'Εκκρεμής'
+            {self.LOAN_ITEM_SQL}
+            WHERE π.ID_Μέλους = ? AND π.Κατάσταση = 'Εκκρεμής'
             ORDER BY π.Ημερομηνία_Επιβολής DESC
         """ 
-        return self.fetch_all_dict(query, (member_id,))
+        return self._member_data('Πρόστιμα', member_id, query, FineRecord)
 
     def rate_book(self, member_id: int, isbn: str, rating: int, review: str = None):
         """Αξιολόγηση βιβλίου"""
@@ -268,31 +2011,24 @@ class LibraryModel:
     def get_member_reservations(self, member_id: int):
         """Ανάκτηση κρατήσεων μέλους"""
         query = """
-            SELECT κ.*, τ.Τίτλος, τ.Συγγραφέας
+            SELECT κ.*, τ.Τίτλος, τ.Συγγραφέας, {position} as Θέση
             FROM Κράτηση κ
             JOIN Τεκμήριο τ ON κ.ISBN = τ.ISBN
             WHERE κ.ID_Μέλους = ? AND κ.Κατάσταση = 'Ενεργή'
-            ORDER BY κ.Προτεραιότητα
-        """
-        return self.fetch_all_dict( query, (member_id,))
+            ORDER BY Θέση, κ.Ημερομηνία_Κράτησης
+        """.format(position=self.QUEUE_POSITION_SQL.format(r='κ'))
+        return self._member_data('Κρατήσεις', member_id, query, ReservationRecord)
 
     def get_member_loan_history_books(self, member_id: int):
         """Ανάκτηση βιβλίων που έχει δανειστεί το μέλος (για αξιολόγηση)"""
-        query = """
-            SELECT DISTINCT 
-            COALESCE(τ1.ISBN, τ2.ISBN) as ISBN, 
-            COALESCE(τ1.Τίτλος, τ2.Τίτλος) as Τίτλος, 
-            COALESCE(τ1.Συγγραφέας, τ2.Συγγραφέας) as Συγγραφέας
+        query = f"""
+            SELECT DISTINCT τ.ISBN, τ.Τίτλος, τ.Συγγραφέας
             FROM Δανεισμός δ
-            LEFT JOIN Αντίτυπο α ON δ.ID_Αντιτύπου = α.ID_Αντιτύπου
-            LEFT JOIN Τεκμήριο τ1 ON α.ISBN = τ1.ISBN
-            LEFT JOIN EBook e ON δ.ID_EBook = e.ID_EBook
-            LEFT JOIN Τεκμήριο τ2 ON e.ISBN = τ2.ISBN
-            WHERE δ.ID_Μέλους = ?
-            AND (τ1.ISBN IS NOT NULL OR τ2.ISBN IS NOT NULL)
-            ORDER BY Τίτλος
-        """
-        return self.fetch_all_dict(query, (member_id,))
+            {self.LOAN_ITEM_SQL}
+            WHERE δ.ID_Μέλους = ? AND τ.ISBN IS NOT NULL
+            ORDER BY τ.Τίτλος
+        """
+        return self._member_data('Ιστορικό', member_id, query)
         
     def get_member_ratings(self, member_id: int):
         """Ανάκτηση αξιολογήσεων μέλους"""
@@ -303,102 +2039,102 @@ class LibraryModel:
             WHERE α.ID_Μέλους = ?
             ORDER BY α.Ημερομηνία DESC
         """
-        return self.fetch_all_dict(query, (member_id,))
+        return self._member_data('Αξιολογήσεις', member_id, query)
+
+    def get_available_spaces(self, library_id: int = None, has_computers: bool = None, has_projector: bool = None, has_board: bool = None, has_ac: bool = None, has_printer: bool = None, has_sockets: bool = None, date: str = None, start_time: str = None, required_facilities: int = 0, min_capacity: int = None):
+        """
+        Διαθέσιμοι χώροι σε όλο το δίκτυο ή σε μία βιβλιοθήκη - με date/start_time μόνο όσοι είναι ελεύθεροι στο αντίστοιχο δίωρο.
+        Οι παροχές (has_* ή μάσκα required_facilities) γίνονται λίστα των μασκών που τις περιέχουν, ώστε
+        το ευρετήριο (Status, Παροχές, ID_Βιβλιοθήκης, Χωρητικότητα) να αναζητά μόνο αυτές (και τη βιβλιοθήκη,
+        αν δοθεί). Η ελάχιστη χωρητικότητα ελέγχεται στις εγγραφές του ευρετηρίου, πριν διαβαστεί η γραμμή.
+        """
+        flags = (has_computers, has_projector, has_board, has_ac, has_printer, has_sockets)
+        mask = required_facilities | facility_mask(*(column for column, flag in zip(SPACE_FACILITIES, flags) if flag))
 
-    def get_available_spaces(self, library_id: int = None, has_computers: bool = None, has_projector: bool = None, has_board: bool = None, has_ac: bool = None, has_printer: bool = None, has_sockets: bool = None):
         query = '''SELECT Χώρος_Μελέτης.*, Βιβλιοθήκη.Όνομα as Βιβλιοθήκη
                    FROM Χώρος_Μελέτης
                    JOIN Βιβλιοθήκη ON Χώρος_Μελέτης.ID_Βιβλιοθήκης = Βιβλιοθήκη.ID_Βιβλιοθήκης
                    WHERE Χώρος_Μελέτης.Status = 'Διαθέσιμος' '''
         params = []
         
+        # Με βιβλιοθήκη, η λίστα μασκών (όλες, αν δεν ζητήθηκε παροχή) επιτρέπει αναζήτηση και στο ID_Βιβλιοθήκης
+        if mask or library_id:
+            query += "AND Χώρος_Μελέτης.Παροχές IN (SELECT value FROM json_each(?)) "
+            params.append(json.dumps(facility_masks_including(mask)))
         if library_id:
             query += "AND Χώρος_Μελέτης.ID_Βιβλιοθήκης = ? "
             params.append(library_id)
-        if has_computers:
-            query += "AND Χώρος_Μελέτης.Υπολογιστές = 1 "
-        if has_projector:
-            query += "AND Χώρος_Μελέτης.Προβολέας = 1 "
-        if has_board:
-            query += "AND Χώρος_Μελέτης.Πίνακας = 1 "
-        if has_ac:
-            query += "AND Χώρος_Μελέτης.Κλιματισμός = 1 "
-        if has_printer:
-            query += "AND Χώρος_Μελέτης.Εκτυπωτής = 1 "
-        if has_sockets:
-            query += "AND Χώρος_Μελέτης.Πρίζες_Φόρτισης = 1 "
+        if min_capacity:
+            query += "AND Χώρος_Μελέτης.Χωρητικότητα >= ? "
+            params.append(min_capacity)
+
+        # Ελεύθεροι χώροι για το διάστημα [start, end) σε ένα ερώτημα για όλους τους χώρους
+        if date and start_time:
+            start, end = self.booking_interval(start_time)
+            query += f"AND NOT EXISTS ({self.SPACE_CONFLICT_QUERY.format(space='Χώρος_Μελέτης.ID_Χώρου')}) "
+            params.extend([date, end, start])
 
         query += "ORDER BY Βιβλιοθήκη.Όνομα, Χώρος_Μελέτης.Όνομα_Χώρου"
         return self.fetch_all_dict(query, tuple(params))
 
+    # Κάθε κράτηση χώρου διαρκεί δύο ώρες
+    SPACE_BOOKING_DURATION = timedelta(hours=2)
+
+    # Επικάλυψη διαστημάτων: υπάρχουσα έναρξη < νέα λήξη ΚΑΙ υπάρχουσα λήξη > νέα έναρξη.
+    # Εξυπηρετείται από το ευρετήριο (ID_Χώρου, Ημερομηνία_Κράτησης, Ώρα_Κράτησης, Ώρα_Λήξης)
+    SPACE_CONFLICT_QUERY = """
+        SELECT 1 FROM Μέλος_Κάνει_Κράτηση_Χώρου
+        WHERE ID_Χώρου = {space}
+        AND Ημερομηνία_Κράτησης = ?
+        AND Ώρα_Κράτησης < ?
+        AND Ώρα_Λήξης > ?
+    """
+
+    def booking_interval(self, start_time: str):
+        """Κανονικοποιημένη (έναρξη, λήξη) κράτησης χώρου σε μορφή HH:MM - ValueError για λάθος μορφή"""
+        t_start = datetime.strptime(start_time.strip(), "%H:%M")
+        t_end = t_start + self.SPACE_BOOKING_DURATION
+        end = t_end.strftime("%H:%M") if t_end.date() == t_start.date() else "24:00"
+        return t_start.strftime("%H:%M"), end
+
     def check_space_availability(self, space_id: int, date: str, start_time: str):
         try:
-            fmt = "%H:%M"
-            t_start = datetime.strptime(start_time, fmt)
-            t_end = t_start + timedelta(hours=2)
-            end_time_str = t_end.strftime(fmt)
+            start, end = self.booking_interval(start_time)
         except ValueError:
             print(f"Λάθος μορφή ώρας: {start_time}")
             return False
-        
-        query = """
-            SELECT COUNT(*) as conflicts
-            FROM Μέλος_Κάνει_Κράτηση_Χώρου
-            WHERE ID_Χώρου = ? 
-            AND Ημερομηνία_Κράτησης = ?
-            AND (
-                Ώρα_Κράτησης < ?                         -- Υπάρχουσα Έναρξη < Νέα Λήξη
-                AND 
-                time(Ώρα_Κράτησης, '+2 hours') > ?       -- Υπάρχουσα Λήξη (υπολογισμένη) > Νέα Έναρξη
-            )
-        """
-        
-        params = (space_id, date, end_time_str, start_time)
-        
-        result = self.fetch_one_dict(query, params)
-        
-        return result['conflicts'] == 0
-
-        # """Έλεγχος διαθεσιμότητας χώρου για συγκεκριμένη ώρα"""
-        # query = """
-        #     SELECT COUNT(*) as conflicts
-        #     FROM Μέλος_Κάνει_Κράτηση_Χώρου
-        #     WHERE ID_Χώρου = ? AND Ημερομηνία_Κράτησης = ?
-        #     AND (
-        #         (Ώρα_Κράτησης < ? AND Ώρα_Λήξης > ?) OR
-        #         (Ώρα_Κράτησης < ? AND Ώρα_Λήξης > ?) OR
-        #         (Ώρα_Κράτησης >= ? AND Ώρα_Λήξης <= ?)
-        #     )
-        # """
-        # params = (space_id, date, end_time, start_time, end_time, start_time, start_time, end_time)
-        # result = self.fetch_one_dict(query, params)
-        # return result['conflicts'] == 0
+
+        query = self.SPACE_CONFLICT_QUERY.format(space='?') + " LIMIT 1"
+        return self.fetch_one_dict(query, (space_id, date, end, start)) is None
 
     def create_space_reservation(self, member_id: int, space_id: int, date: str, time: str):
-        """Δημιουργία κράτησης χώρου"""
+        """Δημιουργία κράτησης χώρου - έλεγχος επικάλυψης και εισαγωγή σε μία ατομική εντολή"""
+        try:
+            start, end = self.booking_interval(time)
+            reservation_date = datetime.strptime(date, '%Y-%m-%d')
+        except ValueError:
+            return False, "Λάθος μορφή ημερομηνίας (YYYY-MM-DD) ή ώρας (HH:MM)"
+
+        # Έλεγχος ότι η ημερομηνία είναι μελλοντική
+        if reservation_date.date() < datetime.now().date():
+            return False, "Δεν μπορείτε να κάνετε κράτηση για παρελθούσα ημερομηνία"
+
         conn = self.get_connection()
         cursor = conn.cursor()
         
         try:
-            # Έλεγχος διαθεσιμότητας
-            if not self.check_space_availability(space_id, date, time):
+            # Η εισαγωγή γίνεται μόνο αν δεν υπάρχει επικάλυψη (χωρίς race ανάμεσα σε έλεγχο και INSERT)
+            cursor.execute(f"""
+                INSERT INTO Μέλος_Κάνει_Κράτηση_Χώρου (ID_Μέλους, ID_Χώρου, Ημερομηνία_Κράτησης, Ώρα_Κράτησης, Ώρα_Λήξης)
+                SELECT ?, ?, ?, ?, ?
+                WHERE NOT EXISTS ({self.SPACE_CONFLICT_QUERY.format(space='?')})
+            """, (member_id, space_id, date, start, end, space_id, date, end, start))
+
+            if cursor.rowcount == 0:
+                conn.rollback()
                 conn.close()
                 return False, "Ο χώρος δεν είναι διαθέσιμος για το συγκεκριμένο χρονικό διάστημα"
             
-            # Έλεγχος ότι η ημερομηνία είναι μελλοντική
-            reservation_date = datetime.strptime(date, '%Y-%m-%d')
-            today = datetime.now()
-            
-            if reservation_date.date() < today.date():
-                conn.close()
-                return False, "Δεν μπορείτε να κάνετε κράτηση για παρελθούσα ημερομηνία"
-            
-            # Δημιουργία κράτησης
-            cursor.execute("""
-                INSERT INTO Μέλος_Κάνει_Κράτηση_Χώρου (ID_Μέλους, ID_Χώρου, Ημερομηνία_Κράτησης, Ώρα_Κράτησης)
-                VALUES (?, ?, ?, ?)
-            """, (member_id, space_id, date, time))
-            
             conn.commit()
             conn.close()
             return True, "Η κράτηση χώρου δημιουργήθηκε επιτυχώς"
@@ -408,49 +2144,106 @@ class LibraryModel:
             conn.close()
             return False, f"Σφάλμα: {str(e)}"
 
-    def get_member_space_reservations(self, member_id: int):
-        query = '''SELECT Μέλος_Κάνει_Κράτηση_Χώρου.*, Χώρος_Μελέτης.*, Βιβλιοθήκη.Όνομα as Βιβλιοθήκη
-                   FROM Μέλος_Κάνει_Κράτηση_Χώρου
-                   JOIN Χώρος_Μελέτης ON Μέλος_Κάνει_Κράτηση_Χώρου.ID_Χώρου = Χώρος_Μελέτης.ID_Χώρου
-                   JOIN Βιβλιοθήκη ON Χώρος_Μελέτης.ID_Βιβλιοθήκης = Βιβλιοθήκη.ID_Βιβλιοθήκης
-                   WHERE Μέλος_Κάνει_Κράτηση_Χώρου.ID_Μέλους = ?
-                   ORDER BY Μέλος_Κάνει_Κράτηση_Χώρου.Ημερομηνία_Κράτησης, Μέλος_Κάνει_Κράτηση_Χώρου.Ώρα_Κράτησης'''
-        return self.fetch_all_dict(query, (member_id,))
+    # Τιμές κελιών του πίνακα πληρότητας (SLOT_SHORT: ελεύθερο, αλλά μια κράτηση
+    # SPACE_BOOKING_DURATION από εκεί θα έπεφτε σε κράτηση ή θα περνούσε το κλείσιμο)
+    SLOT_FREE, SLOT_BOOKED, SLOT_OWN, SLOT_SHORT = 0, 1, 2, 3
 
-    def cancel_space_reservation(self, member_id: int, space_name: str, library_name: str, date: str, time: str):
-        """Διαγραφή κράτησης χώρου με βάση μέλος, χώρο, βιβλιοθήκη και χρόνο"""
-        conn = self.get_connection()
-        cursor = conn.cursor()
-        
+    def get_space_occupancy(self, date_from: str, date_to: str = None, member_id: int = None, day_start: str = "08:00", day_end: str = "22:00", slot_minutes: int = 60, **space_filters):
+        """
+        Πίνακας πληρότητας χώροι × χρονικές θυρίδες για εύρος ημερομηνιών.
+        Οι κρατήσεις φέρνονται με ένα ερώτημα εύρους στο ευρετήριο (ID_Χώρου, Ημερομηνία, ...)
+        και ο πίνακας υπολογίζεται εδώ. Επιστρέφει (χώροι, θυρίδες, πίνακας) όπου θυρίδα = (ημερομηνία, έναρξη).
+        SLOT_FREE μένουν μόνο οι θυρίδες από τις οποίες χωράει ολόκληρη κράτηση (SPACE_BOOKING_DURATION)
+        έως το day_end· οι υπόλοιπες ελεύθερες γίνονται SLOT_SHORT.
+        """
+        first = datetime.strptime(date_from, '%Y-%m-%d')
+        last = datetime.strptime(date_to, '%Y-%m-%d') if date_to else first
+        open_min, close_min = self._minutes(day_start), self._minutes(day_end)
+        starts = list(range(open_min, close_min, slot_minutes))
+
+        days = [(first + timedelta(days=i)).strftime('%Y-%m-%d') for i in range((last - first).days + 1)]
+        slots = [(day, f"{m // 60:02d}:{m % 60:02d}") for day in days for m in starts]
+        day_offset = {day: i * len(starts) for i, day in enumerate(days)}
+
+        spaces = self.get_available_spaces(**space_filters)
+        grid = [[self.SLOT_FREE] * len(slots) for _ in spaces]
+        row_of = {space['ID_Χώρου']: i for i, space in enumerate(spaces)}
+
+        query = """
+            SELECT κ.ID_Χώρου, κ.ID_Μέλους, κ.Ημερομηνία_Κράτησης, κ.Ώρα_Κράτησης, κ.Ώρα_Λήξης
+            FROM Χώρος_Μελέτης χ
+            JOIN Μέλος_Κάνει_Κράτηση_Χώρου κ ON κ.ID_Χώρου = χ.ID_Χώρου
+                AND κ.Ημερομηνία_Κράτησης BETWEEN ? AND ?
+            WHERE χ.Status = 'Διαθέσιμος'
+        """
+        params = [days[0], days[-1]]
+        if space_filters.get('library_id'):
+            query += " AND χ.ID_Βιβλιοθήκης = ?"
+            params.append(space_filters['library_id'])
+
+        for booking in self.fetch_all_dict(query, tuple(params), record=SpaceBookingRecord):
+            row = row_of.get(booking['ID_Χώρου'])
+            if row is None:
+                continue
+            value = self.SLOT_OWN if booking['ID_Μέλους'] == member_id else self.SLOT_BOOKED
+            b_start, b_end = self._minutes(booking['Ώρα_Κράτησης']), self._minutes(booking['Ώρα_Λήξης'])
+            base = day_offset[booking['Ημερομηνία_Κράτησης']]
+
+            # Θυρίδες που επικαλύπτονται με το [έναρξη, λήξη) της κράτησης
+            first_slot = max(0, (b_start - open_min) // slot_minutes)
+            last_slot = min(len(starts), -(-(b_end - open_min) // slot_minutes))
+            for i in range(first_slot, last_slot):
+                if grid[row][base + i] != self.SLOT_OWN:
+                    grid[row][base + i] = value
+
+        # Θυρίδες που καλύπτει μια κράτηση από την αρχή μιας θυρίδας
+        duration = int(self.SPACE_BOOKING_DURATION.total_seconds() // 60)
+        span = -(-duration // slot_minutes)
+        for cells in grid:
+            for base in day_offset.values():
+                for i, start in enumerate(starts):
+                    if cells[base + i] != self.SLOT_FREE:
+                        continue
+                    if start + duration > close_min or any(
+                            cell != self.SLOT_FREE for cell in cells[base + i:base + min(i + span, len(starts))]):
+                        cells[base + i] = self.SLOT_SHORT
+
+        return spaces, slots, grid
+
+    def _minutes(self, hhmm: str) -> int:
+        hours, minutes = hhmm.split(':')[:2]
+        return int(hours) * 60 + int(minutes)
+
+    def get_member_space_reservations(self, member_id: int, upcoming_only: bool = True):
+        """Κρατήσεις χώρων μέλους (εξ ορισμού μόνο όσες δεν έχουν λήξει) μέσω του ευρετηρίου (ID_Μέλους, Ημερομηνία)"""
+        query = '''SELECT κ.*, χ.Όνομα_Χώρου, χ.Χωρητικότητα, χ.Υπολογιστές, χ.Προβολέας, χ.Πίνακας,
+                          χ.Κλιματισμός, χ.Εκτυπωτής, χ.Πρίζες_Φόρτισης, β.Όνομα as Βιβλιοθήκη
+                   FROM Μέλος_Κάνει_Κράτηση_Χώρου κ
+                   JOIN Χώρος_Μελέτης χ ON κ.ID_Χώρου = χ.ID_Χώρου
+                   JOIN Βιβλιοθήκη β ON χ.ID_Βιβλιοθήκης = β.ID_Βιβλιοθήκης
+                   WHERE κ.ID_Μέλους = ? '''
+        params = [member_id]
+
+        if upcoming_only:
+            now = datetime.now()
+            today = now.strftime('%Y-%m-%d')
+            query += "AND κ.Ημερομηνία_Κράτησης >= ? AND (κ.Ημερομηνία_Κράτησης > ? OR κ.Ώρα_Λήξης > ?) "
+            params.extend([today, today, now.strftime('%H:%M')])
+
+        query += "ORDER BY κ.Ημερομηνία_Κράτησης, κ.Ώρα_Κράτησης"
+        return self.fetch_all_dict(query, tuple(params), record=SpaceBookingRecord)
+
+    def cancel_space_reservation(self, member_id: int, booking_id: int):
+        """Ακύρωση κράτησης χώρου με βάση το ID της κράτησης"""
         try:
-            query = """
-                DELETE FROM Μέλος_Κάνει_Κράτηση_Χώρου 
-                WHERE ID_Μέλους = ?
-                AND ID_Χώρου = (
-                    SELECT xm.ID_Χώρου 
-                    FROM Χώρος_Μελέτης xm
-                    JOIN Βιβλιοθήκη b ON xm.ID_Βιβλιοθήκης = b.ID_Βιβλιοθήκης
-                    WHERE xm.Όνομα_Χώρου = ? AND b.Όνομα = ?
-                )
-                AND Ημερομηνία_Κράτησης = ?
-                AND Ώρα_Κράτησης = ?
-            """
-            
-            cursor.execute(query, (member_id, space_name, library_name, date, time))
-            
-            if cursor.rowcount == 0:
-                conn.close()
-                return False, "Η κράτηση δεν βρέθηκε (ελέγξτε τα στοιχεία)"
-            
-            conn.commit()
-            conn.close()
-            return True, "Η κράτηση χώρου ακυρώθηκε επιτυχώς"
-            
+            deleted = self.execute_query(
+                "DELETE FROM Μέλος_Κάνει_Κράτηση_Χώρου WHERE ID_Κράτησης_Χώρου = ? AND ID_Μέλους = ?",
+                (booking_id, member_id), commit=True)
         except Exception as e:
-            conn.rollback()
-            conn.close()
             return False, f"Σφάλμα: {str(e)}"
 
+        return (True, "Η κράτηση χώρου ακυρώθηκε επιτυχώς") if deleted else (False, "Η κράτηση δεν βρέθηκε")
+
     # ==================== ΜΕΘΟΔΟΙ ADMIN ==================== #
 
     def get_staff_by_id(self, staff_id: int):
@@ -477,7 +2270,7 @@ class LibraryModel:
             query += " AND α.ID_Βιβλιοθήκης = ?"
             params.append(library_id)
         
-        return self.fetch_all_dict(query, params)
+        return self.fetch_all_dict(query, params, record=CopyRecord)
 
     def add_document(self, isbn: str, title: str, author: str = None, publisher: str = None, year: str = None, language: str = None, category_id: int = None, edition: int = None):
         """Προσθήκη νέου τεκμηρίου - σύμφωνα με το schema"""
@@ -500,20 +2293,233 @@ class LibraryModel:
         except Exception as e:
             return False, f"Σφάλμα: {str(e)}"
 
-    def get_category_by_name(self, category_name: str):
-        """Βρίσκει κατηγορία από όνομα"""
-        return self.fetch_one_dict("SELECT * FROM Κατηγορία WHERE Όνομα = ?", (category_name,))
+    def get_category_by_name(self, category_name: str):
+        """Βρίσκει κατηγορία από όνομα"""
+        return self.fetch_one_dict("SELECT * FROM Κατηγορία WHERE Όνομα = ?", (category_name,))
+
+    def add_copy(self, isbn: str, library_id: int, condition: str = 'Καλή'):
+        """Προσθήκη αντιτύπου"""
+        existing = self.fetch_one_dict("SELECT ISBN FROM Τεκμήριο WHERE ISBN = ?", (isbn,))
+        if not existing:
+            return False, "Το τεκμήριο δεν υπάρχει. Προσθέστε το πρώτα."
+
+        success, msg = self.execute_with_commit(
+            "INSERT INTO Αντίτυπο (ISBN, ID_Βιβλιοθήκης, Φυσική_Κατάσταση, Status) VALUES (?, ?, ?, 'Διαθέσιμο')",
+            (isbn, library_id, condition))
+        return (True, "Αντίτυπο προστέθηκε επιτυχώς") if success else (False, msg)
+
+    # ==================== ΜΑΖΙΚΗ ΕΙΣΑΓΩΓΗ ==================== #
+
+    IMPORT_CHUNK_SIZE = 5000
+
+    # Από αυτό το μέγεθος αρχείου (bytes) η εισαγωγή καταλόγου γίνεται μαζικά, σε ένα transaction
+    IMPORT_BULK_BYTES = 1 << 20
+
+    # Triggers παράγωγων δομών που η μαζική εισαγωγή αναστέλλει και αναπληρώνει μία φορά στο τέλος
+    CATALOG_DEFERRED_TRIGGERS = (
+        'Τεκμήριο_Τριγράμματα_insert', 'Τεκμήριο_Τριγράμματα_update', 'Τεκμήριο_Τριγράμματα_delete',
+        'Τεκμήριο_Αλλαγές_insert', 'Τεκμήριο_Αλλαγές_update', 'Τεκμήριο_Αλλαγές_delete',
+        'Αντίτυπο_Διαθεσιμότητα_insert', 'Αντίτυπο_Διαθεσιμότητα_update', 'Αντίτυπο_Διαθεσιμότητα_delete',
+    )
+
+    # Οι τιμές που επιτρέπουν τα CHECK του Αντίτυπο
+    COPY_CONDITIONS = ('Άριστη', 'Καλή', 'Μέτρια', 'Φθαρμένη')
+
+    def _import_chunk(self, conn, chunk, write, rejected):
+        """
+        Γράφει ένα chunk σε ένα transaction με executemany. Αν η βάση απορρίψει το chunk,
+        το ξαναγράφει γραμμή-γραμμή με savepoints ώστε να απορριφθούν μόνο οι προβληματικές.
+        Σε μαζική εισαγωγή (ήδη ανοιχτό transaction) το chunk είναι savepoint αντί για transaction.
+        Επιστρέφει τις γραμμές που γράφτηκαν.
+        """
+        cursor = conn.cursor()
+        bulk = conn.in_transaction
+        if bulk:
+            cursor.execute("SAVEPOINT κομμάτι")
+        try:
+            write(cursor, chunk)
+            if bulk:
+                cursor.execute("RELEASE κομμάτι")
+            else:
+                conn.commit()
+            return chunk
+        except sqlite3.DatabaseError:
+            if bulk:
+                cursor.execute("ROLLBACK TO κομμάτι")
+                cursor.execute("RELEASE κομμάτι")
+            else:
+                conn.rollback()
+
+        written = []
+        if not bulk:
+            cursor.execute("BEGIN")
+        for item in chunk:
+            cursor.execute("SAVEPOINT γραμμή")
+            try:
+                write(cursor, [item])
+                cursor.execute("RELEASE γραμμή")
+                written.append(item)
+            except sqlite3.DatabaseError as e:
+                cursor.execute("ROLLBACK TO γραμμή")
+                cursor.execute("RELEASE γραμμή")
+                rejected.append((item[0], f"Σφάλμα βάσης: {e}", item[1]))
+        if not bulk:
+            conn.commit()
+        return written
+
+    def _suspend_catalog_triggers(self, cursor):
+        """Αφαίρεση των triggers του CATALOG_DEFERRED_TRIGGERS μέσα στο τρέχον transaction. Επιστρέφει το SQL τους."""
+        triggers = cursor.execute(
+            "SELECT name, sql FROM sqlite_master WHERE type = 'trigger' AND name IN (SELECT value FROM json_each(?))",
+            (json.dumps(self.CATALOG_DEFERRED_TRIGGERS),)).fetchall()
+        for name, _ in triggers:
+            cursor.execute(f'DROP TRIGGER "{name}"')
+        return [sql for _, sql in triggers]
+
+    def _refresh_catalog_derived(self, cursor, isbns, first_copy: int, triggers):
+        """
+        Ενημέρωση των παράγωγων δομών για όσα έγραψε η μαζική εισαγωγή, με μία εντολή η καθεμία,
+        και επαναφορά των triggers: τριγράμματα των ISBN, Διαθεσιμότητα από τα αντίτυπα μετά το
+        first_copy και μία εγγραφή '*' στο Αλλαγές_Αναζήτησης (οι διεργασίες ξαναχτίζουν την αυτόματη συμπλήρωση).
+        """
+        isbns = json.dumps(list(isbns))
+        cursor.execute("DELETE FROM Τεκμήριο_Τριγράμματα WHERE rowid IN (SELECT value FROM json_each(?))", (isbns,))
+        cursor.execute(f"""
+            INSERT INTO Τεκμήριο_Τριγράμματα(rowid, Τίτλος, Συγγραφέας)
+            SELECT ISBN, {sql_fold('Τίτλος')}, {sql_fold('Συγγραφέας')}
+            FROM Τεκμήριο WHERE ISBN IN (SELECT value FROM json_each(?))
+        """, (isbns,))
+        cursor.execute("""
+            INSERT INTO Διαθεσιμότητα (ISBN, ID_Βιβλιοθήκης, Status, Πλήθος)
+            SELECT ISBN, ID_Βιβλιοθήκης, Status, COUNT(*)
+            FROM Αντίτυπο WHERE ID_Αντιτύπου > ?
+            GROUP BY ISBN, ID_Βιβλιοθήκης, Status
+            ON CONFLICT DO UPDATE SET Πλήθος = Πλήθος + excluded.Πλήθος
+        """, (first_copy,))
+        cursor.execute("INSERT INTO Αλλαγές_Αναζήτησης (Πίνακας, Κλειδί) VALUES ('*', 0)")
+        for sql in triggers:
+            cursor.execute(sql)
+
+    def _parse_catalog_row(self, row: dict, categories: dict, libraries: set):
+        """Έλεγχος γραμμής καταλόγου με τους κανόνες του σχήματος. Επιστρέφει (τεκμήριο, αντίτυπα) ή ValueError."""
+        def required(field):
+            value = str(row.get(field) or '').strip()
+            if not value:
+                raise ValueError(f"Λείπει το πεδίο {field}")
+            return value
+
+        # Το ISBN είναι INTEGER PRIMARY KEY στο Τεκμήριο
+        isbn = re.sub(r'[\s-]', '', required('ISBN'))
+        if not isbn.isdigit():
+            raise ValueError(f"Μη αριθμητικό ISBN: {isbn}")
+
+        category = required('Κατηγορία')
+        category_id = int(category) if category.isdigit() else categories.get(category)
+        if category_id not in categories.values():
+            raise ValueError(f"Άγνωστη κατηγορία: {category}")
+
+        edition = required('Έκδοση')
+        if not edition.isdigit():
+            raise ValueError(f"Μη αριθμητική έκδοση: {edition}")
+
+        document = (isbn, required('Τίτλος'), category_id, required('Συγγραφέας'), int(edition),
+                    required('Εκδότης'), required('Χρονολογία'), required('Γλώσσα'))
+
+        library = str(row.get('ID_Βιβλιοθήκης') or '').strip()
+        if not library:
+            return document, []
+
+        if not library.isdigit() or int(library) not in libraries:
+            raise ValueError(f"Άγνωστη βιβλιοθήκη: {library}")
+
+        condition = str(row.get('Φυσική_Κατάσταση') or 'Καλή').strip()
+        if condition not in self.COPY_CONDITIONS:
+            raise ValueError(f"Μη έγκυρη φυσική κατάσταση: {condition}")
+
+        count = str(row.get('Αντίτυπα') or '1').strip()
+        if not count.isdigit():
+            raise ValueError(f"Μη έγκυρο πλήθος αντιτύπων: {count}")
+
+        return document, [(isbn, int(library), condition)] * int(count)
+
+    def import_catalog(self, path: str, rejects_path: str = None, chunk_size: int = None, encoding: str = None,
+                       bulk: bool = None):
+        """
+        Μαζική εισαγωγή τεκμηρίων (και αντιτύπων) από CSV, JSON lines ή πίνακα JSON.
+        Στήλες: ISBN, Τίτλος, Κατηγορία (ID ή όνομα), Συγγραφέας, Έκδοση, Εκδότης, Χρονολογία, Γλώσσα
+        και προαιρετικά ID_Βιβλιοθήκης, Αντίτυπα, Φυσική_Κατάσταση.
+        Τα υπάρχοντα ISBN ενημερώνονται (upsert). Κάθε chunk γράφεται σε ένα transaction.
+        Σε μαζική λειτουργία (bulk, από προεπιλογή για αρχεία από IMPORT_BULK_BYTES και πάνω) όλο
+        το αρχείο γράφεται σε ένα transaction χωρίς τα triggers του CATALOG_DEFERRED_TRIGGERS και οι
+        παράγωγες δομές ενημερώνονται μία φορά στο τέλος· ένα σφάλμα ανάγνωσης ακυρώνει όλη την εισαγωγή.
+        Επιστρέφει (True, αναφορά) ή (False, μήνυμα).
+        """
+        categories = {c['Όνομα']: c['ID_Κατηγορίας'] for c in self.fetch_all_dict("SELECT ID_Κατηγορίας, Όνομα FROM Κατηγορία")}
+        libraries = {l['ID_Βιβλιοθήκης'] for l in self.fetch_all_dict("SELECT ID_Βιβλιοθήκης FROM Βιβλιοθήκη")}
+
+        def write(cursor, items):
+            cursor.executemany("""
+                INSERT INTO Τεκμήριο (ISBN, Τίτλος, Κατηγορία, Συγγραφέας, Έκδοση, Εκδότης, Χρονολογία, Γλώσσα)
+                VALUES (?, ?, ?, ?, ?, ?, ?, ?)
+                ON CONFLICT(ISBN) DO UPDATE SET
+                    Τίτλος = excluded.Τίτλος, Κατηγορία = excluded.Κατηγορία, Συγγραφέας = excluded.Συγγραφέας,
+                    Έκδοση = excluded.Έκδοση, Εκδότης = excluded.Εκδότης, Χρονολογία = excluded.Χρονολογία,
+                    Γλώσσα = excluded.Γλώσσα
+            """, [document for _, _, document, _ in items])
+            cursor.executemany(
+                "INSERT INTO Αντίτυπο (ISBN, ID_Βιβλιοθήκης, Φυσική_Κατάσταση, Status) VALUES (?, ?, ?, 'Διαθέσιμο')",
+                [copy for _, _, _, copies in items for copy in copies]
+            )
+
+        documents = copies = 0
+        rejected = []
+        isbns = set()
+        conn = self.get_connection()
 
-    def add_copy(self, isbn: str, library_id: int, condition: str = 'Καλή'):
-        """Προσθήκη αντιτύπου"""
-        existing = self.fetch_one_dict("SELECT ISBN FROM Τεκμήριο WHERE ISBN = ?", (isbn,))
-        if not existing:
-            return False, "Το τεκμήριο δεν υπάρχει. Προσθέστε το πρώτα."
+        try:
+            if bulk is None:
+                bulk = os.path.getsize(path) >= self.IMPORT_BULK_BYTES
+            if bulk:
+                cursor = conn.cursor()
+                cursor.execute("BEGIN IMMEDIATE")
+                first_copy = cursor.execute("SELECT COALESCE(MAX(ID_Αντιτύπου), 0) FROM Αντίτυπο").fetchone()[0]
+                triggers = self._suspend_catalog_triggers(cursor)
+
+            for chunk in chunked(read_import_rows(path, encoding), chunk_size or self.IMPORT_CHUNK_SIZE):
+                items = []
+                for line_no, row in chunk:
+                    if row is None:
+                        rejected.append((line_no, "Μη αναγνώσιμη γραμμή", None))
+                        continue
+                    try:
+                        items.append((line_no, row) + self._parse_catalog_row(row, categories, libraries))
+                    except ValueError as e:
+                        rejected.append((line_no, str(e), row))
+
+                for _, _, document, row_copies in self._import_chunk(conn, items, write, rejected):
+                    documents += 1
+                    copies += len(row_copies)
+                    if bulk:
+                        isbns.add(int(document[0]))
+
+            if bulk:
+                self._refresh_catalog_derived(cursor, isbns, first_copy, triggers)
+                conn.commit()
+            conn.close()
 
-        success, msg = self.execute_with_commit(
-            "INSERT INTO Αντίτυπο (ISBN, ID_Βιβλιοθήκης, Φυσική_Κατάσταση, Status) VALUES (?, ?, ?, 'Διαθέσιμο')",
-            (isbn, library_id, condition))
-        return (True, "Αντίτυπο προστέθηκε επιτυχώς") if success else (False, msg)
+        except (OSError, csv.Error, UnicodeError, ValueError) as e:
+            conn.rollback()
+            conn.close()
+            return False, f"Σφάλμα ανάγνωσης αρχείου: {str(e)}"
+
+        except sqlite3.DatabaseError as e:
+            conn.rollback()
+            conn.close()
+            return False, f"Σφάλμα: {str(e)}"
+
+        report_error = write_import_report(rejects_path, rejected) if rejected and rejects_path else None
+
+        return True, {'Τεκμήρια': documents, 'Αντίτυπα': copies, 'Απορρίψεις': rejected, 'Σφάλμα_Αναφοράς': report_error}
 
     def delete_copy(self, copy_id: int):
         """Διαγραφή αντιτύπου"""
@@ -545,28 +2551,47 @@ class LibraryModel:
             conn.close()
             return False, f"Σφάλμα: {str(e)}"
 
+    def delete_copies(self, copy_ids):
+        """
+        Μαζική διαγραφή αντιτύπων με μία εντολή. Όσα έχουν δανεισμούς (ενεργούς ή ιστορικό,
+        ON DELETE RESTRICT) παραλείπονται. Επιστρέφει (True, (διαγραμμένα, παραλειφθέντα)) ή (False, μήνυμα).
+        """
+        copy_ids = list(copy_ids)
+        conn = self.get_connection()
+        cursor = conn.cursor()
+
+        try:
+            cursor.execute("""
+                DELETE FROM Αντίτυπο
+                WHERE ID_Αντιτύπου IN (SELECT value FROM json_each(?))
+                AND NOT EXISTS (SELECT 1 FROM Δανεισμός WHERE Δανεισμός.ID_Αντιτύπου = Αντίτυπο.ID_Αντιτύπου)
+            """, (json.dumps(copy_ids),))
+            deleted = cursor.rowcount
+
+            conn.commit()
+            conn.close()
+            return True, (deleted, len(copy_ids) - deleted)
+
+        except Exception as e:
+            conn.rollback()
+            conn.close()
+            return False, f"Σφάλμα: {str(e)}"
+
     def get_all_loans(self, search_term: str = "", status_filter: str = "", library_filter: int = None):
         """Ανάκτηση όλων των δανεισμών για admin (και φυσικά και EBook)"""
-        query = """
+        query = f"""
         SELECT δ.*, 
                μ.Όνομα || ' ' || μ.Επώνυμο as Μέλος,
-               COALESCE(τ1.ISBN, τ2.ISBN) as ISBN,
-               COALESCE(τ1.Τίτλος, τ2.Τίτλος) as Τίτλος,
+               τ.ISBN,
+               τ.Τίτλος,
                δ.ID_Αντιτύπου,
                β1.Όνομα as Βιβλιοθήκη_Μέλους,
                COALESCE(β2.Όνομα, 'EBook') as Βιβλιοθήκη_Αντιτύπου,
                δ.ID_Διαδανεισμού,
-               CASE 
-                   WHEN δ.ID_EBook IS NOT NULL THEN 'EBook'
-                   WHEN δ.ID_Διαδανεισμού IS NOT NULL THEN 'Διαδανεισμός'
-                   ELSE 'Κανονικός'
-               END as Τύπος
+               {self.LOAN_TYPE_SQL} as Τύπος
         FROM Δανεισμός δ
         JOIN Μέλος μ ON δ.ID_Μέλους = μ.ID_Μέλους
-        LEFT JOIN Αντίτυπο α ON δ.ID_Αντιτύπου = α.ID_Αντιτύπου
-        LEFT JOIN Τεκμήριο τ1 ON α.ISBN = τ1.ISBN
-        LEFT JOIN EBook e ON δ.ID_EBook = e.ID_EBook
-        LEFT JOIN Τεκμήριο τ2 ON e.ISBN = τ2.ISBN
+        {self.LOAN_ITEM_SQL}
         JOIN Βιβλιοθήκη β1 ON μ.ID_Βιβλιοθήκης = β1.ID_Βιβλιοθήκης
         LEFT JOIN Βιβλιοθήκη β2 ON α.ID_Βιβλιοθήκης = β2.ID_Βιβλιοθήκης
         WHERE 1=1
@@ -579,7 +2604,7 @@ class LibraryModel:
             params.append(status_filter)
         
         if search_term:
-            query += " AND (μ.Όνομα LIKE ? OR COALESCE(τ1.ISBN, τ2.ISBN) LIKE ? OR COALESCE(τ1.Τίτλος, τ2.Τίτλος) LIKE ? OR μ.Επώνυμο LIKE ?)"
+            query += " AND (μ.Όνομα LIKE ? OR τ.ISBN LIKE ? OR τ.Τίτλος LIKE ? OR μ.Επώνυμο LIKE ?)"
             search_pattern = f'%{search_term}%'
             params.extend([search_pattern] * 4)
         
@@ -589,168 +2614,303 @@ class LibraryModel:
         
         query += " ORDER BY CASE WHEN δ.Κατάσταση = 'Εκπρόθεσμος' THEN 0 WHEN δ.Κατάσταση = 'Ενεργός' THEN 1 ELSE 2 END, δ.Ημερομηνία_Έναρξης ASC LIMIT 200"
         
-        return self.fetch_all_dict(query, tuple(params))
+        return self.fetch_all_dict(query, tuple(params), record=LoanRecord)
 
-    def create_loan(self, member_id: int, copy_id: int, staff_library_id: int):
-        """Δημιουργία δανεισμού με υποστήριξη διαδανεισμού και κρατήσεων"""
-        #Έλεγχος μέλους
-        member = self.fetch_one_dict(
-            "SELECT ID_Βιβλιοθήκης FROM Μέλος WHERE ID_Μέλους = ?", 
-            (member_id,))
+    def _create_loan(self, cursor, member_id: int, copy_id: int):
+        """
+        Έλεγχοι και δημιουργία δανεισμού μέσα στο transaction του καλούντος,
+        ώστε οι έλεγχοι κρατήσεων να ισχύουν τη στιγμή της εγγραφής. Επιστρέφει (bool, μήνυμα).
+        """
+        #Έλεγχος μέλους και οφειλής (αναζήτηση με πρωτεύον κλειδί και στους δύο πίνακες)
+        cursor.execute("""
+            SELECT μ.ID_Βιβλιοθήκης, COALESCE(υ.Οφειλή, 0) as Οφειλή
+            FROM Μέλος μ
+            LEFT JOIN Υπόλοιπο_Προστίμων υ ON υ.ID_Μέλους = μ.ID_Μέλους
+            WHERE μ.ID_Μέλους = ?
+        """, (member_id,))
+        member = cursor.fetchone()
         if not member:
             return False, "Το μέλος δεν υπάρχει"
+        if member['Οφειλή'] > self.FINE_CEILING:
+            return False, f"Το μέλος έχει εκκρεμή πρόστιμα {member['Οφειλή']:.2f}€ (όριο δανεισμού {self.FINE_CEILING}€)"
         member_library_id = member['ID_Βιβλιοθήκης']
-        #Έλεγχος αντιτύπου με helper
-        copy = self.fetch_one_dict("""
+        #Έλεγχος αντιτύπου
+        cursor.execute("""
             SELECT ID_Βιβλιοθήκης, Status, ISBN
             FROM Αντίτυπο WHERE ID_Αντιτύπου = ?
         """, (copy_id,))
+        copy = cursor.fetchone()
         if not copy:
             return False, "Το αντίτυπο δεν υπάρχει"
         
-        if copy['Status'] != 'Διαθέσιμο':
+        #Έλεγχος κρατήσεων: δεσμευμένο αντίτυπο μόνο για το μέλος της δέσμευσης,
+        #διαθέσιμο μόνο για την κεφαλή της ουράς
+        if copy['Status'] == 'Κρατημένο':
+            cursor.execute("""
+                SELECT ID_Κράτησης, ID_Μέλους, ID_Αντιτύπου, Λήξη_Παραλαβής FROM Κράτηση
+                WHERE ID_Αντιτύπου = ? AND Κατάσταση = 'Ενεργή'
+            """, (copy_id,))
+            first_reservation = cursor.fetchone()
+            if not first_reservation:
+                return False, f"Το αντίτυπο δεν είναι διαθέσιμο (Status: {copy['Status']})"
+            if first_reservation['ID_Μέλους'] != member_id:
+                return False, f"Το αντίτυπο είναι δεσμευμένο για το μέλος με ID {first_reservation['ID_Μέλους']} έως {first_reservation['Λήξη_Παραλαβής']}"
+
+        elif copy['Status'] != 'Διαθέσιμο':
             return False, f"Το αντίτυπο δεν είναι διαθέσιμο (Status: {copy['Status']})"
-    
-        #Έλεγχος κρατήσεων
-        reservations = self.fetch_all_dict("""
-            SELECT ID_Μέλους, Προτεραιότητα
-            FROM Κράτηση
-            WHERE ISBN = ? AND Κατάσταση = 'Ενεργή'
-            ORDER BY Προτεραιότητα
-        """, (copy['ISBN'],))
+
+        else:
+            #Το μέλος μπορεί να έχει ήδη δεσμευμένο άλλο αντίτυπο του ίδιου τεκμηρίου προς παραλαβή
+            cursor.execute("""
+                SELECT ID_Κράτησης, ID_Μέλους, ID_Αντιτύπου FROM Κράτηση
+                WHERE ID_Μέλους = ? AND ISBN = ? AND Κατάσταση = 'Ενεργή' AND ID_Αντιτύπου IS NOT NULL
+            """, (member_id, copy['ISBN']))
+            first_reservation = cursor.fetchone()
+            if not first_reservation:
+                cursor.execute("""
+                    SELECT ID_Κράτησης, ID_Μέλους, ID_Αντιτύπου FROM Κράτηση
+                    WHERE ISBN = ? AND Κατάσταση = 'Ενεργή' AND ID_Αντιτύπου IS NULL
+                    ORDER BY Προτεραιότητα
+                    LIMIT 1
+                """, (copy['ISBN'],))
+                first_reservation = cursor.fetchone()
+                if first_reservation and first_reservation['ID_Μέλους'] != member_id:
+                    return False, f"Το τεκμήριο είναι κρατημένο. Προτεραιότητα 1 έχει το μέλος με ID {first_reservation['ID_Μέλους']}"
+
+        start_date = datetime.now().strftime('%Y-%m-%d')
+
+        #Ολοκλήρωση κράτησης (αν υπάρχει) - η ουρά δεν αναριθμείται. Αν το μέλος δανείζεται άλλο
+        #αντίτυπο από αυτό που του είχε δεσμευτεί, το δεσμευμένο περνά στην επόμενη κράτηση
+        if first_reservation:
+            cursor.execute("""
+                UPDATE Κράτηση
+                SET Κατάσταση = 'Ολοκληρωμένη'
+                WHERE ID_Κράτησης = ? AND Κατάσταση = 'Ενεργή'
+            """, (first_reservation['ID_Κράτησης'],))
+            held_copy = first_reservation['ID_Αντιτύπου']
+            if held_copy is not None and held_copy != copy_id:
+                self._assign_copy(cursor, held_copy, copy['ISBN'], start_date)
         
-        if reservations:
-            first_reservation = reservations[0]
-            if first_reservation['ID_Μέλους'] != member_id:
-                return False, f"Το τεκμήριο είναι κρατημένο. Προτεραιότητα 1 έχει το μέλος με ID {first_reservation['ID_Μέλους']}"
-        #manual connection για transaction
+        #Υπολογισμός ημερομηνιών
+        end_date = (datetime.now() + timedelta(days=21)).strftime('%Y-%m-%d')
+        interlibrary_loan_id = None
+        
+        #Διαδανεισμός (αν χρειάζεται)
+        if member_library_id != copy['ID_Βιβλιοθήκης']:
+            cursor.execute("""
+                INSERT INTO Διαδανεισμός (ID_Αποστολέα, ID_Παραλήπτη, Κατάσταση)
+                VALUES (?, ?, 'Σε Μεταφορά')
+            """, (copy['ID_Βιβλιοθήκης'], member_library_id))
+            interlibrary_loan_id = cursor.lastrowid
+        
+        #Δημιουργία δανεισμού
+        cursor.execute("""
+            INSERT INTO Δανεισμός (ID_Μέλους, ID_Αντιτύπου, ID_Διαδανεισμού, Ημερομηνία_Έναρξης, Ημερομηνία_Λήξης)
+            VALUES (?, ?, ?, ?, ?)
+        """, (member_id, copy_id, interlibrary_loan_id, start_date, end_date))
+        
+        #Ενημέρωση status αντιτύπου
+        cursor.execute("UPDATE Αντίτυπο SET Status = 'Δανεισμένο' WHERE ID_Αντιτύπου = ?", (copy_id,))
+        
+        # Μήνυμα επιτυχίας
+        if interlibrary_loan_id:
+            return True, f"Δανεισμός ολοκληρώθηκε με διαδανεισμό (ID: {interlibrary_loan_id})"
+        return True, "Δανεισμός ολοκληρώθηκε επιτυχώς"
+
+    def create_loan(self, member_id: int, copy_id: int, staff_library_id: int):
+        """Δημιουργία δανεισμού με υποστήριξη διαδανεισμού και κρατήσεων"""
+        #manual connection για transaction - οι έλεγχοι γίνονται κάτω από το ίδιο κλείδωμα με τις εγγραφές
         conn = self.get_connection()
         cursor = conn.cursor()
         
         try:
-            #Ολοκλήρωση κράτησης (αν υπάρχει)
-            if reservations:
-                cursor.execute("""
-                    UPDATE Κράτηση
-                    SET Κατάσταση = 'Ολοκληρωμένη'
-                    WHERE ID_Μέλους = ? AND ISBN = ? AND Κατάσταση = 'Ενεργή'
-                """, (member_id, copy['ISBN']))
-                
-                # Ενημέρωση προτεραιοτήτων
-                cursor.execute("""
-                    UPDATE Κράτηση
-                    SET Προτεραιότητα = Προτεραιότητα - 1
-                    WHERE ISBN = ? AND Κατάσταση = 'Ενεργή' AND Προτεραιότητα > ?
-                """, (copy['ISBN'], reservations[0]['Προτεραιότητα']))
-            
-            #Υπολογισμός ημερομηνιών
-            start_date = datetime.now().strftime('%Y-%m-%d')
-            end_date = (datetime.now() + timedelta(days=21)).strftime('%Y-%m-%d')
-            interlibrary_loan_id = None
-            
-            #Διαδανεισμός (αν χρειάζεται)
-            if member_library_id != copy['ID_Βιβλιοθήκης']:
-                cursor.execute("""
-                    INSERT INTO Διαδανεισμός (ID_Αποστολέα, ID_Παραλήπτη, Κατάσταση)
-                    VALUES (?, ?, 'Σε Μεταφορά')
-                """, (copy['ID_Βιβλιοθήκης'], member_library_id))
-                interlibrary_loan_id = cursor.lastrowid
-            
-            #Δημιουργία δανεισμού
-            cursor.execute("""
-                INSERT INTO Δανεισμός (ID_Μέλους, ID_Αντιτύπου, ID_Διαδανεισμού, Ημερομηνία_Έναρξης, Ημερομηνία_Λήξης)
-                VALUES (?, ?, ?, ?, ?)
-            """, (member_id, copy_id, interlibrary_loan_id, start_date, end_date))
-            
-            #Ενημέρωση status αντιτύπου
-            cursor.execute("UPDATE Αντίτυπο SET Status = 'Δανεισμένο' WHERE ID_Αντιτύπου = ?", (copy_id,))
-            
-            conn.commit()
+            cursor.execute("BEGIN IMMEDIATE")
+            success, message = self._create_loan(cursor, member_id, copy_id)
+            conn.commit() if success else conn.rollback()
             conn.close()
-            
-            # Μήνυμα επιτυχίας
-            if interlibrary_loan_id:
-                return True, f"Δανεισμός ολοκληρώθηκε με διαδανεισμό (ID: {interlibrary_loan_id})"
-            else:
-                return True, "Δανεισμός ολοκληρώθηκε επιτυχώς"
+            return success, message
         
         except Exception as e:
             conn.rollback()
             conn.close()
             return False, f"Σφάλμα: {str(e)}"
 
-    def return_loan(self, loan_id: int):
-        """Επιστροφή δανεισμού"""
+    def scan_copy(self, copy_id: int, member_id: int = None):
+        """
+        Γρήγορη εξυπηρέτηση με barcode: ένα σαρωμένο αντίτυπο επιστρέφεται αν είναι δανεισμένο,
+        αλλιώς δανείζεται στο μέλος της τρέχουσας σάρωσης. Ένα transaction ανά σάρωση.
+        Επιστρέφει (bool, ενέργεια, τίτλος, μήνυμα).
+        """
         conn = self.get_connection()
         cursor = conn.cursor()
 
         try:
-            # Ανάκτηση στοιχείων δανεισμού
+            cursor.execute("BEGIN IMMEDIATE")
             cursor.execute("""
-                SELECT ID_Αντιτύπου, Κατάσταση, Ημερομηνία_Λήξης
-                FROM Δανεισμός WHERE ID_Δανεισμού = ?
-            """, (loan_id,))
-            loan = cursor.fetchone()
+                SELECT τ.Τίτλος,
+                       (SELECT δ.ID_Δανεισμού FROM Δανεισμός δ
+                        WHERE δ.ID_Αντιτύπου = α.ID_Αντιτύπου AND δ.Κατάσταση IN ('Ενεργός', 'Εκπρόθεσμος')) as ID_Δανεισμού
+                FROM Αντίτυπο α
+                JOIN Τεκμήριο τ ON α.ISBN = τ.ISBN
+                WHERE α.ID_Αντιτύπου = ?
+            """, (copy_id,))
+            copy = cursor.fetchone()
+
+            if not copy:
+                action, title, (success, message) = None, None, (False, "Το αντίτυπο δεν υπάρχει")
+            elif copy['ID_Δανεισμού']:
+                action, title = 'Επιστροφή', copy['Τίτλος']
+                success, message = self._return_loan(cursor, copy['ID_Δανεισμού'], datetime.now().strftime('%Y-%m-%d'))
+            elif member_id:
+                action, title = 'Δανεισμός', copy['Τίτλος']
+                success, message = self._create_loan(cursor, member_id, copy_id)
+            else:
+                action, title, (success, message) = None, copy['Τίτλος'], (False, "Σαρώστε πρώτα την κάρτα μέλους")
 
-            if not loan:
-                conn.close()
-                return False, "Ο δανεισμός δεν βρέθηκε"
+            conn.commit() if success else conn.rollback()
+            conn.close()
+            return success, action, title, message
 
-            if loan['Κατάσταση'] == 'Ολοκληρωμένος':
-                conn.close()
-                return False, "Ο δανεισμός είναι ήδη ολοκληρωμένος"
+        except Exception as e:
+            conn.rollback()
+            conn.close()
+            return False, None, None, f"Σφάλμα: {str(e)}"
 
-            return_date = datetime.now().strftime('%Y-%m-%d')
+    def _return_loan(self, cursor, loan_id: int, return_date: str):
+        """Επιστροφή ενός δανεισμού μέσα στο transaction του καλούντος. Επιστρέφει (bool, μήνυμα)."""
+        # Ανάκτηση στοιχείων δανεισμού
+        cursor.execute("""
+            SELECT δ.ID_Αντιτύπου, δ.ID_EBook, δ.Κατάσταση, δ.Ημερομηνία_Λήξης, α.ISBN
+            FROM Δανεισμός δ
+            LEFT JOIN Αντίτυπο α ON δ.ID_Αντιτύπου = α.ID_Αντιτύπου
+            WHERE δ.ID_Δανεισμού = ?
+        """, (loan_id,))
+        loan = cursor.fetchone()
+
+        if not loan:
+            return False, "Ο δανεισμός δεν βρέθηκε"
+
+        if loan['Κατάσταση'] == 'Ολοκληρωμένος':
+            return False, "Ο δανεισμός είναι ήδη ολοκληρωμένος"
+
+        # Ενημέρωση δανεισμού
+        cursor.execute("""
+            UPDATE Δανεισμός
+            SET Κατάσταση = 'Ολοκληρωμένος',
+                Ημερομηνία_Επιστροφής = ?
+            WHERE ID_Δανεισμού = ?
+        """, (return_date, loan_id))
+
+        # Ενημέρωση αντιτύπου: δέσμευση για την κεφαλή της ουράς ή Διαθέσιμο (ένας δανεισμός EBook δεν έχει αντίτυπο)
+        held_for = None
+        if loan['ID_Αντιτύπου'] is not None and loan['ISBN'] is not None:
+            held_for = self._assign_copy(cursor, loan['ID_Αντιτύπου'], loan['ISBN'], return_date)
+        elif loan['ID_EBook'] is not None:
+            self._serve_ebook_waitlist(cursor, loan['ID_EBook'], return_date)
+
+        # Έλεγχος για πρόστιμο αν είναι εκπρόθεσμο
+        if loan['Κατάσταση'] == 'Εκπρόθεσμος':
+            due_date = datetime.strptime(loan['Ημερομηνία_Λήξης'], '%Y-%m-%d')
+            return_dt = datetime.strptime(return_date, '%Y-%m-%d')
+            days_late = (return_dt - due_date).days
+            fine_amount = days_late * 0.5  # 0.50€ ανά ημέρα
+
+            cursor.execute(self.FINE_UPSERT_SQL, (fine_amount, return_date, loan_id))
+
+        if held_for:
+            return True, f"Επιστροφή καταχωρήθηκε επιτυχώς. Το αντίτυπο δεσμεύτηκε για το μέλος με ID {held_for} (κράτηση)"
+        return True, "Επιστροφή καταχωρήθηκε επιτυχώς"
 
-            # Ενημέρωση δανεισμού
-            cursor.execute("""
-                UPDATE Δανεισμός
-                SET Κατάσταση = 'Ολοκληρωμένος',
-                    Ημερομηνία_Επιστροφής = ?
-                WHERE ID_Δανεισμού = ?
-            """, (return_date, loan_id))
+    def return_loan(self, loan_id: int):
+        """Επιστροφή δανεισμού"""
+        conn = self.get_connection()
+        cursor = conn.cursor()
 
-            # Ενημέρωση αντιτύπου
-            cursor.execute("""
-                UPDATE Αντίτυπο SET Status = 'Διαθέσιμο'
-                WHERE ID_Αντιτύπου = ?
-            """, (loan['ID_Αντιτύπου'],))
+        try:
+            success, message = self._return_loan(cursor, loan_id, datetime.now().strftime('%Y-%m-%d'))
+            conn.commit()
+            conn.close()
+            return success, message
 
-            # Έλεγχος για πρόστιμο αν είναι εκπρόθεσμο
-            if loan['Κατάσταση'] == 'Εκπρόθεσμος':
-                due_date = datetime.strptime(loan['Ημερομηνία_Λήξης'], '%Y-%m-%d')
-                return_dt = datetime.strptime(return_date, '%Y-%m-%d')
-                days_late = (return_dt - due_date).days
-                fine_amount = days_late * 0.5  # 0.50€ ανά ημέρα
+        except Exception as e:
+            conn.rollback()
+            conn.close()
+            return False, f"Σφάλμα: {str(e)}"
 
-                cursor.execute("""
-                    INSERT INTO Πρόστιμο (ID_Δανεισμού, Ποσό, Ημερομηνία_Επιβολής, Κατάσταση)
-                    VALUES (?, ?, ?, 'Εκκρεμής')
-                """, (loan_id, fine_amount, return_date))
+    def return_loans(self, loan_ids):
+        """
+        Μαζική επιστροφή δανεισμών σε ένα transaction. Κάθε δανεισμός έχει δικό του savepoint,
+        οπότε ένας που αποτυγχάνει δεν ακυρώνει τους υπόλοιπους.
+        Επιστρέφει (True, (πλήθος επιστροφών, [(ID, λόγος αποτυχίας)])) ή (False, μήνυμα).
+        """
+        return_date = datetime.now().strftime('%Y-%m-%d')
+        conn = self.get_connection()
+        cursor = conn.cursor()
+        returned, failed = 0, []
+
+        try:
+            cursor.execute("BEGIN")
+            for loan_id in loan_ids:
+                cursor.execute("SAVEPOINT επιστροφή")
+                try:
+                    success, message = self._return_loan(cursor, loan_id, return_date)
+                except Exception as e:
+                    success, message = False, f"Σφάλμα: {str(e)}"
+                    cursor.execute("ROLLBACK TO επιστροφή")
+                cursor.execute("RELEASE επιστροφή")
+
+                if success:
+                    returned += 1
+                else:
+                    failed.append((loan_id, message))
 
             conn.commit()
             conn.close()
-            return True, "Επιστροφή καταχωρήθηκε επιτυχώς"
+            return True, (returned, failed)
 
         except Exception as e:
             conn.rollback()
             conn.close()
             return False, f"Σφάλμα: {str(e)}"
 
+    # Οφειλή πάνω από την οποία δεν επιτρέπεται νέος δανεισμός (€)
+    FINE_CEILING = 10
+
+    # Νέο εκκρεμές πρόστιμο για έναν δανεισμό (ποσό, ημερομηνία, ID_Δανεισμού): μέλος από τον
+    # δανεισμό, βιβλιοθήκη του αντιτύπου ή, για eBook, η βιβλιοθήκη εγγραφής του μέλους
+    FINE_INSERT_SQL = """
+        INSERT INTO Πρόστιμο (ID_Μέλους, ID_Δανεισμού, ID_Βιβλιοθήκης, Ποσό, Ημερομηνία_Επιβολής, Κατάσταση)
+        SELECT δ.ID_Μέλους, δ.ID_Δανεισμού, COALESCE(α.ID_Βιβλιοθήκης, μ.ID_Βιβλιοθήκης), ?, ?, 'Εκκρεμής'
+        FROM Δανεισμός δ
+        JOIN Μέλος μ ON δ.ID_Μέλους = μ.ID_Μέλους
+        LEFT JOIN Αντίτυπο α ON δ.ID_Αντιτύπου = α.ID_Αντιτύπου
+        WHERE δ.ID_Δανεισμού = ?
+    """
+
+    # Ίδιο, αλλά ενημερώνει το ποσό αν ο δανεισμός έχει ήδη εκκρεμές πρόστιμο (ένα ανά δανεισμό)
+    FINE_UPSERT_SQL = FINE_INSERT_SQL + """
+        ON CONFLICT (ID_Δανεισμού) DO UPDATE SET Ποσό = excluded.Ποσό WHERE Κατάσταση = 'Εκκρεμής'
+    """
+
+    def get_fine_balance(self, member_id: int):
+        """Τρέχουσα οφειλή μέλους από το Υπόλοιπο_Προστίμων (αναζήτηση με πρωτεύον κλειδί)"""
+        row = self.fetch_one_dict("SELECT Οφειλή FROM Υπόλοιπο_Προστίμων WHERE ID_Μέλους = ?", (member_id,))
+        return row['Οφειλή'] if row else 0
+
     def get_all_fines(self, search_term: str = "", status_filter: str = "Όλα"):
-        """Ανάκτηση όλων των προστίμων για admin"""
-        query = """
+        """Ανάκτηση όλων των προστίμων για admin (και για δανεισμούς EBook)"""
+        query = f"""
         SELECT π.*, 
                μ.ID_Μέλους,
                μ.Όνομα || ' ' || μ.Επώνυμο as Μέλος,
                τ.Τίτλος,
                δ.Ημερομηνία_Έναρξης,
-               δ.Ημερομηνία_Λήξης
+               δ.Ημερομηνία_Λήξης,
+               {self.LOAN_TYPE_SQL} as Τύπος
         FROM Πρόστιμο π
         JOIN Δανεισμός δ ON π.ID_Δανεισμού = δ.ID_Δανεισμού
-        JOIN Μέλος μ ON δ.ID_Μέλους = μ.ID_Μέλους
-        JOIN Αντίτυπο α ON δ.ID_Αντιτύπου = α.ID_Αντιτύπου
-        JOIN Τεκμήριο τ ON α.ISBN = τ.ISBN
+        JOIN Μέλος μ ON π.ID_Μέλους = μ.ID_Μέλους
+        {self.LOAN_ITEM_SQL}
         WHERE 1=1
         """
         
@@ -773,13 +2933,50 @@ class LibraryModel:
         
         query += " ORDER BY π.Κατάσταση ASC, π.Ημερομηνία_Επιβολής DESC LIMIT 200"
         
-        return self.fetch_all_dict(query, tuple(params))
+        return self.fetch_all_dict(query, tuple(params), record=FineRecord)
+
+    # Καταστάσεις στις οποίες μπορεί να κλείσει ένα εκκρεμές πρόστιμο
+    FINE_CLOSING_STATUSES = ('Πληρωμένο', 'Ακυρωμένο')
 
     def update_fine_status(self, fine_id: int, new_status: str):
-        """Αλλαγή κατάστασης προστίμου"""
-        return self.execute_with_commit(
-            "UPDATE Πρόστιμο SET Κατάσταση = ? WHERE ID_Προστίμου = ?",
-            (new_status, fine_id))
+        """Εξόφληση ή ακύρωση ενός εκκρεμούς προστίμου"""
+        success, result = self.update_fines_status([fine_id], new_status)
+        if not success:
+            return False, result
+        if not result[0]:
+            return False, "Το πρόστιμο δεν είναι εκκρεμές"
+        return True, f"Το πρόστιμο ενημερώθηκε σε '{new_status}'"
+
+    def update_fines_status(self, fine_ids, new_status: str):
+        """
+        Μαζική εξόφληση (με ημερομηνία πληρωμής) ή ακύρωση εκκρεμών προστίμων με μία εντολή.
+        Όσα δεν είναι εκκρεμή παραλείπονται, ώστε ένα πληρωμένο πρόστιμο να μην ξανανοίγει.
+        Επιστρέφει (True, (ενημερωμένα, παραλειφθέντα)) ή (False, μήνυμα).
+        """
+        if new_status not in self.FINE_CLOSING_STATUSES:
+            return False, f"Μη έγκυρη κατάσταση προστίμου: {new_status}"
+
+        fine_ids = list(fine_ids)
+        today = datetime.now().strftime('%Y-%m-%d')
+        conn = self.get_connection()
+        cursor = conn.cursor()
+
+        try:
+            cursor.execute("""
+                UPDATE Πρόστιμο
+                SET Κατάσταση = ?, Ημερομηνία_Πληρωμής = CASE WHEN ? = 'Πληρωμένο' THEN ? END
+                WHERE ID_Προστίμου IN (SELECT value FROM json_each(?)) AND Κατάσταση = 'Εκκρεμής'
+            """, (new_status, new_status, today, json.dumps(fine_ids)))
+            updated = cursor.rowcount
+
+            conn.commit()
+            conn.close()
+            return True, (updated, len(fine_ids) - updated)
+
+        except Exception as e:
+            conn.rollback()
+            conn.close()
+            return False, f"Σφάλμα: {str(e)}"
 
     def impose_fine(self, loan_id: int, amount: float, reason: str = None):
         """Επιβολή προστίμου"""
@@ -788,10 +2985,10 @@ class LibraryModel:
 
         try:
             today = datetime.now().strftime('%Y-%m-%d')
-            cursor.execute("""
-                INSERT INTO Πρόστιμο (ID_Δανεισμού, Ποσό, Ημερομηνία_Επιβολής, Κατάσταση)
-                VALUES (?, ?, ?, 'Εκκρεμής')
-            """, (loan_id, amount, today))
+            cursor.execute(self.FINE_INSERT_SQL, (amount, today, loan_id))
+            if cursor.rowcount == 0:
+                conn.close()
+                return False, "Ο δανεισμός δεν βρέθηκε"
 
             conn.commit()
             conn.close()
@@ -870,17 +3067,79 @@ class LibraryModel:
     def get_couriers(self):
         return self.fetch_all_dict("SELECT * FROM Μεταφορέας")
 
-# ==================== ΔΙΑΧΕΙΡΙΣΗ ΜΕΛΩΝ ==================== #
+    # ==================== ΚΑΤΑΛΟΓΟΣ ΠΡΟΣΩΠΩΝ ==================== #
 
-    def browse_members(self, search_term=""):
-        query = """
-            SELECT μ.*, β.Όνομα as Βιβλιοθήκη
-            FROM Μέλος μ
-            JOIN Βιβλιοθήκη β ON μ.ID_Βιβλιοθήκης = β.ID_Βιβλιοθήκης
-            WHERE μ.Όνομα LIKE ? OR μ.Επώνυμο LIKE ? OR μ.Email LIKE ?
+    # Πίνακας -> (πρωτεύον κλειδί, τύπος εγγραφής)
+    PEOPLE_DIRECTORY = {
+        'Μέλος': ('ID_Μέλους', MemberRecord),
+        'Προσωπικό': ('ID_Προσωπικού', Record),
+    }
+
+    def find_people(self, table: str, key: str):
+        """Ακριβής αναζήτηση με ID, τηλέφωνο ή email μέσω των μοναδικών ευρετηρίων"""
+        id_col, record = self.PEOPLE_DIRECTORY[table]
+        key = str(key).strip()
+        query = f"""
+            SELECT π.*, β.Όνομα as Βιβλιοθήκη
+            FROM {table} π
+            JOIN Βιβλιοθήκη β ON π.ID_Βιβλιοθήκης = β.ID_Βιβλιοθήκης
+        """
+
+        if key.isdigit():
+            query += f" WHERE π.{id_col} = ? OR π.Τηλέφωνο = ? ORDER BY π.{id_col} = ? DESC"
+            return self.fetch_all_dict(query, (int(key),) * 3, record=record)
+        if '@' in key:
+            query += " WHERE π.Email = ?"
+            return self.fetch_all_dict(query, (key,), record=record)
+        return []
+
+    def search_people(self, table: str, search_term: str = "", limit: int = 100, offset: int = 0):
+        """
+        Αναζήτηση στον κατάλογο προσώπων: ακριβές ID/τηλέφωνο/email,
+        αλλιώς κατάταξη (bm25) προθεμάτων ονόματος/επωνύμου/email στο FTS5 ευρετήριο
+        """
+        id_col, record = self.PEOPLE_DIRECTORY[table]
+        search_term = (search_term or "").strip()
+
+        if not search_term:
+            query = f"""
+                SELECT π.*, β.Όνομα as Βιβλιοθήκη
+                FROM {table} π
+                JOIN Βιβλιοθήκη β ON π.ID_Βιβλιοθήκης = β.ID_Βιβλιοθήκης
+                ORDER BY π.{id_col}
+                LIMIT ? OFFSET ?
+            """
+            return self.fetch_all_dict(query, (limit, offset), record=record)
+
+        exact = self.find_people(table, search_term)
+        if exact:
+            return exact[offset:offset + limit]
+
+        match = fts_prefix_query(search_term)
+        if not match:
+            return []
+
+        query = f"""
+            SELECT π.*, β.Όνομα as Βιβλιοθήκη
+            FROM {table}_FTS
+            JOIN {table} π ON π.{id_col} = {table}_FTS.rowid
+            JOIN Βιβλιοθήκη β ON π.ID_Βιβλιοθήκης = β.ID_Βιβλιοθήκης
+            WHERE {table}_FTS MATCH ?
+            ORDER BY bm25({table}_FTS, 10.0, 10.0, 1.0)
+            LIMIT ? OFFSET ?
         """
-        term = f'%{search_term}%'
-        return self.fetch_all_dict(query, (term, term, term))
+        return self.fetch_all_dict(query, (match, limit, offset), record=record)
+
+# ==================== ΔΙΑΧΕΙΡΙΣΗ ΜΕΛΩΝ ==================== #
+
+    def browse_members(self, search_term="", limit: int = 100, offset: int = 0):
+        """Σελιδοποιημένη αναζήτηση μελών μέσω του καταλόγου προσώπων"""
+        return self.search_people('Μέλος', search_term, limit, offset)
+
+    def find_member(self, key: str):
+        """Ακριβής αναζήτηση μέλους με ID, τηλέφωνο ή email"""
+        members = self.find_people('Μέλος', key)
+        return members[0] if members else None
 
     def add_member(self, data: dict):
         return self.execute_with_commit(
@@ -888,6 +3147,141 @@ class LibraryModel:
             (data['Όνομα'], data['Επώνυμο'], data['Email'], data['Τηλέφωνο'], data['Ημ_Εγγραφής'], data['ID_Βιβλιοθήκης'], data['Οδός'], data['Αριθμός'], data['Πόλη'], data['Κατάσταση'])
         )
 
+    # Πολιτικές για γραμμές που συγκρούονται με υπάρχον Email/Τηλέφωνο
+    MEMBER_IMPORT_POLICIES = ('upsert', 'skip', 'reject')
+
+    def _parse_member_row(self, row: dict, libraries: set):
+        """Έλεγχος γραμμής μέλους με τους κανόνες του σχήματος. Επιστρέφει tuple στηλών ή ValueError."""
+        def required(field):
+            value = str(row.get(field) or '').strip()
+            if not value:
+                raise ValueError(f"Λείπει το πεδίο {field}")
+            return value
+
+        library = required('ID_Βιβλιοθήκης')
+        if not library.isdigit() or int(library) not in libraries:
+            raise ValueError(f"Άγνωστη βιβλιοθήκη: {library}")
+
+        phone = re.sub(r'[\s-]', '', required('Τηλέφωνο'))
+        if not phone.isdigit():
+            raise ValueError(f"Μη αριθμητικό τηλέφωνο: {phone}")
+
+        number = required('Αριθμός')
+        if not number.isdigit():
+            raise ValueError(f"Μη αριθμητικός αριθμός οδού: {number}")
+
+        email = required('Email')
+        if '@' not in email:
+            raise ValueError(f"Μη έγκυρο email: {email}")
+
+        status = str(row.get('Κατάσταση_Μέλους') or 'Ενεργό').strip()
+        registered = str(row.get('Ημερομηνία_Εγγραφής') or '').strip() or datetime.now().strftime('%Y-%m-%d')
+
+        return (int(library), required('Όνομα'), required('Επώνυμο'), int(phone), required('Οδός'),
+                int(number), required('Πόλη'), email, status, registered)
+
+    def import_members(self, path: str, policy: str = 'skip', rejects_path: str = None, chunk_size: int = None,
+                       encoding: str = None):
+        """
+        Μαζική εισαγωγή μελών από CSV, JSON lines ή πίνακα JSON (στήλες όπως στον πίνακα Μέλος).
+        Οι συγκρούσεις σε Email/Τηλέφωνο ελέγχονται με ένα ερώτημα ανά chunk στα UNIQUE ευρετήρια και
+        αντιμετωπίζονται κατά την πολιτική: upsert (ενημέρωση), skip (παράλειψη) ή reject (απόρριψη).
+        Επιστρέφει (True, αναφορά) με αποτέλεσμα ανά γραμμή (γραμμή, αποτέλεσμα, ID_Μέλους, λόγος) ή (False, μήνυμα).
+        """
+        if policy not in self.MEMBER_IMPORT_POLICIES:
+            return False, f"Άγνωστη πολιτική: {policy}"
+
+        libraries = {l['ID_Βιβλιοθήκης'] for l in self.fetch_all_dict("SELECT ID_Βιβλιοθήκης FROM Βιβλιοθήκη")}
+        columns = "ID_Βιβλιοθήκης, Όνομα, Επώνυμο, Τηλέφωνο, Οδός, Αριθμός, Πόλη, Email, Κατάσταση_Μέλους, Ημερομηνία_Εγγραφής"
+
+        def write(cursor, items):
+            cursor.executemany(
+                f"INSERT INTO Μέλος ({columns}) VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?)",
+                [values for _, _, values, member_id in items if member_id is None]
+            )
+            # Στην ενημέρωση διατηρείται η αρχική ημερομηνία εγγραφής
+            cursor.executemany("""
+                UPDATE Μέλος SET ID_Βιβλιοθήκης = ?, Όνομα = ?, Επώνυμο = ?, Τηλέφωνο = ?, Οδός = ?,
+                                 Αριθμός = ?, Πόλη = ?, Email = ?, Κατάσταση_Μέλους = ?
+                WHERE ID_Μέλους = ?
+            """, [values[:-1] + (member_id,) for _, _, values, member_id in items if member_id is not None])
+
+        results = []
+        rejected = []
+        seen = {}
+        conn = self.get_connection()
+
+        try:
+            for chunk in chunked(read_import_rows(path, encoding), chunk_size or self.IMPORT_CHUNK_SIZE):
+                parsed = []
+                for line_no, row in chunk:
+                    if row is None:
+                        rejected.append((line_no, "Μη αναγνώσιμη γραμμή", None))
+                        continue
+                    try:
+                        values = self._parse_member_row(row, libraries)
+                    except ValueError as e:
+                        rejected.append((line_no, str(e), row))
+                        continue
+
+                    # Διπλότυπα μέσα στο ίδιο το αρχείο
+                    duplicate = seen.get(values[7]) or seen.get(values[3])
+                    if duplicate:
+                        rejected.append((line_no, f"Διπλότυπο της γραμμής {duplicate}", row))
+                        continue
+                    seen[values[7]] = seen[values[3]] = line_no
+                    parsed.append((line_no, row, values))
+
+                # Ένα ερώτημα ανά chunk στα UNIQUE ευρετήρια Email/Τηλέφωνο
+                existing = conn.execute("""
+                    SELECT ID_Μέλους, Email, Τηλέφωνο FROM Μέλος
+                    WHERE Email IN (SELECT value FROM json_each(?))
+                       OR Τηλέφωνο IN (SELECT value FROM json_each(?))
+                """, (json.dumps([v[7] for _, _, v in parsed]), json.dumps([v[3] for _, _, v in parsed]))).fetchall()
+                by_email = {m['Email']: m['ID_Μέλους'] for m in existing}
+                by_phone = {m['Τηλέφωνο']: m['ID_Μέλους'] for m in existing}
+
+                items = []
+                for line_no, row, values in parsed:
+                    matches = {by_email.get(values[7]), by_phone.get(values[3])} - {None}
+                    if not matches:
+                        items.append((line_no, row, values, None))
+                    elif policy == 'skip':
+                        results.append((line_no, 'Παραλείφθηκε', matches.pop(), "Υπάρχει ήδη μέλος με αυτό το Email/Τηλέφωνο"))
+                    elif policy == 'upsert' and len(matches) == 1:
+                        items.append((line_no, row, values, matches.pop()))
+                    elif policy == 'upsert':
+                        rejected.append((line_no, "Το Email και το Τηλέφωνο ανήκουν σε διαφορετικά μέλη", row))
+                    else:
+                        rejected.append((line_no, "Υπάρχει ήδη μέλος με αυτό το Email/Τηλέφωνο", row))
+
+                written = self._import_chunk(conn, items, write, rejected)
+
+                # Τα ID των νέων μελών με ένα ερώτημα στο ευρετήριο του Email
+                new_ids = {m['Email']: m['ID_Μέλους'] for m in conn.execute(
+                    "SELECT ID_Μέλους, Email FROM Μέλος WHERE Email IN (SELECT value FROM json_each(?))",
+                    (json.dumps([values[7] for _, _, values, member_id in written if member_id is None]),)
+                )}
+                for line_no, _, values, member_id in written:
+                    if member_id is None:
+                        results.append((line_no, 'Νέο', new_ids.get(values[7]), None))
+                    else:
+                        results.append((line_no, 'Ενημερώθηκε', member_id, None))
+
+            conn.close()
+
+        except (OSError, csv.Error, UnicodeError, ValueError) as e:
+            conn.rollback()
+            conn.close()
+            return False, f"Σφάλμα ανάγνωσης αρχείου: {str(e)}"
+
+        results.extend((line_no, 'Απορρίφθηκε', None, reason) for line_no, reason, _ in rejected)
+        results.sort()
+
+        report_error = write_import_report(rejects_path, rejected) if rejected and rejects_path else None
+
+        return True, {'Αποτελέσματα': results, 'Απορρίψεις': rejected, 'Σφάλμα_Αναφοράς': report_error}
+
     def update_member(self, member_id: int, data: dict):
         return self.execute_with_commit(
             "UPDATE Μέλος SET Όνομα=?, Επώνυμο=?, Email=?, Τηλέφωνο=?, Ημερομηνία_Εγγραφής=?, ID_Βιβλιοθήκης=?, Οδός=?, Αριθμός=?, Πόλη=?, Κατάσταση_Μέλους=? WHERE ID_Μέλους=?",
@@ -897,17 +3291,24 @@ class LibraryModel:
     def delete_member(self, member_id: int):
         return self.execute_with_commit("DELETE FROM Μέλος WHERE ID_Μέλους = ?", (member_id,))
 
+    def delete_members(self, member_ids):
+        """Μαζική διαγραφή μελών - όσα έχουν δανεισμούς (ON DELETE RESTRICT) παραλείπονται. Επιστρέφει (True, (διαγραμμένα, παραλειφθέντα))."""
+        member_ids = list(member_ids)
+        try:
+            deleted = self.execute_query("""
+                DELETE FROM Μέλος
+                WHERE ID_Μέλους IN (SELECT value FROM json_each(?))
+                AND NOT EXISTS (SELECT 1 FROM Δανεισμός WHERE Δανεισμός.ID_Μέλους = Μέλος.ID_Μέλους)
+            """, (json.dumps(member_ids),), commit=True)
+            return True, (deleted, len(member_ids) - deleted)
+        except Exception as e:
+            return False, f"Σφάλμα: {str(e)}"
+
     # ==================== ΔΙΑΧΕΙΡΙΣΗ ΠΡΟΣΩΠΙΚΟΥ ==================== #
 
-    def browse_staff(self, search_term=""):
-        query = """
-            SELECT π.*, β.Όνομα as Βιβλιοθήκη
-            FROM Προσωπικό π
-            JOIN Βιβλιοθήκη β ON π.ID_Βιβλιοθήκης = β.ID_Βιβλιοθήκης
-            WHERE π.Όνομα LIKE ? OR π.Επώνυμο LIKE ?
-        """
-        term = f'%{search_term}%'
-        return self.fetch_all_dict(query, (term, term))
+    def browse_staff(self, search_term="", limit: int = 100, offset: int = 0):
+        """Σελιδοποιημένη αναζήτηση προσωπικού μέσω του καταλόγου προσώπων"""
+        return self.search_people('Προσωπικό', search_term, limit, offset)
 
     def add_staff(self, data: dict):
         return self.execute_with_commit(
@@ -933,6 +3334,10 @@ class LibraryModel:
     def delete_staff(self, staff_id: int):
         return self.execute_with_commit("DELETE FROM Προσωπικό WHERE ID_Προσωπικού = ?", (staff_id,))
 
+    def delete_staff_members(self, staff_ids):
+        return self.execute_with_commit(
+            "DELETE FROM Προσωπικό WHERE ID_Προσωπικού IN (SELECT value FROM json_each(?))", (json.dumps(list(staff_ids)),))
+
     # ==================== STATISTICS ==================== #
 
     def get_popular_books(self, limit: int = 10):
@@ -962,16 +3367,104 @@ class LibraryModel:
         return self.fetch_all_dict(query, (limit,))
 
     def get_category_statistics(self):
+        """
+        Στατιστικά ανά κατηγορία αθροισμένα σε κάθε επίπεδο της ιεραρχίας (μια κατηγορία
+        περιλαμβάνει τις υποκατηγορίες της), με ένα πέρασμα πάνω στο Κατηγορία_Ιεραρχία.
+        Η Διαδρομή (π.χ. 'Λογοτεχνία / Ξένη Λογοτεχνία') δίνει τη σειρά του δέντρου.
+        """
         query = '''SELECT Κατηγορία.Όνομα as Κατηγορία,
-                          COUNT(DISTINCT Τεκμήριο.ISBN) as ΑριθμόςΤεκμηρίων,
-                          COUNT(Αντίτυπο.ID_Αντιτύπου) as ΣύνολοΑντιτύπων
+                          (SELECT MAX(Βάθος) FROM Κατηγορία_Ιεραρχία
+                           WHERE Απόγονος = Κατηγορία.ID_Κατηγορίας) as Επίπεδο,
+                          (SELECT group_concat(Όνομα, ' / ') FROM (
+                               SELECT π.Όνομα FROM Κατηγορία_Ιεραρχία ι
+                               JOIN Κατηγορία π ON π.ID_Κατηγορίας = ι.Πρόγονος
+                               WHERE ι.Απόγονος = Κατηγορία.ID_Κατηγορίας
+                               ORDER BY ι.Βάθος DESC)) as Διαδρομή,
+                          COUNT(Τεκμήριο.ISBN) as ΑριθμόςΤεκμηρίων,
+                          COALESCE(SUM(δ.Σύνολο), 0) as ΣύνολοΑντιτύπων,
+                          COALESCE(SUM(δ.Διαθέσιμα), 0) as ΔιαθέσιμαΑντίτυπα
                    FROM Κατηγορία
-                   LEFT JOIN Τεκμήριο ON Κατηγορία.ID_Κατηγορίας = Τεκμήριο.Κατηγορία
-                   LEFT JOIN Αντίτυπο ON Τεκμήριο.ISBN = Αντίτυπο.ISBN
+                   JOIN Κατηγορία_Ιεραρχία ι ON ι.Πρόγονος = Κατηγορία.ID_Κατηγορίας
+                   LEFT JOIN Τεκμήριο ON Τεκμήριο.Κατηγορία = ι.Απόγονος
+                   LEFT JOIN (SELECT ISBN, SUM(Πλήθος) as Σύνολο,
+                                     SUM(Πλήθος) FILTER (WHERE Status = 'Διαθέσιμο') as Διαθέσιμα
+                              FROM Διαθεσιμότητα GROUP BY ISBN) δ ON δ.ISBN = Τεκμήριο.ISBN
                    GROUP BY Κατηγορία.ID_Κατηγορίας
-                   ORDER BY ΣύνολοΑντιτύπων DESC'''
+                   ORDER BY Διαδρομή'''
         return self.fetch_all_dict(query, ())
 
+    def rebuild_availability(self):
+        """
+        Συμφιλίωση του πίνακα Διαθεσιμότητα: τον ξαναχτίζει από τα αντίτυπα.
+        Επιστρέφει (True, πλήθος γραμμών που διέφεραν) ή (False, μήνυμα).
+        """
+        conn = self.get_connection()
+        cursor = conn.cursor()
+
+        try:
+            cursor.execute("BEGIN IMMEDIATE")
+            drift = cursor.execute("""
+                SELECT COUNT(*) FROM (
+                    SELECT * FROM (SELECT CAST(ISBN AS INTEGER), ID_Βιβλιοθήκης, Status, COUNT(*)
+                                   FROM Αντίτυπο GROUP BY ISBN, ID_Βιβλιοθήκης, Status
+                                   EXCEPT SELECT * FROM Διαθεσιμότητα)
+                    UNION ALL
+                    SELECT * FROM (SELECT * FROM Διαθεσιμότητα
+                                   EXCEPT SELECT CAST(ISBN AS INTEGER), ID_Βιβλιοθήκης, Status, COUNT(*)
+                                   FROM Αντίτυπο GROUP BY ISBN, ID_Βιβλιοθήκης, Status)
+                )
+            """).fetchone()[0]
+
+            if drift:
+                for statement in AVAILABILITY_REBUILD_SQL.split(';'):
+                    if statement.strip():
+                        cursor.execute(statement)
+            conn.commit()
+            conn.close()
+            return True, drift
+
+        except Exception as e:
+            conn.rollback()
+            conn.close()
+            return False, f"Σφάλμα: {str(e)}"
+
+    def reconcile_fine_balances(self):
+        """
+        Συμφιλίωση του Υπόλοιπο_Προστίμων με τα εκκρεμή πρόστιμα (νυχτερινός έλεγχος):
+        τον ξαναχτίζει αν διαφέρει. Επιστρέφει (True, πλήθος μελών που διέφεραν) ή (False, μήνυμα).
+        """
+        conn = self.get_connection()
+        cursor = conn.cursor()
+
+        try:
+            cursor.execute("BEGIN IMMEDIATE")
+            drift = cursor.execute("""
+                WITH πραγματικό AS (
+                    SELECT ID_Μέλους, ROUND(SUM(Ποσό), 2) as Οφειλή, COUNT(*) as Εκκρεμή
+                    FROM Πρόστιμο WHERE Κατάσταση = 'Εκκρεμής' GROUP BY ID_Μέλους
+                ), καθολικό AS (
+                    SELECT ID_Μέλους, ROUND(Οφειλή, 2), Εκκρεμή FROM Υπόλοιπο_Προστίμων
+                )
+                SELECT COUNT(DISTINCT ID_Μέλους) FROM (
+                    SELECT * FROM (SELECT * FROM πραγματικό EXCEPT SELECT * FROM καθολικό)
+                    UNION ALL
+                    SELECT * FROM (SELECT * FROM καθολικό EXCEPT SELECT * FROM πραγματικό)
+                )
+            """).fetchone()[0]
+
+            if drift:
+                for statement in FINE_BALANCE_REBUILD_SQL.split(';'):
+                    if statement.strip():
+                        cursor.execute(statement)
+            conn.commit()
+            conn.close()
+            return True, drift
+
+        except Exception as e:
+            conn.rollback()
+            conn.close()
+            return False, f"Σφάλμα: {str(e)}"
+
     # ==================== GENERAL ==================== #
 
     def calculate_overdue_fines(self):
@@ -982,12 +3475,13 @@ class LibraryModel:
         try:
             today = datetime.now().strftime('%Y-%m-%d')
             
-            # Βρες εκπρόθεσμους δανεισμούς (Ενεργός ή ήδη Εκπρόθεσμος)
+            # Βρες εκπρόθεσμους δανεισμούς (Ενεργός ή ήδη Εκπρόθεσμος) - οι δανεισμοί EBook απλώς λήγουν
             cursor.execute("""
                 SELECT δ.ID_Δανεισμού, δ.Ημερομηνία_Λήξης, δ.Κατάσταση
                 FROM Δανεισμός δ
                 WHERE δ.Κατάσταση IN ('Ενεργός', 'Εκπρόθεσμος')
                 AND δ.Ημερομηνία_Λήξης < ?
+                AND δ.ID_EBook IS NULL
             """, (today,))
             
             overdue_loans = cursor.fetchall()
@@ -1010,12 +3504,9 @@ class LibraryModel:
                     existing_fine = cursor.fetchone()
                     
                     if not existing_fine:
-                        # Δημιουργία νέου προστίμου
-                        cursor.execute("""
-                            INSERT INTO Πρόστιμο (ID_Δανεισμού, Ποσό, Ημερομηνία_Επιβολής, Κατάσταση)
-                            VALUES (?, ?, ?, 'Εκκρεμής')
-                        """, (loan['ID_Δανεισμού'], fine_amount, today))
-                        count += 1
+                        # Δημιουργία νέου προστίμου (ένα πληρωμένο πρόστιμο του ίδιου δανεισμού μένει ως έχει)
+                        cursor.execute(self.FINE_UPSERT_SQL, (fine_amount, today, loan['ID_Δανεισμού']))
+                        count += cursor.rowcount
                     else:
                         # Ενημέρωση υπάρχοντος προστίμου με το νέο ποσό
                         cursor.execute("""
@@ -1038,4 +3529,21 @@ class LibraryModel:
         except Exception as e:
             conn.rollback()
             conn.close()
-            return 0    
+            return 0
+
+
+if __name__ == "__main__":
+    # Headless εκτέλεση της συντήρησης (π.χ. από cron ή Task Scheduler)
+    model = LibraryModel()
+    if "--rebuild-availability" in sys.argv[1:]:
+        success, drift = model.rebuild_availability()
+        message = f"Διορθώθηκαν {drift} γραμμές διαθεσιμότητας" if success else drift
+    elif "--reconcile-fines" in sys.argv[1:]:
+        success, drift = model.reconcile_fine_balances()
+        message = f"Διορθώθηκαν {drift} υπόλοιπα προστίμων" if success else drift
+    elif "--autocomplete-stats" in sys.argv[1:]:
+        model.build_autocomplete()
+        message = f"Κατάλογος: {model.catalog_suggestions.stats}\nΜέλη: {model.member_suggestions.stats}"
+    else:
+        success, message = model.run_reservation_maintenance()
+    print(message)
\ No newline at end of file
@@ -1,5 +1,5 @@
 import tkinter as tk
-from tkinter import ttk, messagebox, scrolledtext
+from tkinter import ttk, messagebox, scrolledtext, filedialog
 from datetime import datetime, timedelta
 
 class LibraryView:
@@ -96,7 +96,55 @@ class LibraryView:
 
     # ================= ΠΕΡΙΗΓΗΣΗ/ΔΙΑΧΕΙΡΙΣΗ ΤΕΚΜΗΡΙΩΝ ================= #
 
-    def build_filter_frame(self, parent, title, categories, languages, libraries, on_search):
+    def attach_autocomplete(self, entry, on_suggest, on_pick=None):
+        """
+        Λίστα προτάσεων κάτω από ένα Entry, ενημερώνεται σε κάθε πλήκτρο από το on_suggest(κείμενο).
+        Βέλος κάτω για μετάβαση στη λίστα, Enter/διπλό κλικ για επιλογή, Escape για κλείσιμο.
+        """
+        listbox = tk.Listbox(entry.winfo_toplevel(), height=6)
+
+        def hide(event=None):
+            listbox.place_forget()
+
+        def refresh(event):
+            if event.keysym in ("Return", "Escape", "Down", "Up", "Tab"):
+                return
+            suggestions = on_suggest(entry.get())
+            listbox.delete(0, tk.END)
+            for suggestion in suggestions:
+                listbox.insert(tk.END, suggestion)
+            if suggestions:
+                listbox.place(in_=entry, x=0, rely=1.0, relwidth=1.0)
+                listbox.lift()
+            else:
+                hide()
+
+        def pick(event=None):
+            selected = listbox.curselection()
+            if not selected:
+                return
+            entry.delete(0, tk.END)
+            entry.insert(0, listbox.get(selected[0]))
+            hide()
+            entry.focus_set()
+            if on_pick:
+                on_pick(entry.get())
+
+        def enter_list(event):
+            if listbox.winfo_ismapped() and listbox.size():
+                listbox.focus_set()
+                listbox.selection_set(0)
+
+        entry.bind('<KeyRelease>', refresh, add='+')
+        entry.bind('<Down>', enter_list, add='+')
+        entry.bind('<Escape>', hide, add='+')
+        entry.bind('<FocusOut>', lambda e: entry.after(150, lambda: listbox.focus_get() is listbox or hide()), add='+')
+        listbox.bind('<Return>', pick)
+        listbox.bind('<Double-Button-1>', pick)
+        listbox.bind('<Escape>', lambda e: (hide(), entry.focus_set()))
+        return listbox
+
+    def build_filter_frame(self, parent, title, categories, languages, libraries, on_search, on_suggest=None):
         """Δημιουργία Φίλτρων Αναζήτησης Τεκμηρίων."""
         ttk.Label(parent, text=title, font=("Arial", 14, "bold")).pack(pady=10)
 
@@ -105,7 +153,6 @@ class LibraryView:
 
         category_var = tk.StringVar(value="Όλες")
         language_var = tk.StringVar(value="Όλες")
-        library_var = tk.StringVar(value="Όλες")
 
         ttk.Label(frame, text="Κατηγορία:").grid(row=0, column=0, padx=5)
         ttk.Combobox(frame, textvariable=category_var, values=["Όλες"] + categories, state="readonly").grid(row=0, column=1)
@@ -113,14 +160,28 @@ class LibraryView:
         ttk.Label(frame, text="Γλώσσα:").grid(row=0, column=2, padx=5)
         ttk.Combobox(frame, textvariable=language_var, values=["Όλες"] + languages, state="readonly").grid(row=0, column=3)
 
-        ttk.Label(frame, text="Βιβλιοθήκη:").grid(row=1, column=0, sticky="w", padx=5, pady=5)
-        ttk.Combobox(frame, textvariable=library_var, values=["Όλες"] + libraries, state="readonly", width=20).grid(row=1, column=1, padx=5, pady=5)
+        # Πολλαπλή επιλογή βιβλιοθηκών (καμία επιλογή = όλες)
+        ttk.Label(frame, text="Βιβλιοθήκες:").grid(row=1, column=0, sticky="nw", padx=5, pady=5)
+        library_list = tk.Listbox(frame, selectmode="multiple", exportselection=False, height=4, width=30)
+        for library in libraries:
+            library_list.insert(tk.END, library)
+        library_list.grid(row=1, column=1, padx=5, pady=5)
+
+        def selected_libraries():
+            return [library_list.get(i) for i in library_list.curselection()] or "Όλες"
 
         ttk.Label(frame, text="Αναζήτηση:").grid(row=1, column=2, padx=5)
         search_entry = ttk.Entry(frame, width=30)
         search_entry.grid(row=1, column=3, columnspan=2, sticky="ew")
+        if on_suggest:
+            self.attach_autocomplete(search_entry, on_suggest)
         
-        ttk.Button(frame, text="Εφαρμογή", command=lambda: on_search(category_var.get(), language_var.get(), library_var.get(), search_entry.get())).grid(row=1, column=5, padx=5)
+        available_var = tk.BooleanVar(value=False)
+        ttk.Checkbutton(frame, text="Μόνο διαθέσιμα", variable=available_var).grid(row=0, column=4, padx=5, sticky="w")
+        fuzzy_var = tk.BooleanVar(value=False)
+        ttk.Checkbutton(frame, text="Ανοχή σε λάθη", variable=fuzzy_var).grid(row=0, column=5, padx=5, sticky="w")
+
+        ttk.Button(frame, text="Εφαρμογή", command=lambda: on_search(category_var.get(), language_var.get(), selected_libraries(), search_entry.get(), available_var.get(), fuzzy_var.get())).grid(row=1, column=5, padx=5)
                    
         return frame
     
@@ -135,11 +196,14 @@ class LibraryView:
         else:
             ttk.Button(frame, text="Προβολή Λεπτομερειών & Κράτηση", command=on_details_click).pack(padx=5)
 
-    def build_books_info_window(self, parent, book_info, copies, on_reservation_click, on_ebook_loan=None):
-        """Προβολή λεπτομερειών βιβλίου"""
+    def build_books_info_window(self, parent, details, on_reservation_click, on_ebook_loan=None):
+        """Προβολή λεπτομερειών βιβλίου (details: πακέτο του get_book_bundle)"""
+        book_info = details['Τεκμήριο']
+        copies = details['Αντίτυπα']
+
         info_window = tk.Toplevel(parent)
         info_window.title("Λεπτομέρειες Βιβλίου")
-        info_window.geometry("600x500")
+        info_window.geometry("600x560")
 
         info_frame = ttk.Frame(info_window, padding="20")
         info_frame.pack(fill="both", expand=True)
@@ -153,11 +217,15 @@ class LibraryView:
             ttk.Label(info_frame, text=f"Εκδότης: {book_info['Εκδότης'] or '-'}", font=("Arial", 10)).pack(pady=2)
             ttk.Label(info_frame, text=f"Έτος: {book_info['Χρονολογία'] or '-'}", font=("Arial", 10)).pack(pady=2)
             ttk.Label(info_frame, text=f"Γλώσσα: {book_info['Γλώσσα'] or '-'}", font=("Arial", 10)).pack(pady=2)
+            rating = f"{details['Μέση_Βαθμολογία']}/5 ({details['Αξιολογήσεις']} αξιολογήσεις)" if details['Αξιολογήσεις'] else '-'
+            ttk.Label(info_frame, text=f"Βαθμολογία: {rating}", font=("Arial", 10)).pack(pady=2)
+            ttk.Label(info_frame, text=f"Κρατήσεις σε αναμονή: {details['Μέγεθος_Ουράς']}", font=("Arial", 10)).pack(pady=2)
 
         ttk.Separator(info_frame, orient="horizontal").pack(fill="x", pady=10)
 
         if copies:
-            ttk.Label(info_frame, text=f"Διαθέσιμα αντίτυπα: {len(copies)}", font=("Arial", 11, "bold"), foreground="green").pack(pady=5)
+            per_library = ", ".join(f"{name}: {count}" for name, count in details['Ανά_Βιβλιοθήκη'].items())
+            ttk.Label(info_frame, text=f"Διαθέσιμα αντίτυπα: {len(copies)} ({per_library})", font=("Arial", 11, "bold"), foreground="green").pack(pady=5)
 
             # Λίστα βιβλιοθηκών
             copies_text = scrolledtext.ScrolledText(info_frame, height=6, width=60)
@@ -233,7 +301,7 @@ class LibraryView:
 
         ttk.Button(frame, text="Αποθήκευση Αλλαγών", command=lambda: on_save(popup, entries)).pack(pady=20)
 
-    def build_add_book_frame(self, parent, category_names, on_back, on_add):
+    def build_add_book_frame(self, parent, category_names, on_back, on_add, on_import):
         ttk.Label(parent, text="Προσθήκη Νέου Τεκμηρίου", font=("Arial", 14, "bold")).pack(pady=10)
         
         ttk.Button(parent, text="Πίσω", command=on_back, width=15).pack(pady=5, anchor='w', padx=20)
@@ -278,6 +346,7 @@ class LibraryView:
         button_frame.grid(row=len(fields)+3, column=0, columnspan=3, pady=20)
             
         ttk.Button(button_frame, text="Προσθήκη Τεκμηρίου", command=on_add, width=25).pack(side='left', padx=5)
+        ttk.Button(button_frame, text="Μαζική Εισαγωγή από Αρχείο...", command=on_import, width=30).pack(side='left', padx=5)
         
         return entries, category_var, language_var
     
@@ -321,7 +390,7 @@ class LibraryView:
             tk.Label(parent, text="Δεν βρέθηκαν δανεισμοί.").pack()
             return
 
-    def build_loan_management_frame(self, parent, on_search, on_new_loan, on_return_book):
+    def build_loan_management_frame(self, parent, on_search, on_new_loan, on_return_book, on_desk_mode):
         """Οθόνη διαχείρισης δανεισμών για admin"""
         ttk.Label(parent, text="Διαχείριση Δανεισμών", font=("Arial", 14, "bold")).pack(pady=10)
         
@@ -347,6 +416,8 @@ class LibraryView:
                   command=lambda: on_search(search_entry.get(), status_var.get())).grid(row=0, column=4, padx=5)
         ttk.Button(filter_frame, text="Νέος Δανεισμός", 
                   command=on_new_loan).grid(row=0, column=5, padx=5)
+        ttk.Button(filter_frame, text="Γκισέ (Barcode)", 
+                  command=on_desk_mode).grid(row=0, column=6, padx=5)
         
         # Info text
         info_text = "Πληροφορίες: Διπλό κλικ σε δανεισμό για λεπτομέρειες. Επιλέξτε και πατήστε 'Επιστροφή' για να επιστρέψετε βιβλίο."
@@ -359,7 +430,8 @@ class LibraryView:
         
         return search_entry, status_var
 
-    def build_new_loan_form(self, parent, libraries, on_search_member, on_search_copy, on_create_loan, on_cancel):
+    def build_new_loan_form(self, parent, libraries, on_search_member, on_search_copy, on_create_loan, on_cancel,
+                            on_suggest_member=None, on_suggest_title=None):
         """Popup για δημιουργία νέου δανεισμού"""
         popup = tk.Toplevel(parent)
         popup.title("Νέος Δανεισμός")
@@ -377,12 +449,15 @@ class LibraryView:
         search_member_frame = ttk.Frame(member_frame)
         search_member_frame.pack(fill="x", pady=5)
         
-        ttk.Label(search_member_frame, text="ID Μέλους:").pack(side="left", padx=5)
-        member_id_entry = ttk.Entry(search_member_frame, width=15)
+        ttk.Label(search_member_frame, text="ID, Τηλέφωνο, Email ή Όνομα:").pack(side="left", padx=5)
+        member_id_entry = ttk.Entry(search_member_frame, width=30)
         member_id_entry.pack(side="left", padx=5)
+        member_id_entry.bind('<Return>', lambda e: on_search_member(member_id_entry))
         
         ttk.Button(search_member_frame, text="Αναζήτηση Μέλους", 
                   command=lambda: on_search_member(member_id_entry)).pack(side="left", padx=5)
+        if on_suggest_member:
+            self.attach_autocomplete(member_id_entry, on_suggest_member, lambda _: on_search_member(member_id_entry))
         
         member_info_label = ttk.Label(member_frame, text="", foreground="blue", font=("Arial", 10))
         member_info_label.pack(anchor="w", padx=5, pady=5)
@@ -399,6 +474,8 @@ class LibraryView:
         
         ttk.Button(search_frame, text="Αναζήτηση", 
                   command=lambda: on_search_copy(search_entry.get())).pack(side="left", padx=5)
+        if on_suggest_title:
+            self.attach_autocomplete(search_entry, on_suggest_title, on_search_copy)
         
         columns = ["ID", "ISBN", "Τίτλος", "Βιβλιοθήκη", "Κατάσταση"]
         copy_tree, _ = self.create_treeview(copy_frame, columns, widths=[60, 100, 250, 150, 100], height=8)
@@ -419,6 +496,65 @@ class LibraryView:
         
         return popup, member_info_label, copy_tree, warning_label
 
+    def build_desk_mode_window(self, parent, on_member_scan, on_copy_scan, on_clear_member):
+        """Γκισέ εξυπηρέτησης με barcode: σάρωση κάρτας μέλους και μετά κάθε αντιτύπου"""
+        popup = tk.Toplevel(parent)
+        popup.title("Γκισέ Εξυπηρέτησης (Barcode)")
+        popup.geometry("800x600")
+
+        main_frame = ttk.Frame(popup, padding="20")
+        main_frame.pack(fill="both", expand=True)
+
+        scan_frame = ttk.LabelFrame(main_frame, text="Σάρωση", padding="10")
+        scan_frame.pack(fill="x", pady=10)
+
+        ttk.Label(scan_frame, text="Κάρτα Μέλους:").grid(row=0, column=0, sticky="w", padx=5, pady=5)
+        member_entry = ttk.Entry(scan_frame, width=25)
+        member_entry.grid(row=0, column=1, padx=5, pady=5)
+        member_entry.bind('<Return>', lambda e: on_member_scan(member_entry))
+        ttk.Button(scan_frame, text="Επόμενο Μέλος", command=lambda: on_clear_member(member_entry)).grid(row=0, column=2, padx=5)
+
+        member_label = ttk.Label(scan_frame, text="Χωρίς μέλος: οι σαρώσεις κάνουν μόνο επιστροφές", foreground="gray", font=("Arial", 10))
+        member_label.grid(row=1, column=0, columnspan=3, sticky="w", padx=5)
+
+        ttk.Label(scan_frame, text="Αντίτυπο:").grid(row=2, column=0, sticky="w", padx=5, pady=5)
+        copy_entry = ttk.Entry(scan_frame, width=25)
+        copy_entry.grid(row=2, column=1, padx=5, pady=5)
+        copy_entry.bind('<Return>', lambda e: on_copy_scan(copy_entry))
+
+        ttk.Label(main_frame, text="Δανεισμένο αντίτυπο → επιστροφή, διαθέσιμο → δανεισμός στο τρέχον μέλος",
+                  font=("Arial", 9), foreground="gray").pack(anchor="w")
+
+        columns = ["Ώρα", "Αντίτυπο", "Τίτλος", "Ενέργεια", "Αποτέλεσμα"]
+        session_tree, _ = self.create_treeview(main_frame, columns, widths=[70, 70, 220, 90, 300])
+        session_tree.tag_configure("error", foreground="red")
+
+        member_entry.focus_set()
+        return popup, member_label, copy_entry, session_tree
+
+    def build_member_choice_window(self, parent, members, on_select):
+        """Popup επιλογής μέλους όταν η αναζήτηση επιστρέφει πολλά αποτελέσματα"""
+        popup = tk.Toplevel(parent)
+        popup.title("Επιλογή Μέλους")
+        popup.geometry("600x350")
+
+        ttk.Label(popup, text=f"Βρέθηκαν {len(members)} μέλη - επιλέξτε ένα:", font=("Arial", 11, "bold")).pack(pady=10)
+
+        columns = ["ID", "Ονοματεπώνυμο", "Τηλέφωνο", "Email"]
+        tree, _ = self.create_treeview(popup, columns, widths=[60, 200, 110, 200], height=8)
+        for m in members:
+            tree.insert("", "end", values=(m['ID_Μέλους'], f"{m['Όνομα']} {m['Επώνυμο']}", m['Τηλέφωνο'], m['Email']))
+
+        def choose(event=None):
+            selected = tree.selection()
+            if selected:
+                member_id = tree.item(selected[0])['values'][0]
+                popup.destroy()
+                on_select(next(m for m in members if m['ID_Μέλους'] == member_id))
+
+        tree.bind('<Double-1>', choose)
+        ttk.Button(popup, text="Επιλογή", command=choose).pack(pady=10)
+
     # ================= ΚΡΑΤΗΣΕΙΣ ================= #
 
     def build_reservations_frame(self, parent, reservations, on_cancel_reservation):
@@ -453,7 +589,7 @@ class LibraryView:
             text = f"{fine['Τίτλος']}: {fine['Ποσό']:.2f}€ (Επιβλήθηκε: {fine['Ημερομηνία_Επιβολής']})"
             ttk.Label(parent, text=text, font=("Arial", 10)).pack(anchor="w", padx=20, pady=5)
 
-    def build_fine_management_frame(self, parent, on_search, on_impose, on_update_status):
+    def build_fine_management_frame(self, parent, on_search, on_impose, on_pay, on_cancel):
         """Frame για διαχείριση προστίμων"""
         ttk.Label(parent, text="Διαχείριση Προστίμων", 
                  font=("Arial", 14, "bold")).pack(pady=10)
@@ -481,7 +617,8 @@ class LibraryView:
         action_frame.pack(fill="x", pady=10)
         
         ttk.Button(action_frame, text="Επιβολή Προστίμου", command=on_impose).pack(side="left", padx=5)
-        ttk.Button(action_frame, text="Αλλαγή Κατάστασης", command=on_update_status).pack(side="left", padx=5)
+        ttk.Button(action_frame, text="Εξόφληση", command=on_pay).pack(side="left", padx=5)
+        ttk.Button(action_frame, text="Ακύρωση Προστίμου", command=on_cancel).pack(side="left", padx=5)
         
         return search_entry, status_var
 
@@ -571,7 +708,7 @@ class LibraryView:
 
     # ================= ΚΡΑΤΗΣΗ ΧΩΡΟΥ ================= #
 
-    def build_space_reservation_frame(self, parent, on_search, on_reservation, on_cancel):
+    def build_space_reservation_frame(self, parent, on_search, on_reservation, on_cancel, on_show_occupancy):
         ttk.Label(parent, text="Κράτηση Χώρου Μελέτης", font=("Arial", 14, "bold")).pack(pady=10)
         
         # Tabs
@@ -614,6 +751,11 @@ class LibraryView:
         time_entry.grid(row=2, column=1, padx=5, pady=10, sticky="w")
         time_entry.insert(0, "09:00")
 
+        # Χωρητικότητα
+        ttk.Label(form_frame, text="Ελάχιστη Χωρητικότητα:").grid(row=3, column=0, sticky="w", padx=5, pady=10)
+        capacity_entry = ttk.Entry(form_frame, width=20)
+        capacity_entry.grid(row=3, column=1, padx=5, pady=10, sticky="w")
+
         ttk.Button(form_frame, text="Αναζήτηση Διαθέσιμων Χώρων", command=on_search).grid(row=5, column=0, columnspan=3, pady=20)
 
         ttk.Button(new_tab, text="Καταχώρηση Κράτησης", command=on_reservation).pack(pady=10)
@@ -624,8 +766,63 @@ class LibraryView:
 
         ttk.Button(my_reservations_tab, text="Ακύρωση Επιλεγμένης Κράτησης", command=on_cancel).pack(pady=10)
 
+        # Tab 3: Πληρότητα
+        occupancy_tab = ttk.Frame(notebook, padding="10")
+        notebook.add(occupancy_tab, text="Πληρότητα")
+
+        controls = ttk.Frame(occupancy_tab)
+        controls.pack(fill="x")
+        ttk.Label(controls, text="Ημέρες:").pack(side="left", padx=5)
+        days_var = tk.StringVar(value="1")
+        ttk.Combobox(controls, textvariable=days_var, values=["1", "2", "3", "7"], state="readonly", width=5).pack(side="left")
+        ttk.Button(controls, text="Προβολή Πληρότητας", command=lambda: on_show_occupancy(int(days_var.get()))).pack(side="left", padx=10)
+        ttk.Label(controls, text="■ κρατημένο   ★ δική σας κράτηση   · δεν χωράει κράτηση   (διπλό κλικ σε κενό κελί για κράτηση)").pack(side="left", padx=10)
+
+        occupancy_frame = ttk.Frame(occupancy_tab)
+        occupancy_frame.pack(fill="both", expand=True)
+
         return (my_reservations_tab, has_computers_var, has_projector_var, has_board_var, has_ac_var, has_printer_var, has_sockets_var,
-                date_entry, time_entry)
+                date_entry, time_entry, capacity_entry, occupancy_frame)
+
+    def build_space_occupancy_grid(self, parent, spaces, slots, grid, on_cell_select):
+        """Ημερολόγιο πληρότητας: γραμμές οι χώροι, στήλες οι χρονικές θυρίδες"""
+        for widget in parent.winfo_children():
+            widget.destroy()
+
+        if not spaces:
+            ttk.Label(parent, text="Δεν βρέθηκαν χώροι").pack(pady=20)
+            return None
+
+        multi_day = slots[0][0] != slots[-1][0]
+        labels = [f"{day[8:10]}/{day[5:7]} {start}" if multi_day else start for day, start in slots]
+        columns = ["Χώρος"] + labels
+
+        hsb = ttk.Scrollbar(parent, orient='horizontal')
+        hsb.pack(side='bottom', fill='x')
+        tree, _ = self.create_treeview(parent, columns, widths=[180] + [80 if multi_day else 50] * len(labels))
+        tree.configure(xscrollcommand=hsb.set)
+        hsb.config(command=tree.xview)
+        for col in labels:
+            tree.column(col, anchor="center", stretch=False)
+
+        marks = ("", "■", "★", "·")
+        for space, row in zip(spaces, grid):
+            tree.insert("", "end", values=[f"{space['Όνομα_Χώρου']} ({space['Βιβλιοθήκη']})"] + [marks[cell] for cell in row],
+                        tags=(str(space['ID_Χώρου']),))
+
+        def on_double_click(event):
+            item = tree.identify_row(event.y)
+            column = tree.identify_column(event.x)
+            if not item or column in ("", "#1"):
+                return
+            index = int(column[1:]) - 2
+            row = tree.index(item)
+            if grid[row][index] == 0:
+                day, start = slots[index]
+                on_cell_select(spaces[row]['ID_Χώρου'], day, start)
+
+        tree.bind("<Double-1>", on_double_click)
+        return tree
 
     # ================ ΣΤΑΤΙΣΤΙΚΑ ================= #
 
@@ -854,21 +1051,53 @@ class LibraryView:
 
         ttk.Button(frame, text="Αποθήκευση", command=lambda: on_save(popup, entries)).grid(row=12, column=0, columnspan=2, pady=20)
 
-    def build_generic_filter_frame(self, parent, title, on_search, on_add, on_edit, on_delete):
+    def build_generic_filter_frame(self, parent, title, on_search, on_add, on_edit, on_delete, on_page=None, on_import=None):
         ttk.Label(parent, text=title, font=("Arial", 14, "bold")).pack(pady=10)
         frame = ttk.LabelFrame(parent, text="Ενέργειες & Αναζήτηση", padding=10)
         frame.pack(fill="x", pady=10)
         
         search_ent = ttk.Entry(frame, width=30)
         search_ent.pack(side="left", padx=5)
+        search_ent.bind('<Return>', lambda e: on_search(search_ent.get()))
         ttk.Button(frame, text="Αναζήτηση", command=lambda: on_search(search_ent.get())).pack(side="left", padx=5)
+
+        # Σελιδοποίηση αποτελεσμάτων
+        if on_page:
+            ttk.Button(frame, text="◀", width=3, command=lambda: on_page(search_ent.get(), -1)).pack(side="left", padx=2)
+            ttk.Button(frame, text="▶", width=3, command=lambda: on_page(search_ent.get(), 1)).pack(side="left", padx=2)
         
+        if on_import:
+            ttk.Button(frame, text="Μαζική Εισαγωγή", command=on_import).pack(side="right", padx=5)
         ttk.Button(frame, text="Προσθήκη", command=on_add).pack(side="right", padx=5)
         ttk.Button(frame, text="Επεξεργασία", command=on_edit).pack(side="right", padx=5)
         ttk.Button(frame, text="Διαγραφή", command=on_delete).pack(side="right", padx=5)
         
         return frame
 
+    def build_member_import_window(self, parent, on_start):
+        """Επιλογή πολιτικής συγκρούσεων πριν τη μαζική εισαγωγή μελών"""
+        popup = tk.Toplevel(parent)
+        popup.title("Μαζική Εισαγωγή Μελών")
+        popup.geometry("420x230")
+
+        frame = ttk.Frame(popup, padding=20)
+        frame.pack(fill="both", expand=True)
+
+        ttk.Label(frame, text="Όταν το Email ή το Τηλέφωνο υπάρχει ήδη:", font=("Arial", 10, "bold")).pack(anchor="w", pady=5)
+
+        policy_var = tk.StringVar(value="skip")
+        ttk.Radiobutton(frame, text="Παράλειψη της γραμμής", variable=policy_var, value="skip").pack(anchor="w")
+        ttk.Radiobutton(frame, text="Ενημέρωση του υπάρχοντος μέλους", variable=policy_var, value="upsert").pack(anchor="w")
+        ttk.Radiobutton(frame, text="Απόρριψη με καταγραφή στην αναφορά", variable=policy_var, value="reject").pack(anchor="w")
+
+        def start():
+            policy = policy_var.get()
+            popup.destroy()
+            on_start(policy)
+
+        ttk.Button(frame, text="Επιλογή Αρχείου & Εισαγωγή", command=start).pack(pady=15)
+        return popup
+
     # ================= ΒΟΗΘΗΤΙΚΕΣ ΣΥΝΑΡΤΗΣΕΙΣ ================= #
 
     def show_message(self, title, message, is_error=False):
@@ -878,4 +1107,11 @@ class LibraryView:
             messagebox.showinfo(title, message)
             
     def ask_confirmation(self, title, message):
-        return messagebox.askyesno(title, message)
\ No newline at end of file
+        return messagebox.askyesno(title, message)
+
+    def ask_import_file(self, title):
+        """Επιλογή αρχείου CSV / JSON για μαζική εισαγωγή"""
+        return filedialog.askopenfilename(
+            title=title,
+            filetypes=[("CSV / JSON", "*.csv *.json *.jsonl *.ndjson"), ("Όλα τα αρχεία", "*.*")]
+        )
\ No newline at end of file